@@ -1,16 +1,10 @@
-from concurrent.futures.thread import ThreadPoolExecutor
-
 from pilotscope.Anchor.BaseAnchor.BasePushHandler import HintPushHandler
 from pilotscope.Common.TimeStatistic import TimeStatistic
-from pilotscope.Common.Util import (
-    wait_futures_results,
-)
-from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
+from pilotscope.DBInteractor.PlanExplorer import PlanExplorer
 from pilotscope.Factory.DBControllerFectory import DBControllerFactory
 from pilotscope.PilotConfig import PilotConfig
 from pilotscope.PilotEnum import DatabaseEnum
 from pilotscope.PilotModel import PilotModel
-from pilotscope.PilotTransData import PilotTransData
 
 
 class BaoHintPushHandler(HintPushHandler):
@@ -56,6 +50,7 @@ class BaoHintPushHandler(HintPushHandler):
         self.config = config
         self.db_controller = DBControllerFactory.get_db_controller(config)
         self.bao_hint = self.HintForBao(config.db_type)
+        self.plan_explorer = PlanExplorer(config, parallel_num=len(self.bao_hint.arms_hint2val))
 
     def predict(self, plans):
         return self.model.model.predict(plans)
@@ -63,39 +58,22 @@ class BaoHintPushHandler(HintPushHandler):
     def acquire_injected_data(self, sql):
         try:
             TimeStatistic.start("AI")
-            # with ThreadPoolExecutor(max_workers=len(self.bao_hint.arms_hint2val)) as pool:
-            with ThreadPoolExecutor(max_workers=1) as pool:
-                futures = []
-                for hint2val in self.bao_hint.arms_hint2val:
-                    future = pool.submit(self._get_plan, sql, hint2val)
-                    futures.append(future)
-                plans = wait_futures_results(futures)
-                pass
-
-            origin_plans = plans
-            plans = []
+            push_configs = [{"hint": hint2val} for hint2val in self.bao_hint.arms_hint2val]
+            # the arms producing an identical plan are predicted only once
+            config_and_plans = self.plan_explorer.explore(sql, push_configs)
+            plans = [plan for _, plan in config_and_plans]
+            if self.model.have_cache_data:
+                buffercache = self.db_controller.get_buffercache()
+                for plan in plans:
+                    plan["Buffers"] = buffercache
 
             TimeStatistic.start("Predict")
-            est_exe_time = self.model.model.predict(plans)
+            model, self.served_model_version = self.model.get_model_and_version()
+            est_exe_time = model.predict(plans)
             TimeStatistic.end("Predict")
             print("BAO: ", est_exe_time, flush=True)
             TimeStatistic.end("AI")
-            idx = est_exe_time.argmin()
-            pass
+            return config_and_plans[est_exe_time.argmin()][0]["hint"]
         except Exception as e:
-            idx = 0
-        return self.bao_hint.arms_hint2val[idx]
-
-    def _get_plan(self, sql, hint2val):
-        pilot_data_interactor = PilotDataInteractor(self.config)
-        # print(hint2val)
-        pilot_data_interactor.push_hint(hint2val)
-        pilot_data_interactor.pull_physical_plan()
-        if self.model.have_cache_data:
-            pilot_data_interactor.pull_buffercache()
-
-        data: PilotTransData = pilot_data_interactor.execute(sql)
-        plan = data.physical_plan
-        if self.model.have_cache_data:
-            plan["Buffers"] = data.buffercache
-        return plan
+            print("BAO: fall back to the first arm, {}: {}".format(type(e).__name__, e), flush=True)
+            return self.bao_hint.arms_hint2val[0]
@@ -8,32 +8,78 @@ from pilotscope.Common.Index import Index as PilotIndex
 from pilotscope.DBController.BaseDBController import BaseDBController
 from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
 from pilotscope.DataManager.DataManager import DataManager
+from pilotscope.Factory.DBControllerFectory import DBControllerFactory
 from pilotscope.PilotEvent import PeriodicModelUpdateEvent
 from pilotscope.PilotModel import PilotModel
 
 
 class DbConnector:
 
-    def __init__(self, data_interactor: PilotDataInteractor):
+    def __init__(self, data_interactor: PilotDataInteractor, is_own_db_controller=False):
+        """
+        :param data_interactor: the data interactor with the simulated index enabled
+        :param is_own_db_controller: whether the db controller of `data_interactor` is only used by this connector,
+            so that its engine is disposed by `close`
+        """
         super().__init__()
         self.data_interactor = data_interactor
         self.db_controller = data_interactor.db_controller
+        self.is_own_db_controller = is_own_db_controller
 
     def get_cost(self, query: Query):
         return self.db_controller.get_estimated_cost(query.text)
 
-    def drop_indexes(self):
-        self.db_controller.drop_all_indexes()
+    def drop_indexes(self, indexes=None):
+        """
+        Drop the given indexes by one statement, or all indexes if `indexes` is None.
+        """
+        if indexes is None:
+            self.db_controller.drop_all_indexes()
+        else:
+            self.db_controller.drop_indexes([to_pilot_index(index) for index in indexes])
 
     def drop_index(self, index):
         self.db_controller.drop_index(to_pilot_index(index))
 
+    def create_index(self, index):
+        self.create_indexes([index])
+
+    def create_indexes(self, indexes):
+        """
+        Create the indexes by one statement and set their `hypopg_oid` and `hypopg_name`.
+        """
+        pilot_indexes = [to_pilot_index(index) for index in indexes]
+        self.db_controller.create_indexes(pilot_indexes)
+        for index, pilot_index in zip(indexes, pilot_indexes):
+            index.hypopg_oid = pilot_index.hypopg_oid
+            index.hypopg_name = pilot_index.hypopg_name
+
     def get_index_byte(self, index):
         return self.db_controller.get_index_byte(index)
 
+    def get_indexes_byte(self, indexes):
+        return self.db_controller.get_indexes_byte([to_pilot_index(index) for index in indexes])
+
     def get_config(self):
         return self.db_controller.config
 
+    def create_worker(self):
+        """
+        Create a connector owning a new db controller, e.g., for a worker of the parallel cost evaluation. Thus, its
+        connection, hypothetical indexes and plan cache are not shared with this connector or other workers.
+        """
+        db_controller = DBControllerFactory.create_db_controller(self.get_config(), enable_simulate_index=True)
+        data_interactor = PilotDataInteractor(self.get_config(), enable_simulate_index=True,
+                                              db_controller=db_controller)
+        return DbConnector(data_interactor, is_own_db_controller=True)
+
+    def close(self):
+        # noinspection PyProtectedMember
+        self.db_controller._disconnect()
+        if self.is_own_db_controller:
+            # the engine of a shared db controller is still used by others
+            self.db_controller.engine.dispose()
+
 
 class IndexPeriodicModelUpdateEvent(PeriodicModelUpdateEvent):
 
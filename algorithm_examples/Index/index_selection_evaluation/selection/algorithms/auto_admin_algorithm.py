@@ -120,10 +120,11 @@ class AutoAdminAlgorithm(SelectionAlgorithm):
         lowest_cost = None
 
         for number_of_indexes in range(1, number_indexes_naive + 1):
-            for index_combination in itertools.combinations(
-                candidate_indexes, number_of_indexes
-            ):
-                cost = self._simulate_and_evaluate_cost(workload, index_combination)
+            index_combinations = list(
+                itertools.combinations(candidate_indexes, number_of_indexes)
+            )
+            costs = self._simulate_and_evaluate_costs(workload, index_combinations)
+            for index_combination, cost in zip(index_combinations, costs):
                 if not lowest_cost or cost < lowest_cost:
                     lowest_cost_indexes = index_combination
                     lowest_cost = cost
@@ -149,8 +150,11 @@ class AutoAdminAlgorithm(SelectionAlgorithm):
 
         logging.debug(f"Searching in {len(candidate_indexes)} indexes")
 
-        for index in candidate_indexes:
-            cost = self._simulate_and_evaluate_cost(workload, current_indexes | {index})
+        candidates = list(candidate_indexes)
+        costs = self._simulate_and_evaluate_costs(
+            workload, [current_indexes | {index} for index in candidates]
+        )
+        for index, cost in zip(candidates, costs):
             if not best_index[0] or cost < best_index[1]:
                 best_index = (index, cost)
         if best_index[0] and best_index[1] < current_costs:
@@ -173,6 +177,14 @@ class AutoAdminAlgorithm(SelectionAlgorithm):
         cost = self.cost_evaluation.calculate_cost(workload, indexes, store_size=True)
         return round(cost, 2)
 
+    # pilot modification: the costs are calculated in a batch, which is sharded across the workers of the cost
+    # evaluation
+    def _simulate_and_evaluate_costs(self, workload, index_combinations):
+        costs = self.cost_evaluation.calculate_costs(
+            workload, index_combinations, store_size=True
+        )
+        return [round(cost, 2) for cost in costs]
+
     def create_multicolumn_indexes(self, workload, indexes):
         multicolumn_candidates = set()
         for index in indexes:
@@ -56,17 +56,18 @@ class ExtendAlgorithm(SelectionAlgorithm):
             single_attribute_index_candidates = self._get_candidates_within_budget(
                 index_combination_size, single_attribute_index_candidates
             )
+            # (combination, old_index_size)
+            combinations = []
             for candidate in single_attribute_index_candidates:
                 # Only single column index generation
                 if candidate not in index_combination:
-                    self._evaluate_combination(
-                        index_combination + [candidate], best, current_cost
-                    )
+                    combinations.append((index_combination + [candidate], 0))
 
             for attribute in extension_attribute_candidates:
                 # Multi column indexes are generated by attaching columns
                 # to existing indexes
-                self._attach_to_indexes(index_combination, attribute, best, current_cost)
+                combinations += self._attached_combinations(index_combination, attribute)
+            self._evaluate_combinations(combinations, best, current_cost)
             if best["benefit_to_size_ratio"] <= 0:
                 break
 
@@ -92,10 +93,19 @@ class ExtendAlgorithm(SelectionAlgorithm):
         return index_combination
 
     def _attach_to_indexes(self, index_combination, attribute, best, current_cost):
+        for new_combination, old_index_size in self._attached_combinations(
+                index_combination, attribute
+        ):
+            self._evaluate_combination(
+                new_combination, best, current_cost, old_index_size
+            )
+
+    def _attached_combinations(self, index_combination, attribute):
         assert (
                 attribute.is_single_column() is True
         ), "Attach to indexes called with multi column index"
 
+        combinations = []
         for position, index in enumerate(index_combination):
             if len(index.columns) >= self.max_index_width:
                 continue
@@ -107,12 +117,10 @@ class ExtendAlgorithm(SelectionAlgorithm):
                 # We don't replace, but del and append to keep track of the append order
                 del new_combination[position]
                 new_combination.append(new_index)
-                self._evaluate_combination(
-                    new_combination,
-                    best,
-                    current_cost,
-                    index_combination[position].estimated_size,
+                combinations.append(
+                    (new_combination, index_combination[position].estimated_size)
                 )
+        return combinations
 
     def _get_candidates_within_budget(self, index_combination_size, candidates):
         new_candidates = []
@@ -123,12 +131,24 @@ class ExtendAlgorithm(SelectionAlgorithm):
                 new_candidates.append(candidate)
         return new_candidates
 
+    # pilot modification: the costs of the combinations are calculated in a batch, which is sharded across the
+    # workers of the cost evaluation
+    def _evaluate_combinations(self, combinations, best, current_cost):
+        costs = self.cost_evaluation.calculate_costs(
+            self.workload, [combination for combination, _ in combinations], store_size=True
+        )
+        for (index_combination, old_index_size), cost in zip(combinations, costs):
+            self._evaluate_combination(
+                index_combination, best, current_cost, old_index_size, cost=cost
+            )
+
     def _evaluate_combination(
-            self, index_combination, best, current_cost, old_index_size=0
+            self, index_combination, best, current_cost, old_index_size=0, cost=None
     ):
-        cost = self.cost_evaluation.calculate_cost(
-            self.workload, index_combination, store_size=True
-        )
+        if cost is None:
+            cost = self.cost_evaluation.calculate_cost(
+                self.workload, index_combination, store_size=True
+            )
         if (cost * self.min_cost_improvement) >= current_cost:
             return
         benefit = current_cost - cost
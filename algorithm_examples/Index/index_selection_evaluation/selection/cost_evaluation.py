@@ -1,10 +1,12 @@
+import copy
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 from selection.what_if_index_creation import WhatIfIndexCreation
 from selection.workload import Query
 from sqlalchemy.exc import OperationalError
 
-from algorithm_examples.utils import to_pilot_index
 from pilotscope.PilotTransData import PilotTransData
 
 
@@ -28,6 +30,14 @@ class CostEvaluation:
 
         self.relevant_indexes_cache = {}
 
+        # pilot modification: the number of workers of `calculate_costs`. Each worker owns a connection and the
+        # hypothetical indexes on it, and the workers share the cost cache.
+        self.parallel_workers = 1
+        self._worker_pool = None
+        self._workers = []
+        self._workers_lock = threading.Lock()
+        self._thread_local = threading.local()
+
     def estimate_size(self, index):
         # TODO: Refactor: It is currently too complicated to compute
         # We must search in current indexes to get an index object with .hypopg_oid
@@ -85,6 +95,76 @@ class CostEvaluation:
         total_cost = pilot_total_cost
         return total_cost
 
+    # pilot modification
+    def calculate_costs(self, workload, index_combinations, store_size=False):
+        """
+        Calculate the cost of the workload for each index combination. The combinations are sharded across
+        `parallel_workers` workers if it is larger than 1.
+
+        :return: a list of the costs in the order of `index_combinations`
+        """
+        if self.parallel_workers <= 1 or len(index_combinations) <= 1:
+            return [self.calculate_cost(workload, indexes, store_size=store_size) for indexes in index_combinations]
+
+        assert (
+                self.completed is False
+        ), "Cost Evaluation is completed and cannot be reused."
+        pool = self._get_worker_pool()
+        futures = [pool.submit(self._calculate_cost_in_worker, workload, indexes, store_size)
+                   for indexes in index_combinations]
+        costs = []
+        for indexes, future in zip(index_combinations, futures):
+            cost, sizes, cost_requests, cache_hits = future.result()
+            self.cost_requests += cost_requests
+            self.cache_hits += cache_hits
+            for index, size in zip(indexes, sizes):
+                if index.estimated_size is None:
+                    index.estimated_size = size
+            costs.append(cost)
+        return costs
+
+    def _get_worker_pool(self):
+        if self._worker_pool is None:
+            self._worker_pool = ThreadPoolExecutor(max_workers=self.parallel_workers,
+                                                   thread_name_prefix="cost_evaluation",
+                                                   initializer=self._init_worker)
+        return self._worker_pool
+
+    def _init_worker(self):
+        worker = CostEvaluation(self.db_connector.create_worker(), self.cost_estimation)
+        worker.cache = self.cache
+        worker.relevant_indexes_cache = self.relevant_indexes_cache
+        self._thread_local.worker = worker
+        with self._workers_lock:
+            self._workers.append(worker)
+
+    def _calculate_cost_in_worker(self, workload, indexes, store_size):
+        worker: CostEvaluation = self._thread_local.worker
+        cost_requests, cache_hits = worker.cost_requests, worker.cache_hits
+        # the copies hold the hypopg_oid of the worker's connection, the indexes are shared by all workers
+        indexes = [copy.copy(index) for index in indexes]
+        cost = worker.calculate_cost(workload, indexes, store_size=store_size)
+        return (cost, [index.estimated_size for index in indexes],
+                worker.cost_requests - cost_requests, worker.cache_hits - cache_hits)
+
+    def _close_workers(self):
+        if self._worker_pool is None:
+            return
+        # the barrier makes each task run in a distinct thread, so every worker is closed in its own thread
+        barrier = threading.Barrier(len(self._workers))
+        futures = [self._worker_pool.submit(self._close_worker, barrier) for _ in self._workers]
+        for future in futures:
+            future.result()
+        self._worker_pool.shutdown()
+        self._worker_pool = None
+        self._workers = []
+
+    def _close_worker(self, barrier):
+        barrier.wait()
+        worker: CostEvaluation = self._thread_local.worker
+        worker.complete_cost_estimation()
+        worker.db_connector.close()
+
     def _origin_calculate_cost(self, workload, indexes, store_size=False):
         assert (
                 self.completed is False
@@ -99,33 +179,16 @@ class CostEvaluation:
         return total_cost
 
     def pilot_calculate_cost(self, workload, indexes):
-        self.current_indexes = set(indexes)
+        # pilot modification: only the difference from the current configuration is applied to the simulated-index
+        # controller of data_interactor, instead of pushing all indexes again.
+        self._prepare_cost_calculation(indexes, store_size=True)
         data_interactor = self.db_connector.data_interactor
-        sqls = []
-        pilot_indexes = []
-        for query in workload.queries:
-            query: Query = query
-            sqls.append(query.text)
-        for index in indexes:
-            pilot_indexes.append(to_pilot_index(index))
-
-        data_interactor.push_index(pilot_indexes)
         data_interactor.pull_estimated_cost()
         total_cost = 0
         for query in workload.queries:
             self.cost_requests += 1
             total_cost += self._request_cache_pilot(query, indexes, data_interactor)
 
-        for i, index in enumerate(indexes):
-            pilot_index = pilot_indexes[i]
-            if index.estimated_size is None:
-                try:
-                    index.estimated_size = self.db_connector.get_index_byte(pilot_index)
-                except:
-                    pass
-            index.hypopg_oid = pilot_index.hypopg_oid
-            index.hypopg_name = pilot_index.hypopg_name
-
         # data_interactor.reset()
         return total_cost
 
@@ -138,19 +201,49 @@ class CostEvaluation:
     # missing indexes and unsimulating/dropping indexes
     # that exist but are not in the combination.
     def _prepare_cost_calculation(self, indexes, store_size=False):
-        # for index in set(indexes) - self.current_indexes:
-        #     self._simulate_or_create_index(index, store_size=store_size)
-        # for index in self.current_indexes - set(indexes):
-        #     self._unsimulate_or_drop_index(index)
-        #
-        # assert self.current_indexes == set(indexes)
-
-        # pilot modification
-        # for index in set(indexes) - self.current_indexes:
-        self.db_connector.drop_indexes()
-        for index in set(indexes):
-            self._simulate_or_create_index(index, store_size=store_size)
-        self.current_indexes = set(indexes)
+        indexes = set(indexes)
+        # the set differences keep the objects of current_indexes, which hold the hypopg_oid
+        self._unsimulate_or_drop_indexes(self.current_indexes - indexes)
+        self._simulate_or_create_indexes(indexes - self.current_indexes, store_size=store_size)
+        assert self.current_indexes == indexes
+
+        # The equal index objects of `indexes` share the hypopg_oid and hypopg_name of the existing ones
+        existing_indexes = {index: index for index in self.current_indexes}
+        for index in indexes:
+            existing_index = existing_indexes[index]
+            if existing_index is not index:
+                index.hypopg_oid = getattr(existing_index, "hypopg_oid", None)
+                index.hypopg_name = existing_index.hypopg_name
+                if index.estimated_size is None:
+                    index.estimated_size = existing_index.estimated_size
+
+    # pilot modification: the indexes are created by one statement
+    def _simulate_or_create_indexes(self, indexes, store_size=False):
+        if len(indexes) == 0:
+            return
+        if self.cost_estimation == "whatif":
+            for index in indexes:
+                self._simulate_or_create_index(index, store_size=store_size)
+        elif self.cost_estimation == "actual_runtimes":
+            indexes = list(indexes)
+            self.db_connector.create_indexes(indexes)
+            self.current_indexes.update(indexes)
+            unsized_indexes = [index for index in indexes if index.estimated_size is None]
+            if store_size and len(unsized_indexes) > 0:
+                for index, size in zip(unsized_indexes, self.db_connector.get_indexes_byte(unsized_indexes)):
+                    index.estimated_size = size
+
+    # pilot modification: the indexes are dropped by one statement
+    def _unsimulate_or_drop_indexes(self, indexes):
+        if len(indexes) == 0:
+            return
+        if self.cost_estimation == "whatif":
+            for index in indexes.copy():
+                self._unsimulate_or_drop_index(index)
+        elif self.cost_estimation == "actual_runtimes":
+            indexes = list(indexes)
+            self.db_connector.drop_indexes(indexes)
+            self.current_indexes.difference_update(indexes)
 
     def _simulate_or_create_index(self, index, store_size=False):
         if self.cost_estimation == "whatif":
@@ -176,9 +269,9 @@ class CostEvaluation:
 
     def complete_cost_estimation(self):
         self.completed = True
+        self._close_workers()
 
-        for index in self.current_indexes.copy():
-            self._unsimulate_or_drop_index(index)
+        self._unsimulate_or_drop_indexes(self.current_indexes.copy())
 
         assert self.current_indexes == set()
 
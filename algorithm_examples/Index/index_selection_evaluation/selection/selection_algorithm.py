@@ -29,6 +29,9 @@ class SelectionAlgorithm:
         if "cost_estimation" in self.parameters:
             estimation = self.parameters["cost_estimation"]
             self.cost_evaluation.cost_estimation = estimation
+        # pilot modification: the number of workers evaluating the costs of index combinations in parallel
+        if "cost_evaluation_workers" in self.parameters:
+            self.cost_evaluation.parallel_workers = self.parameters["cost_evaluation_workers"]
 
     def calculate_best_indexes(self, workload):
         assert self.did_run is False, "Selection algorithm can only run once."
@@ -105,9 +105,15 @@ class MockConnector:
     def __init__(self):
         pass
 
-    def drop_indexes(self):
+    def drop_indexes(self, indexes=None):
         pass
 
+    def create_indexes(self, indexes):
+        pass
+
+    def get_indexes_byte(self, indexes):
+        return [0] * len(indexes)
+
     def simulate_index(self, potential_index):
         pass
 
@@ -1,15 +1,12 @@
+import threading
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from selection.candidate_generation import syntactically_relevant_indexes
 from selection.cost_evaluation import CostEvaluation
 from selection.index import Index
 from selection.workload import Column, Query, Table, Workload
-
-
-class MockConnector:
-    def __init__(self):
-        pass
+from tests.mock_connector import MockConnector
 
 
 class MockWhatIf:
@@ -232,23 +229,27 @@ class TestPrepareCostEvaluation(unittest.TestCase):
         self.mock_what_if.simulate_index = MagicMock()
         self.mock_what_if.drop_simulated_index = MagicMock()
 
-        self.cost_evaluation = CostEvaluation(MockConnector())
+        self.connector = MockConnector()
+        self.connector.create_indexes = MagicMock()
+        self.connector.drop_indexes = MagicMock()
+        self.cost_evaluation = CostEvaluation(self.connector)
         self.cost_evaluation.what_if = self.mock_what_if
 
+    # pilot modification: the configuration is switched by the bulk index operations of db_connector
     def test_prepare_cost_calculation_does_nothing_empty_indexes(self):
         self.cost_evaluation.current_indexes = set()
 
         self.cost_evaluation._prepare_cost_calculation(set([]))
-        self.mock_what_if.simulate_index.assert_not_called()
-        self.mock_what_if.drop_simulated_index.assert_not_called()
+        self.connector.create_indexes.assert_not_called()
+        self.connector.drop_indexes.assert_not_called()
         self.assertEqual(self.cost_evaluation.current_indexes, set([]))
 
     def test_prepare_cost_calculation_does_nothing_indexes_equal_current_indexes(self):
         self.cost_evaluation.current_indexes = set([self.index_0, self.index_1])
 
         self.cost_evaluation._prepare_cost_calculation([self.index_0, self.index_1])
-        self.mock_what_if.simulate_index.assert_not_called()
-        self.mock_what_if.drop_simulated_index.assert_not_called()
+        self.connector.create_indexes.assert_not_called()
+        self.connector.drop_indexes.assert_not_called()
         self.assertEqual(
             self.cost_evaluation.current_indexes, set([self.index_0, self.index_1])
         )
@@ -257,18 +258,16 @@ class TestPrepareCostEvaluation(unittest.TestCase):
         self.cost_evaluation.current_indexes = set([self.index_0, self.index_1])
 
         self.cost_evaluation._prepare_cost_calculation([self.index_0])
-        self.mock_what_if.simulate_index.assert_not_called()
-        self.mock_what_if.drop_simulated_index.assert_called_with(self.index_1)
+        self.connector.create_indexes.assert_not_called()
+        self.connector.drop_indexes.assert_called_once_with([self.index_1])
         self.assertEqual(self.cost_evaluation.current_indexes, set([self.index_0]))
 
     def test_prepare_cost_calculation_index_added(self):
         self.cost_evaluation.current_indexes = set([self.index_0])
 
         self.cost_evaluation._prepare_cost_calculation([self.index_0, self.index_1])
-        self.mock_what_if.simulate_index.assert_called_with(
-            self.index_1, store_size=False
-        )
-        self.mock_what_if.drop_simulated_index.assert_not_called()
+        self.connector.create_indexes.assert_called_once_with([self.index_1])
+        self.connector.drop_indexes.assert_not_called()
         self.assertEqual(
             self.cost_evaluation.current_indexes, set([self.index_0, self.index_1])
         )
@@ -276,11 +275,37 @@ class TestPrepareCostEvaluation(unittest.TestCase):
     def test_prepare_cost_calculation_index_added_and_removed(self):
         self.cost_evaluation.current_indexes = set([self.index_0, self.index_1])
 
+        self.cost_evaluation._prepare_cost_calculation([self.index_0, self.index_2])
+        self.connector.create_indexes.assert_called_once_with([self.index_2])
+        self.connector.drop_indexes.assert_called_once_with([self.index_1])
+        self.assertEqual(
+            self.cost_evaluation.current_indexes, set([self.index_0, self.index_2])
+        )
+
+    def test_prepare_cost_calculation_reuses_existing_index(self):
+        existing_index = Index([self.columns[0]])
+        existing_index.hypopg_oid = 1
+        existing_index.hypopg_name = "<1>btree_testtablea_col0"
+        existing_index.estimated_size = 8192
+        self.cost_evaluation.current_indexes = set([existing_index])
+
+        equal_index = Index([self.columns[0]])
+        self.cost_evaluation._prepare_cost_calculation([equal_index])
+        self.connector.create_indexes.assert_not_called()
+        self.assertEqual(equal_index.hypopg_oid, 1)
+        self.assertEqual(equal_index.hypopg_name, existing_index.hypopg_name)
+        self.assertEqual(equal_index.estimated_size, 8192)
+
+    def test_prepare_cost_calculation_whatif(self):
+        self.cost_evaluation.cost_estimation = "whatif"
+        self.cost_evaluation.current_indexes = set([self.index_0, self.index_1])
+
         self.cost_evaluation._prepare_cost_calculation([self.index_0, self.index_2])
         self.mock_what_if.simulate_index.assert_called_with(
             self.index_2, store_size=False
         )
         self.mock_what_if.drop_simulated_index.assert_called_with(self.index_1)
+        self.connector.create_indexes.assert_not_called()
         self.assertEqual(
             self.cost_evaluation.current_indexes, set([self.index_0, self.index_2])
         )
@@ -291,10 +316,64 @@ class TestPrepareCostEvaluation(unittest.TestCase):
 
         self.cost_evaluation.complete_cost_estimation()
         self.assertTrue(self.cost_evaluation.completed)
-        self.mock_what_if.drop_simulated_index.assert_any_call(self.index_0)
-        self.mock_what_if.drop_simulated_index.assert_any_call(self.index_1)
+        self.connector.drop_indexes.assert_called_once()
+        self.assertCountEqual(
+            self.connector.drop_indexes.call_args[0][0], [self.index_0, self.index_1]
+        )
         self.assertEqual(self.cost_evaluation.current_indexes, set())
 
 
+class TestParallelCostEvaluation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.table = Table("TestTableA")
+        cls.columns = [Column("Col0"), Column("Col1"), Column("Col2")]
+        cls.table.add_columns(cls.columns)
+        cls.workload = Workload(
+            [Query(0, "SELECT * FROM TestTableA WHERE Col0 = 4", [cls.columns[0]])]
+        )
+
+    def setUp(self):
+        self.worker_connectors = []
+        self.connector = MockConnector()
+        self.connector.create_worker = MagicMock(side_effect=self._create_worker)
+        self.cost_evaluation = CostEvaluation(self.connector)
+        self.cost_evaluation.parallel_workers = 2
+
+    def _create_worker(self):
+        connector = MockConnector()
+        connector.close = MagicMock()
+        connector.thread = threading.current_thread()
+        self.worker_connectors.append(connector)
+        return connector
+
+    @staticmethod
+    def _calculate_cost_mock(cost_evaluation, workload, indexes, store_size=False):
+        assert cost_evaluation.db_connector.thread is threading.current_thread()
+        cost_evaluation.cost_requests += 1
+        for index in indexes:
+            index.estimated_size = 10
+        return len(indexes)
+
+    def test_calculate_costs(self):
+        combinations = [
+            [Index([self.columns[0]])],
+            [Index([self.columns[0]]), Index([self.columns[1]])],
+            [Index([self.columns[0]]), Index([self.columns[1]]), Index([self.columns[2]])],
+        ]
+        with patch.object(CostEvaluation, "calculate_cost", new=self._calculate_cost_mock):
+            costs = self.cost_evaluation.calculate_costs(self.workload, combinations)
+            self.assertEqual(costs, [1, 2, 3])
+            self.assertEqual(self.cost_evaluation.cost_requests, 3)
+            self.assertTrue(all(index.estimated_size == 10 for indexes in combinations for index in indexes))
+            # the hypopg state of the workers is not leaked into the shared indexes
+            self.assertTrue(all(not hasattr(index, "hypopg_oid") for indexes in combinations for index in indexes))
+
+            self.cost_evaluation.complete_cost_estimation()
+        self.assertTrue(1 <= len(self.worker_connectors) <= 2)
+        for connector in self.worker_connectors:
+            connector.close.assert_called_once()
+
+
 if __name__ == "__main__":
     unittest.main()
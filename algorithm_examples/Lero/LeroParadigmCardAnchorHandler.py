@@ -2,6 +2,7 @@ from pilotscope.Anchor.BaseAnchor.BasePushHandler import CardPushHandler
 from pilotscope.Factory.DBControllerFectory import DBControllerFactory
 from pilotscope.PilotConfig import PilotConfig
 from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
+from pilotscope.DBInteractor.PlanExplorer import PlanExplorer
 from pilotscope.PilotModel import PilotModel
 from pilotscope.PilotTransData import PilotTransData
 from algorithm_examples.Lero.source.model import LeroModelPairWise
@@ -16,9 +17,11 @@ class LeroCardPushHandler(CardPushHandler):
         self.config = config
         self.db_controller = DBControllerFactory.get_db_controller(config)
         self.pilot_data_interactor = PilotDataInteractor(config)
+        self.plan_explorer = PlanExplorer(config)
 
     def predict(self, plans):
-        leroModel: LeroModelPairWise = self.model.model
+        leroModel: LeroModelPairWise
+        leroModel, self.served_model_version = self.model.get_model_and_version()
         feature_generator = leroModel._feature_generator
         x, _ = feature_generator.transform(plans)
         scores = leroModel.predict(x)
@@ -35,27 +38,21 @@ class LeroCardPushHandler(CardPushHandler):
         
         # Initialize CardsPickerModel and other variables
         cards_picker = CardsPickerModel(subquery_2_card.keys(), subquery_2_card.values())
-        scale_subquery_2_card = subquery_2_card
-        new_cardss = []
+        new_cardss = [subquery_2_card]
+
+        # Core: the scaled cardinalities do not depend on the plans, so all of them are explained concurrently
+        finish, new_cards = cards_picker.get_cards()
+        while not finish:
+            new_cardss.append({sq: new_card for sq, new_card in zip(subquery_2_card.keys(), new_cards)})
+            finish, new_cards = cards_picker.get_cards()
+        config_and_plans = self.plan_explorer.explore(sql, [{"card": cards} for cards in new_cardss])
         plans = []
-        finish = False
-        
-        # Core
-        while(not finish):
-            new_cardss.append(scale_subquery_2_card)
-            self.pilot_data_interactor.push_card(scale_subquery_2_card)
-            self.pilot_data_interactor.pull_physical_plan()
-            data: PilotTransData = self.pilot_data_interactor.execute(sql)
-            if data is None:
-                continue
-            plan = data.physical_plan
-            cards_picker.replace(plan)   
+        for _, plan in config_and_plans:
+            cards_picker.replace(plan)
             plans.append(plan)
-            finish, new_cards = cards_picker.get_cards()
-            scale_subquery_2_card = {sq : new_card for sq, new_card in zip(subquery_2_card.keys(), new_cards)}
         best_idx = self.predict(plans)
-        selected_card = new_cardss[best_idx]
-        print(f"The best plan is {best_idx}/{len(new_cardss)}")
-        
+        selected_card = config_and_plans[best_idx][0]["card"]
+        print(f"The best plan is {best_idx}/{len(config_and_plans)}")
+
         # Return the selected cardinality
         return selected_card
@@ -20,7 +20,8 @@ class AnchorEnum(PilotEnum):
     EXECUTION_TIME_PULL_ANCHOR = "EXECUTION_TIME_PULL_ANCHOR",
     SUBQUERY_CARD_PULL_ANCHOR = "SUBQUERY_CARD_PULL_ANCHOR",
     ESTIMATED_COST_PULL_ANCHOR = "ESTIMATED_COST_PULL_ANCHOR",
-    BUFFERCACHE_PULL_ANCHOR = "BUFFERCACHE_PULL_ANCHOR"
+    BUFFERCACHE_PULL_ANCHOR = "BUFFERCACHE_PULL_ANCHOR",
+    ANALYZED_PLAN_PULL_ANCHOR = "ANALYZED_PLAN_PULL_ANCHOR"
 
     @staticmethod
     def to_anchor_enum(anchor_name: str):
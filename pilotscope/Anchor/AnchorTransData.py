@@ -3,3 +3,6 @@ class AnchorTransData:
         self.physical_plan = None
         self.buffercache = None
         self.estimated_cost= None
+        self.analyzed_plan = None
+        # whether the SQL query has been executed normally before fetching the data from outer
+        self.is_sql_executed = False
@@ -7,6 +7,7 @@ class BaseAnchorHandler(ABC):
     name_2_priority = {
         AnchorEnum.KNOB_PUSH_ANCHOR.name: -1,
         AnchorEnum.EXECUTION_TIME_PULL_ANCHOR.name: 0,
+        AnchorEnum.ANALYZED_PLAN_PULL_ANCHOR.name: 0,
         AnchorEnum.PHYSICAL_PLAN_PULL_ANCHOR.name: 1,
         "OTHER": 9
     }
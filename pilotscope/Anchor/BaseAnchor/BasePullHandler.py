@@ -49,7 +49,9 @@ class RecordPullHandler(BasePullHandler):
         super().__init__(config)
         self.fetch_method = FetchMethod.INNER
         self.anchor_name = AnchorEnum.RECORD_PULL_ANCHOR.name
-
+        # if it is True, the records are fetched in batches of `batch_size` rows as a `RecordStream`
+        self.stream = False
+        self.batch_size = 1000
 
 
 class PhysicalPlanPullHandler(BasePullHandler):
@@ -100,6 +102,28 @@ class ExecutionTimePullHandler(BasePullHandler):
             column_2_value["execution_time"] = data.execution_time
 
 
+class AnalyzedPlanPullHandler(BasePullHandler):
+    """
+    Execute the SQL query once by `EXPLAIN ANALYZE`, and collect the execution time, the executed plan, the actual
+    rows of each plan node and the buffer I/O from this execution.
+    """
+
+    def __init__(self, config) -> None:
+        super().__init__(config)
+        self.fetch_method = FetchMethod.OUTER
+        self.anchor_name = AnchorEnum.ANALYZED_PLAN_PULL_ANCHOR.name
+
+    def prepare_data_for_writing(self, column_2_value, data: PilotTransData):
+        if data.execution_time is not None:
+            column_2_value["execution_time"] = data.execution_time
+        if data.physical_plan is not None:
+            column_2_value["physical_plan"] = json.dumps(data.physical_plan)
+        if data.real_node_cards is not None:
+            column_2_value["real_node_cards"] = json.dumps(data.real_node_cards)
+        if data.buffer_io is not None:
+            column_2_value["buffer_io"] = json.dumps(data.buffer_io)
+
+
 class SubQueryCardPullHandler(BasePullHandler):
 
     def __init__(self, config) -> None:
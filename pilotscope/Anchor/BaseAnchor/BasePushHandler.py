@@ -3,6 +3,7 @@ from typing import List, Union, Tuple
 from pilotscope.Anchor.AnchorEnum import AnchorEnum
 from pilotscope.Anchor.BaseAnchor.BaseAnchorHandler import BaseAnchorHandler
 from pilotscope.Common.Index import Index
+from pilotscope.Common.SubqueryId import get_subquery_id
 from pilotscope.DBController.BaseDBController import BaseDBController
 from pilotscope.PilotEnum import PushHandlerTriggerLevelEnum, ScanJoinMethodEnum
 
@@ -23,6 +24,12 @@ class BasePushHandler(BaseAnchorHandler):
         super().__init__(config)
         self.trigger_level = PushHandlerTriggerLevelEnum.QUERY
         self.have_been_triggered = False
+        # whether the injected data of a SQL query can be reused for the queries with the same fingerprint,
+        # see `PilotConfig.enable_decision_cache`. It is false if the data depends on the literals, e.g., the cards.
+        self.is_decision_reusable = False
+        # the version of model (see `PilotModelRegistry`) serving the injected data of a SQL query. It is set by
+        # `acquire_injected_data` and reported by `PilotScheduler` in `PilotTransData.model_versions`.
+        self.served_model_version = None
 
     def _exec_commands_before_sql(self, db_controller: BaseDBController):
         """
@@ -94,7 +101,13 @@ class CardPushHandler(BasePushHandler):
 
     def _add_trans_params(self, params: dict):
         super()._add_trans_params(params)
-        params.update({"subquery": list(self.subquery_2_card.keys()), "card": list(self.subquery_2_card.values()),
+        if self.config.compact_subquery:
+            # the database matches its subqueries by their ids, so the texts are not sent
+            params.update({"subquery_id": [get_subquery_id(subquery) for subquery in self.subquery_2_card.keys()],
+                           "compact_subquery": True})
+        else:
+            params.update({"subquery": list(self.subquery_2_card.keys())})
+        params.update({"card": list(self.subquery_2_card.values()),
                        "enable_parameterized_subquery": self.enable_parameterized_subquery})
 
 
@@ -119,6 +132,7 @@ class HintPushHandler(BasePushHandler):
         super().__init__(config)
         self.anchor_name = AnchorEnum.HINT_PUSH_ANCHOR.name
         self.key_2_value_for_hint = key_2_value_for_hint
+        self.is_decision_reusable = True
 
     def acquire_injected_data(self, sql):
         """
@@ -134,8 +148,7 @@ class HintPushHandler(BasePushHandler):
         self.key_2_value_for_hint = self.acquire_injected_data(sql)
 
     def _exec_commands_before_sql(self, db_controller: BaseDBController):
-        for hint, value in self.key_2_value_for_hint.items():
-            db_controller.set_hint(hint, value)
+        db_controller.set_hints(self.key_2_value_for_hint)
 
     def _add_trans_params(self, params: dict):
         # the empty function is meaningful for removing all params from superclass.
@@ -171,6 +184,7 @@ class ScanJoinMethodPushHandler(BasePushHandler):
     def __init__(self, config, methods: Union[Tuple[ScanJoinMethodEnum, str], List[Tuple[ScanJoinMethodEnum, str]]] = None) -> None:
         super().__init__(config)
         self.anchor_name = AnchorEnum.SCAN_JOIN_METHOD_PUSH_ANCHOR.name
+        self.is_decision_reusable = True
         if isinstance(methods, tuple):
             self.methods = [methods]
         elif isinstance(methods, list):
@@ -30,10 +30,14 @@ class PostgreSQLEstimatedCostPullHandler(EstimatedCostPullHandler, PostgreSQLAnc
         if fill_data.estimated_cost is not None:
             return
 
-        if anchor_data.physical_plan is None:
-            anchor_data.estimated_cost = db_controller.get_estimated_cost(sql, comment=pilot_comment)
-        else:
-            anchor_data.estimated_cost = anchor_data.physical_plan["Plan"]["Total Cost"]
+        if anchor_data.estimated_cost is None:
+            # the plan is kept in `anchor_data`, so that it can be reused by other anchors and the plan cache
+            if anchor_data.physical_plan is None and anchor_data.analyzed_plan is not None:
+                anchor_data.estimated_cost = anchor_data.analyzed_plan["Plan"]["Total Cost"]
+            else:
+                if anchor_data.physical_plan is None:
+                    anchor_data.physical_plan = self.get_physical_plan(db_controller, sql, pilot_comment)
+                anchor_data.estimated_cost = anchor_data.physical_plan["Plan"]["Total Cost"]
         fill_data.estimated_cost = anchor_data.estimated_cost
 
 
@@ -50,6 +54,43 @@ class PostgreSQLBuffercachePullHandler(BuffercachePullHandler, PostgreSQLAnchorM
         fill_data.buffercache = anchor_data.buffercache
 
 
+class PostgreSQLAnalyzedPlanPullHandler(AnalyzedPlanPullHandler, PostgreSQLAnchorMixin):
+    buffer_io_keys = ["Shared Hit Blocks", "Shared Read Blocks", "Shared Dirtied Blocks", "Shared Written Blocks",
+                      "Local Hit Blocks", "Local Read Blocks", "Temp Read Blocks", "Temp Written Blocks"]
+
+    def fetch_from_outer(self, db_controller, sql, pilot_comment, anchor_data: AnchorTransData,
+                         fill_data: PilotTransData):
+        if anchor_data.analyzed_plan is None:
+            # the changes of data are kept only once if the sql has been executed normally
+            anchor_data.analyzed_plan = db_controller.explain_analyzed_plan(sql, comment=pilot_comment,
+                                                                            rollback=anchor_data.is_sql_executed)
+        plan = anchor_data.analyzed_plan
+
+        # the unit of "Execution Time" is millisecond. The execution time pulled from the normal execution
+        # (i.e., `EXECUTION_TIME_PULL_ANCHOR`) is kept, since it is not slowed down by the instrumentation of ANALYZE.
+        if fill_data.execution_time is None:
+            fill_data.execution_time = plan["Execution Time"] / 1000
+        fill_data.physical_plan = plan
+        fill_data.real_node_cards = self.extract_real_node_cards(plan["Plan"])
+        fill_data.buffer_io = {key: plan["Plan"][key] for key in self.buffer_io_keys if key in plan["Plan"]}
+
+    @staticmethod
+    def extract_real_node_cards(plan_node):
+        """
+        :param plan_node: a node of the plan of `EXPLAIN (ANALYZE, FORMAT JSON)`
+        :return: a list of the estimated and actual rows of each node in pre-order. The actual rows are the total of
+            all loops, e.g., the inner side of a nested loop join.
+        """
+        res = []
+        nodes = [plan_node]
+        while len(nodes) > 0:
+            node = nodes.pop()
+            res.append({"Node Type": node["Node Type"], "Plan Rows": node["Plan Rows"],
+                        "Actual Rows": node["Actual Rows"] * node.get("Actual Loops", 1)})
+            nodes += reversed(node.get("Plans", []))
+        return res
+
+
 class PostgreSQLExecutionTimePullHandler(ExecutionTimePullHandler, PostgreSQLAnchorMixin):
     pass
 
@@ -63,3 +104,5 @@ class PostgreSQLSubQueryCardPullHandler(SubQueryCardPullHandler, PostgreSQLAncho
     def _add_trans_params(self, params: dict):
         super()._add_trans_params(params)
         params.update({"enable_parameterized_subquery": self.enable_parameterized_subquery})
+        if self.config.compact_subquery:
+            params.update({"compact_subquery": True})
@@ -1,6 +1,7 @@
 from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
 from pilotscope.PilotEnum import DatabaseEnum
 from pilotscope.Common.Util import get_pg_hints
+from pilotscope.DBInteractor.PlanExplorer import PlanExplorer
 from pilotscope.PilotConfig import PilotConfig
 import json
 # Yuxing Han, Ziniu Wu, Peizhi Wu, Rong Zhu, Jingyi Yang, Liang Wei Tan, Kai Zeng, Gao Cong, Yanzhao Qin, Andreas Pfadler, Zhengping Qian, Jingren Zhou, Jiangneng Li, and Bin Cui. 2021. Cardinality estimation in DBMS: a comprehensive benchmark evaluation. Proc. VLDB Endow. 15, 4 (December 2021), 752–765.
@@ -18,36 +19,23 @@ def p_error_calc(config:PilotConfig, sql, estimated_cards:dict, true_cards = Non
                 res = data_interactor.execute(k)
                 true_cards[k] = int(res.records.values[0][0])
 
-        # data_interactor.pull_estimated_cost()
-        data_interactor.push_card(true_cards)
-        data_interactor.pull_physical_plan() 
-        res = data_interactor.execute(sql)
-        true_card_plan_hint = get_pg_hints(res.physical_plan)
-        
-        data_interactor.push_pg_hint_comment(true_card_plan_hint)
-        data_interactor.push_card(true_cards)
-        data_interactor.pull_estimated_cost()
-        data_interactor.pull_physical_plan() # 
-        res = data_interactor.execute(sql)
-        ppc_opt_plan_true_card = res.estimated_cost
-        # print(json.dumps(res.physical_plan),res.estimated_cost,"\n"+"*"*100)
-        
-        # data_interactor.pull_estimated_cost() 
-        # data_interactor.pull_subquery_card()
-        data_interactor.push_card(estimated_cards)
-        data_interactor.pull_physical_plan()
-        res = data_interactor.execute(sql)
-        est_card_plan_hints = get_pg_hints(res.physical_plan)
-        # print(json.dumps(res.physical_plan),res.estimated_cost,"\n"+"-"*100) #
-        # print(res.subquery_2_card)
-        
-        data_interactor.push_pg_hint_comment(est_card_plan_hints)
-        data_interactor.push_card(true_cards)
-        data_interactor.pull_estimated_cost()
-        data_interactor.pull_physical_plan() # 
-        res = data_interactor.execute(sql)
-        # print(json.dumps(res.physical_plan),res.estimated_cost) #
-        ppc_est_plan_true_card = res.estimated_cost
+        plan_explorer = PlanExplorer(config, parallel_num=2)
+        try:
+            # the optimal plan with true cards and the plan chosen with estimated cards
+            config_and_plans = plan_explorer.explore(sql, [{"card": true_cards}, {"card": estimated_cards}],
+                                                     enable_dedup=False)
+            true_card_plan_hint = get_pg_hints(config_and_plans[0][1])
+            est_card_plan_hints = get_pg_hints(config_and_plans[1][1])
+
+            # the costs of both plans with true cards
+            config_and_plans = plan_explorer.explore(sql, [
+                {"pg_hint_comment": true_card_plan_hint, "card": true_cards},
+                {"pg_hint_comment": est_card_plan_hints, "card": true_cards}
+            ], enable_dedup=False)
+        finally:
+            plan_explorer.close()
+        ppc_opt_plan_true_card = config_and_plans[0][1]["Plan"]["Total Cost"]
+        ppc_est_plan_true_card = config_and_plans[1][1]["Plan"]["Total Cost"]
         
         return ppc_est_plan_true_card/ppc_opt_plan_true_card
     
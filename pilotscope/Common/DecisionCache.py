@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class DecisionCache:
+    """
+    A bounded LRU cache with TTL for the decisions of push handlers (e.g., the hints selected by a model), keyed by
+    the handler and the fingerprint of the SQL query (see `SqlFingerprint.get_sql_fingerprint`). The SQL queries of
+    the same template reuse the decision instead of running the model again.
+
+    The decisions made by the outdated model are only bounded by TTL, call `invalidate` after updating a model
+    if needed.
+    """
+
+    def __init__(self, capacity=1024, ttl=300):
+        """
+        :param capacity: the maximal number of cached decisions
+        :param ttl: the time-to-live of each cached decision, unit: second
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self._key_2_decision = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        :return: the cached decision, or None if it is absent or expired
+        """
+        with self._lock:
+            value = self._key_2_decision.get(key)
+            if value is not None:
+                expire_time, decision = value
+                if time.monotonic() < expire_time:
+                    self._key_2_decision.move_to_end(key)
+                    self.hits += 1
+                    return decision
+                self._key_2_decision.pop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, decision):
+        with self._lock:
+            self._key_2_decision[key] = (time.monotonic() + self.ttl, decision)
+            self._key_2_decision.move_to_end(key)
+            while len(self._key_2_decision) > self.capacity:
+                self._key_2_decision.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """
+        Remove all cached decisions.
+        """
+        with self._lock:
+            self._key_2_decision.clear()
+
+    def get_hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def __len__(self):
+        return len(self._key_2_decision)
@@ -0,0 +1,79 @@
+import threading
+from concurrent.futures.thread import ThreadPoolExecutor
+
+from pilotscope.PilotEnum import EventCoalescePolicyEnum
+
+
+class BackgroundEventExecutor:
+    """
+    Run the triggered events (e.g., `PeriodicModelUpdateEvent`) in a background thread, so that the SQL query
+    triggering them does not wait for the processing. All events run one by one in the same thread.
+    The overlapping triggers of an event are coalesced according to `coalesce_policy`.
+    """
+
+    def __init__(self, coalesce_policy=EventCoalescePolicyEnum.MERGE) -> None:
+        """
+        :param coalesce_policy: the policy for the triggers of an event when it is waiting or running
+        """
+        self.coalesce_policy = coalesce_policy
+        self.num_submitted = 0
+        self.num_coalesced = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pilotscope_event")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        # event -> [the number of waiting runs, the number of running runs]
+        self._event_2_runs = {}
+
+    def submit(self, event, db_controller, data_manager):
+        """
+        Schedule an event to be processed in the background thread.
+
+        :param event: a triggered event, whose `_process_in_background` will be called
+        :param db_controller: the db controller passed to the event
+        :param data_manager: the data manager passed to the event
+        :return: True if a new run is scheduled, False if the trigger is coalesced
+        """
+        with self._lock:
+            runs = self._event_2_runs.setdefault(event, [0, 0])
+            num_waiting, num_running = runs
+            if (self.coalesce_policy == EventCoalescePolicyEnum.DROP and num_waiting + num_running > 0) or (
+                    self.coalesce_policy == EventCoalescePolicyEnum.MERGE and num_waiting > 0):
+                self.num_coalesced += 1
+                return False
+            runs[0] += 1
+            self.num_submitted += 1
+        self._executor.submit(self._run, event, db_controller, data_manager)
+        return True
+
+    def wait(self, timeout=None):
+        """
+        Block until all scheduled events are finished.
+
+        :param timeout: the maximal waiting time, unit: second
+        :return: True if all events are finished, False if it is timeout
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: len(self._event_2_runs) == 0, timeout)
+
+    def shutdown(self, wait=True):
+        """
+        :param wait: if it is True, block until all scheduled events are finished
+        """
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, event, db_controller, data_manager):
+        with self._lock:
+            runs = self._event_2_runs[event]
+            runs[0] -= 1
+            runs[1] += 1
+        try:
+            event._process_in_background(db_controller, data_manager)
+        except Exception as e:
+            print("fail to process the event {}: {}".format(type(event).__name__, e))
+        finally:
+            with self._lock:
+                runs[1] -= 1
+                if runs[0] == 0 and runs[1] == 0:
+                    self._event_2_runs.pop(event)
+                    if len(self._event_2_runs) == 0:
+                        self._idle.notify_all()
@@ -0,0 +1,199 @@
+import threading
+import time
+
+from pandas import DataFrame
+
+# the values in [2^k, 2^(k+1)) are split into 2^(_sub_bucket_bits - 1) buckets, i.e., the relative error is < 1/64
+_sub_bucket_bits = 7
+_sub_bucket_count = 1 << _sub_bucket_bits
+_sub_bucket_half_count = _sub_bucket_count >> 1
+
+
+class LatencyHistogram:
+    """
+    A histogram of latencies (unit: nanosecond) with log-linear buckets like HdrHistogram, whose memory and recording
+    time are independent of the number of recorded values. It is not thread-safe, each thread should record into its
+    own histogram and merge them when exporting.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        # bucket index -> the number of values
+        self._bucket_2_count = {}
+
+    def record(self, value):
+        """
+        :param value: a non-negative integer latency, unit: nanosecond
+        """
+        idx = self._get_bucket_index(value)
+        self._bucket_2_count[idx] = self._bucket_2_count.get(idx, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        """
+        Add all values recorded by another histogram into this histogram.
+        """
+        for idx, count in list(other._bucket_2_count.items()):
+            self._bucket_2_count[idx] = self._bucket_2_count.get(idx, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def get_percentile(self, percentile):
+        """
+        :param percentile: a number in [0, 100], e.g., 99 for p99
+        :return: the upper bound of the bucket containing the percentile, unit: nanosecond. It is None if no value
+            is recorded.
+        """
+        if self.count == 0:
+            return None
+        target = max(1, int(self.count * percentile / 100 + 0.5))
+        accumulated = 0
+        for idx in sorted(self._bucket_2_count.keys()):
+            accumulated += self._bucket_2_count[idx]
+            if accumulated >= target:
+                return min(self._get_bucket_upper_bound(idx), self.max)
+        return self.max
+
+    def get_mean(self):
+        return self.total / self.count if self.count > 0 else None
+
+    @staticmethod
+    def _get_bucket_index(value):
+        if value < _sub_bucket_count:
+            return value
+        shift = value.bit_length() - _sub_bucket_bits
+        return _sub_bucket_count + (shift - 1) * _sub_bucket_half_count + (value >> shift) - _sub_bucket_half_count
+
+    @staticmethod
+    def _get_bucket_upper_bound(idx):
+        if idx < _sub_bucket_count:
+            return idx
+        shift = (idx - _sub_bucket_count) // _sub_bucket_half_count + 1
+        top = (idx - _sub_bucket_count) % _sub_bucket_half_count + _sub_bucket_half_count
+        return ((top + 1) << shift) - 1
+
+
+class _Span:
+
+    def __init__(self, name) -> None:
+        self.name = name
+        self.start_time = None
+
+    def __enter__(self):
+        self.start_time = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        LatencyTracer.record(self.name, time.perf_counter_ns() - self.start_time)
+        return False
+
+
+class _DisabledSpan:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_disabled_span = _DisabledSpan()
+
+
+class LatencyTracer:
+    """
+    Trace the latency of each stage of PilotScope (e.g., the push operators, the execution in database and the data
+    fetching of `PilotDataInteractor.execute`). A stage is traced by `with LatencyTracer.span(name): ...`.
+
+    Each thread records into its own histograms, so no lock is taken when recording. The tracing is disabled by
+    default, call `enable` to start it.
+    """
+    enabled = False
+    _thread_local = threading.local()
+    # the histograms of all threads, i.e., a list of `{name: LatencyHistogram}`
+    _all_thread_histograms = []
+    _lock = threading.Lock()
+
+    @classmethod
+    def enable(cls):
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls):
+        cls.enabled = False
+
+    @classmethod
+    def span(cls, name):
+        """
+        :param name: the name of the traced stage
+        :return: a context manager recording the latency of its body into the histogram of `name`
+        """
+        return _Span(name) if cls.enabled else _disabled_span
+
+    @classmethod
+    def record(cls, name, latency):
+        """
+        :param name: the name of the traced stage
+        :param latency: the latency of the stage, unit: nanosecond
+        """
+        name_2_histogram = getattr(cls._thread_local, "name_2_histogram", None)
+        if name_2_histogram is None:
+            name_2_histogram = cls._thread_local.name_2_histogram = {}
+            with cls._lock:
+                cls._all_thread_histograms.append(name_2_histogram)
+        histogram = name_2_histogram.get(name)
+        if histogram is None:
+            histogram = name_2_histogram[name] = LatencyHistogram()
+        histogram.record(latency)
+
+    @classmethod
+    def get_histograms(cls):
+        """
+        :return: a dict mapping the name of each stage to a histogram merged from all threads
+        """
+        with cls._lock:
+            all_thread_histograms = list(cls._all_thread_histograms)
+        name_2_histogram = {}
+        for thread_histograms in all_thread_histograms:
+            for name, histogram in list(thread_histograms.items()):
+                name_2_histogram.setdefault(name, LatencyHistogram()).merge(histogram)
+        return name_2_histogram
+
+    @classmethod
+    def report(cls, percentiles=(50, 90, 99, 99.9)):
+        """
+        :param percentiles: the exported percentiles
+        :return: a DataFrame with the count, mean, max and percentiles of each stage, unit: millisecond
+        """
+        data = {"name": [], "count": [], "mean": [], "max": []}
+        for percentile in percentiles:
+            data["p{}".format(percentile)] = []
+        for name, histogram in sorted(cls.get_histograms().items()):
+            data["name"].append(name)
+            data["count"].append(histogram.count)
+            data["mean"].append(histogram.get_mean() / 1e6)
+            data["max"].append(histogram.max / 1e6)
+            for percentile in percentiles:
+                data["p{}".format(percentile)].append(histogram.get_percentile(percentile) / 1e6)
+        return DataFrame(data)
+
+    @classmethod
+    def clear(cls):
+        """
+        Remove the recorded latencies of all threads.
+        """
+        with cls._lock:
+            for thread_histograms in cls._all_thread_histograms:
+                thread_histograms.clear()
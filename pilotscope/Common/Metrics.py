@@ -0,0 +1,182 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from pilotscope.Common.LatencyTracer import LatencyTracer
+from pilotscope.Common.Thread import ValueThread
+from pilotscope.Common.Util import all_https
+
+
+class PilotMetrics:
+    """
+    An in-process registry of the runtime counters of PilotScope (e.g., the timeouts, the calls of each anchor and
+    the plan cache hits), exported in the Prometheus text format. It is disabled by default, call `enable` to start
+    collecting.
+
+    The metrics can be scraped from `/metrics` of the http receiver of PilotScope (see
+    `BaseHttpInteractorReceiver`), or of a standalone server started by `start_http_server`.
+    """
+    enabled = False
+    _lock = threading.Lock()
+    # (name, labels) -> value, the labels are a sorted tuple of (key, value)
+    _counters = {}
+    # name -> (metric type, a function returning the current value)
+    _collectors = {}
+    # name -> help text
+    _name_2_help = {}
+
+    @classmethod
+    def enable(cls, trace_latency=True):
+        """
+        :param trace_latency: whether to enable `LatencyTracer`, whose histograms are exported as summaries,
+            e.g., the latency of the model inference `scheduler_acquire_injected_data`
+        """
+        cls.enabled = True
+        if trace_latency:
+            LatencyTracer.enable()
+
+    @classmethod
+    def disable(cls):
+        cls.enabled = False
+
+    @classmethod
+    def inc(cls, name, value=1, help_text=None, **labels):
+        """
+        Increase a counter. It does nothing if the metrics are disabled.
+
+        :param name: the name of the counter, e.g., `pilotscope_queries_total`
+        :param value: the increment
+        :param help_text: the description of the counter
+        :param labels: the labels of the counter, e.g., anchor="HINT_PUSH_ANCHOR"
+        """
+        if not cls.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with cls._lock:
+            cls._counters[key] = cls._counters.get(key, 0) + value
+            if help_text is not None:
+                cls._name_2_help[name] = help_text
+
+    @classmethod
+    def register_collector(cls, name, func, metric_type="gauge", help_text=None):
+        """
+        Register a metric whose value is computed when exporting, e.g., the depth of a queue.
+
+        :param name: the name of the metric
+        :param func: a function returning the current value
+        :param metric_type: "gauge" or "counter"
+        :param help_text: the description of the metric
+        """
+        with cls._lock:
+            cls._collectors[name] = (metric_type, func)
+            if help_text is not None:
+                cls._name_2_help[name] = help_text
+
+    @classmethod
+    def get_value(cls, name, **labels):
+        """
+        :return: the value of a counter, or 0 if it is absent
+        """
+        with cls._lock:
+            return cls._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    @classmethod
+    def export(cls):
+        """
+        :return: all metrics in the Prometheus text format
+        """
+        with cls._lock:
+            counters = dict(cls._counters)
+            collectors = dict(cls._collectors)
+            name_2_help = dict(cls._name_2_help)
+
+        name_2_lines = {}
+        for (name, labels), value in sorted(counters.items()):
+            name_2_lines.setdefault(name, ("counter", []))[1].append(_format_sample(name, labels, value))
+        for name, (metric_type, func) in sorted(collectors.items()):
+            try:
+                value = func()
+            except Exception as e:
+                print("fail to collect the metric {}: {}".format(name, e))
+                continue
+            name_2_lines[name] = (metric_type, [_format_sample(name, (), value)])
+
+        lines = []
+        for name, (metric_type, samples) in sorted(name_2_lines.items()):
+            if name in name_2_help:
+                lines.append("# HELP {} {}".format(name, name_2_help[name]))
+            lines.append("# TYPE {} {}".format(name, metric_type))
+            lines += samples
+        lines += cls._export_latencies()
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def start_http_server(cls, url, port):
+        """
+        Start a standalone http server exposing `/metrics`, e.g., when the receiver is not an http server.
+
+        :return: the started `HTTPServer`
+        """
+        server = HTTPServer((url, port), MetricsRequestHandler)
+        http_thread = ValueThread(target=server.serve_forever, name="pilotscope_metrics", args=())
+        http_thread.daemon = True
+        http_thread.start()
+        all_https.append(server)
+        return server
+
+    @classmethod
+    def clear(cls):
+        """
+        Reset all counters. The registered collectors are kept.
+        """
+        with cls._lock:
+            cls._counters = {}
+
+    @classmethod
+    def _export_latencies(cls):
+        lines = []
+        for name, histogram in sorted(LatencyTracer.get_histograms().items()):
+            if histogram.count == 0:
+                continue
+            metric_name = "pilotscope_latency_seconds"
+            stage = name.replace(".", "_")
+            for quantile in [0.5, 0.9, 0.99]:
+                lines.append(_format_sample(metric_name, (("quantile", str(quantile)), ("stage", stage)),
+                                            histogram.get_percentile(quantile * 100) / 1e9))
+            lines.append(_format_sample(metric_name + "_sum", (("stage", stage),), histogram.total / 1e9))
+            lines.append(_format_sample(metric_name + "_count", (("stage", stage),), histogram.count))
+        if len(lines) > 0:
+            lines = ["# HELP pilotscope_latency_seconds The latency of each stage traced by LatencyTracer",
+                     "# TYPE pilotscope_latency_seconds summary"] + lines
+        return lines
+
+
+def _format_sample(name, labels, value):
+    if len(labels) == 0:
+        return "{} {}".format(name, value)
+    label_str = ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels)
+    return "%s{%s} %s" % (name, label_str, value)
+
+
+def write_metrics_response(request_handler: BaseHTTPRequestHandler):
+    """
+    Respond a GET request of `/metrics` by the exported metrics, otherwise 404.
+    """
+    if request_handler.path.split("?")[0] != "/metrics":
+        request_handler.send_error(404)
+        return
+    body = PilotMetrics.export().encode("utf-8")
+    request_handler.send_response(200)
+    request_handler.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+    request_handler.send_header("Content-Length", str(len(body)))
+    request_handler.end_headers()
+    request_handler.wfile.write(body)
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        write_metrics_response(self)
+
+    # Overload log_message of BaseHTTPRequestHandler to mute log output
+    def log_message(self, format, *args):
+        pass
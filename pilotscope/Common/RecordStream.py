@@ -0,0 +1,69 @@
+from typing import Callable, Iterator, List
+
+
+class RecordStream:
+    """
+    An iterator of the records of a SQL query, which are fetched from database in batches (e.g., by a server-side
+    cursor) rather than being materialized in memory at once. Each item is a list of rows, and each row is a tuple
+    in the order of `column_names`.
+
+    The stream holds the database connection of the current thread until it is exhausted or closed, so call `close`
+    (or use it with `with`) if you stop iterating early, and finish it before executing the next SQL query in the
+    same thread.
+    """
+
+    def __init__(self, column_names: tuple, batches: Iterator[list], on_close: Callable = None) -> None:
+        """
+        :param column_names: the column names of the records
+        :param batches: an iterator of the lists of rows
+        :param on_close: a function called once when the stream is exhausted or closed
+        """
+        self.column_names = column_names
+        self._batches = batches
+        self._close_callbacks: List[Callable] = [] if on_close is None else [on_close]
+        self._closed = False
+
+    def add_close_callback(self, callback: Callable):
+        """
+        :param callback: a function called once after the previous callbacks when the stream is exhausted or closed
+        """
+        self._close_callbacks.append(callback)
+
+    def count(self):
+        """
+        Consume the rest of the stream and count its rows.
+
+        :return: the number of remaining rows
+        """
+        return sum(len(rows) for rows in self)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            close_batches = getattr(self._batches, "close", None)
+            if close_batches is not None:
+                close_batches()
+        finally:
+            for callback in self._close_callbacks:
+                callback()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> list:
+        if self._closed:
+            raise StopIteration
+        try:
+            return next(self._batches)
+        except BaseException:
+            # including StopIteration, i.e., the stream is exhausted
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
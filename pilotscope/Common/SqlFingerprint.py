@@ -0,0 +1,58 @@
+import hashlib
+import re
+
+# the tokens of a SQL query. The hint comments of `pg_hint_plan` (i.e., /*+ ... */) change the plan, so they are kept.
+_token_pattern = re.compile(r"""
+    (?P<hint>/\*\+.*?\*/)
+    |(?P<comment>--[^\n]*|/\*.*?\*/)
+    |(?P<string>[eE]?'(?:[^']|'')*')
+    |(?P<quoted>"(?:[^"]|"")*")
+    |(?P<word>[A-Za-z_][\w$]*)
+    |(?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+    |(?P<param>\$\d+)
+    |(?P<operator>[<>=!|:]+)
+    |(?P<space>\s+)
+    |(?P<other>.)
+""", re.S | re.X)
+
+# a list of placeholders, e.g., the values of `IN`, is collapsed into one placeholder
+_placeholder_list_pattern = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+literal_placeholder = "?"
+
+
+def get_sql_fingerprint(sql: str):
+    """
+    Normalize a SQL query into a fingerprint of its template, i.e., the queries only differing in the literals,
+    the comments, the whitespaces or the letter case of keywords and identifiers have the same fingerprint.
+    For example, "SELECT * FROM t WHERE a=1 AND b IN ('x', 'y')" is "select * from t where a = ? and b in ( ? )".
+
+    It is a lexical normalization that does not parse the query, so it is cheap enough to be called for each query.
+    See `Dataset/generate_sql_templates.py` for the templates parsed from the AST.
+
+    :param sql: a SQL query
+    :return: the fingerprint
+    """
+    tokens = []
+    for match in _token_pattern.finditer(sql):
+        kind = match.lastgroup
+        if kind in ("space", "comment"):
+            continue
+        if kind in ("string", "number", "param"):
+            tokens.append(literal_placeholder)
+        elif kind == "word":
+            tokens.append(match.group().lower())
+        else:
+            tokens.append(match.group())
+    if len(tokens) > 0 and tokens[-1] == ";":
+        tokens.pop()
+    # the tokens are separated by a single space, so the whitespaces around the operators do not matter
+    return _placeholder_list_pattern.sub("( ? )", " ".join(tokens))
+
+
+def get_sql_fingerprint_digest(sql: str):
+    """
+    :param sql: a SQL query
+    :return: a short digest of the fingerprint of the SQL query, e.g., for the keys of a cache
+    """
+    return hashlib.sha1(get_sql_fingerprint(sql).encode("utf-8")).hexdigest()
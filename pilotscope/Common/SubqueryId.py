@@ -0,0 +1,45 @@
+import hashlib
+import threading
+from functools import lru_cache
+
+# the number of hex digits of a subquery id, i.e., 64 bits
+subquery_id_length = 16
+
+
+@lru_cache(maxsize=65536)
+def get_subquery_id(subquery: str):
+    """
+    Get the stable id of a subquery, which is used instead of the full text of subquery in the compact subquery
+    protocol (see `PilotConfig.enable_compact_subquery`). The database computes the same id for its subquery,
+    i.e., `left(md5(subquery), 16)` in PostgreSQL.
+
+    :param subquery: the text of a subquery
+    :return: the first 16 hex digits of the md5 of the subquery
+    """
+    return hashlib.md5(subquery.encode("utf-8")).hexdigest()[:subquery_id_length]
+
+
+class SubqueryTextRegistry:
+    """
+    The texts of the subqueries received from database, indexed by their ids. In the compact subquery protocol,
+    the database sends the text of a subquery only for the first time in a session, and refers it by the id later.
+    """
+    _id_2_subquery = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, id_2_subquery: dict):
+        with cls._lock:
+            cls._id_2_subquery.update(id_2_subquery)
+
+    @classmethod
+    def get_subquery(cls, subquery_id):
+        """
+        :return: the text of the subquery, or None if it has not been received
+        """
+        return cls._id_2_subquery.get(subquery_id)
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._id_2_subquery = {}
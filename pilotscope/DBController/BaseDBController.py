@@ -1,5 +1,7 @@
 import threading
+import time
 from abc import ABC, abstractmethod
+from typing import List
 
 from sqlalchemy import create_engine, String, Integer, Float, MetaData, Table, inspect, select, func, Column
 from sqlalchemy_utils import database_exists, create_database
@@ -19,6 +21,13 @@ class BaseDBController(ABC):
         self.config = config
         self.echo = echo
         self.connection_thread = threading.local()
+
+        # the cache of the reflected tables and all table names, see `invalidate_metadata_cache`
+        self._table_name_2_sqla_table = {}
+        self._all_table_names = None
+        self._metadata_lock = threading.RLock()
+        # the plan cache of the interactors using this controller, see `PlanCache.get_plan_cache`
+        self.plan_cache = None
         self._db_init()
 
     def _db_init(self):
@@ -62,16 +71,74 @@ class BaseDBController(ABC):
         """
         if not self._is_connect():
             self.connection_thread.conn = self.engine.connect()
+            self._init_connection()
 
     def _reset(self):
         """
         Reset the database connection.
         This function closes the current connection, recreates the pool, and establishes a new connection
         to the database.
-        """
-        if self.connection_thread.conn is not None:
+        If `config.enable_session_reset` is called, only the session state changed by PilotScope is reset and
+        the connection is reused. A new connection is established only if the resetting fails.
+        """
+        if self.config._enable_session_reset and self._is_connect():
+            try:
+                self._reset_session()
+                return
+            except Exception as e:
+                print("fail to reset the session, reconnect to database: {}".format(e))
+        if self._is_connect():
             self.connection_thread.conn.invalidate()
         self.connection_thread.conn = self.engine.connect()
+        self._init_connection()
+
+    def _reset_session(self):
+        """
+        Reset the session state changed by PilotScope (e.g., the hints set by `set_hint`) on the current connection.
+        """
+        raise NotImplementedError
+
+    def _init_connection(self):
+        """
+        Initialize a new connection of current thread, e.g., clear the shadow of session state.
+        """
+        self._init_session_state()
+
+    def _init_session_state(self):
+        """
+        Clear the shadow of session state for a new connection.
+        """
+        self.connection_thread.hint_2_value = {}
+        self.connection_thread.pending_reset_hints = set()
+
+    def reset_hints(self):
+        """
+        Reset the hints set by `set_hint` in the session of current connection to their defaults. The resetting is
+        deferred to the next SQL query, so the hints set by it again with the same values are neither reset nor set.
+        """
+        self._get_pending_reset_hints().update(self._get_session_hints().keys())
+
+    def _get_session_hints(self) -> dict:
+        """
+        Get the hints that have been set by PilotScope in the session of current connection, i.e.,
+        a shadow of the session state that avoids sending the redundant settings.
+
+        :return: a dict of hint name to value in thread-local data
+        """
+        if not hasattr(self.connection_thread, "hint_2_value"):
+            self._init_session_state()
+        return self.connection_thread.hint_2_value
+
+    def _get_pending_reset_hints(self) -> set:
+        """
+        Get the names of hints that should be reset before the next SQL query of current connection.
+        The resetting is deferred, since the next query often sets the same hints again.
+
+        :return: a set of hint names in thread-local data
+        """
+        if not hasattr(self.connection_thread, "pending_reset_hints"):
+            self._init_session_state()
+        return self.connection_thread.pending_reset_hints
 
     def _disconnect(self):
         """
@@ -125,6 +192,16 @@ class BaseDBController(ABC):
         """
         pass
 
+    def execute_stream(self, sql, batch_size=1000):
+        """
+        Execute a SQL query and fetch its result in batches.
+
+        :param sql: A SQL statement to be executed.
+        :param batch_size: The number of rows fetched from database in each batch.
+        :return: a `RecordStream` of the lists of rows
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def set_hint(self, key, value):
 
@@ -141,6 +218,15 @@ class BaseDBController(ABC):
         """
         raise NotImplementedError
 
+    def set_hints(self, key_2_value_for_hint: dict):
+        """
+        Set the value of multiple hints, see `set_hint`.
+
+        :param key_2_value_for_hint: a dict with keys as the names of the hints and values as the values to be set.
+        """
+        for key, value in key_2_value_for_hint.items():
+            self.set_hint(key, value)
+
     @abstractmethod
     def create_index(self, index: Index):
         """
@@ -160,6 +246,33 @@ class BaseDBController(ABC):
 
     pass
 
+    def create_indexes(self, indexes: List[Index]):
+        """
+        Create multiple indexes, see `create_index`.
+
+        :param indexes: a list of Index objects
+        """
+        for index in indexes:
+            self.create_index(index)
+
+    def drop_indexes(self, indexes: List[Index]):
+        """
+        Drop multiple indexes, see `drop_index`.
+
+        :param indexes: a list of indexes that will be dropped
+        """
+        for index in indexes:
+            self.drop_index(index)
+
+    def get_indexes_byte(self, indexes: List[Index]):
+        """
+        Get the size of multiple indexes in bytes, see `get_index_byte`.
+
+        :param indexes: a list of indexes
+        :return: a list of the sizes in the order of `indexes`
+        """
+        return [self.get_index_byte(index) for index in indexes]
+
     @abstractmethod
     def drop_all_indexes(self):
         """
@@ -278,8 +391,13 @@ class BaseDBController(ABC):
                         Column(column, column_type, primary_key=True, autoincrement=enable_autoincrement_id_key))
                 else:
                     columns.append(Column(column, column_type))
-            table = Table(table_name, self.metadata, *columns, extend_existing=True)
-            table.create(self.engine)
+            with self._metadata_lock:
+                # the table may be created by another thread after the check above
+                if self.exist_table(table_name):
+                    return
+                table = Table(table_name, self.metadata, *columns, extend_existing=True)
+                table.create(self.engine, checkfirst=True)
+                self._all_table_names = None
 
     def drop_table_if_exist(self, table_name):
         """
@@ -288,9 +406,10 @@ class BaseDBController(ABC):
         :param table_name: the name of the table
         """
         if self.exist_table(table_name):
-            table = Table(table_name, self.metadata, autoload_with=self.engine)
-            table.drop(self.engine)
-            self.metadata.remove(table)
+            with self._metadata_lock:
+                table = self._get_sqla_table(table_name)
+                table.drop(self.engine)
+                self.invalidate_metadata_cache(table_name)
 
     def exist_table(self, table_name) -> bool:
         """
@@ -298,6 +417,9 @@ class BaseDBController(ABC):
 
         :return: the table named `table_name` exist, it returns True; otherwise, it returns False
         """
+        # only the existence is cached, since a table is often created soon after it is found absent
+        if self._get_cached_sqla_table(table_name) is not None:
+            return True
         return self.engine.dialect.has_table(self._get_connection(), table_name)
 
     def get_all_table_names(self):
@@ -306,8 +428,38 @@ class BaseDBController(ABC):
 
         :return: A list of table names present in the database.
         """
-        self._update_sqla_tables()
-        return list(self.metadata.tables.keys())
+        with self._metadata_lock:
+            if self._all_table_names is None or time.monotonic() >= self._all_table_names[0]:
+                table_names = self._create_inspect().get_table_names()
+                self._all_table_names = (time.monotonic() + self.config.metadata_cache_ttl, table_names)
+            return list(self._all_table_names[1])
+
+    def invalidate_metadata_cache(self, table_name=None):
+        """
+        Remove the cached metadata of tables (i.e., the reflected columns and indexes, and the names of all tables).
+        The DDL issued by the functions of db controller (e.g., `create_table_if_absences`, `drop_table_if_exist`
+        and `create_index`) invalidates the cache automatically, and the other changes of schema are only bounded by
+        `config.metadata_cache_ttl`. Call it after changing the schema by `execute` directly.
+
+        :param table_name: the name of the table to be removed. If it is None, the metadata of all tables is removed.
+        """
+        with self._metadata_lock:
+            if table_name is None:
+                self._table_name_2_sqla_table.clear()
+                self.metadata.clear()
+            else:
+                self._table_name_2_sqla_table.pop(table_name, None)
+                if table_name in self.metadata.tables:
+                    self.metadata.remove(self.metadata.tables[table_name])
+            self._all_table_names = None
+
+    def invalidate_plan_cache(self):
+        """
+        Remove the cached plans explained by this controller (see `PlanCache`). The index DDL issued by the functions
+        of db controller (e.g., `create_index` and `drop_indexes`) invalidates them automatically.
+        """
+        if self.plan_cache is not None:
+            self.plan_cache.invalidate()
 
     def insert(self, table_name, column_2_value: dict):
         """
@@ -317,9 +469,46 @@ class BaseDBController(ABC):
         :param column_2_value: a dict where the keys are column names and the values are the values to be inserted
         """
         self._connect_if_loss()
-        table = Table(table_name, self.metadata, autoload_with=self.engine)
+        table = self._get_sqla_table(table_name)
         self.execute(table.insert().values(column_2_value))
 
+    def insert_batch(self, table_name, column_2_value_list: list):
+        """
+        Insert multiple rows into the table. The table is reflected once (see `_get_sqla_table`), and the consecutive rows with the same
+        columns are sent in one `executemany`, which is batched into multi-row VALUES by the driver.
+
+        :param table_name: the name of the table
+        :param column_2_value_list: a list of dicts, each of which is the column names and values of a row
+        """
+        if len(column_2_value_list) == 0:
+            return
+        self._connect_if_loss()
+        table = self._get_sqla_table(table_name)
+        for rows in self._split_rows_by_columns(column_2_value_list):
+            self._execute_many(table.insert(), rows)
+
+    def _execute_many(self, sql, column_2_value_list: list):
+        """
+        Execute a statement once for each row of parameters by `executemany`. The subclasses should override it to
+        handle the statement in the same way as `execute`.
+
+        :param sql: a SQL statement with parameters, e.g., `table.insert()`
+        :param column_2_value_list: a list of dicts, each of which is the parameters of a row
+        """
+        self._get_connection().execute(sql, column_2_value_list)
+
+    @staticmethod
+    def _split_rows_by_columns(column_2_value_list: list):
+        # the rows of an `executemany` should have the same columns, and the order of rows is kept
+        batch = [column_2_value_list[0]]
+        for column_2_value in column_2_value_list[1:]:
+            if column_2_value.keys() == batch[0].keys():
+                batch.append(column_2_value)
+            else:
+                yield batch
+                batch = [column_2_value]
+        yield batch
+
     def get_table_columns(self, table_name):
         """
         Get all column names of a table
@@ -430,17 +619,37 @@ class BaseDBController(ABC):
         """
         Retrieves a dictionary of all SQLAlchemy table objects reflected from the database.
         """
-        self.metadata.reflect(self.engine)
+        with self._metadata_lock:
+            self.invalidate_metadata_cache()
+            self.metadata.reflect(self.engine)
+            expire_time = time.monotonic() + self.config.metadata_cache_ttl
+            for table_name, table in self.metadata.tables.items():
+                self._table_name_2_sqla_table[table_name] = (expire_time, table)
 
     def _get_sqla_table(self, table_name):
         """
-        Get SQLAlchemy `Table` object of a table
+        Get SQLAlchemy `Table` object of a table. The reflected table is cached for `config.metadata_cache_ttl`
+        seconds.
 
         :param table_name: the name of the table
         :return: the SQLAlchemy `Table` object of the table
         """
-        # update info of existed tables
-        return Table(table_name, self.metadata, autoload_with=self.engine)
+        table = self._get_cached_sqla_table(table_name)
+        if table is not None:
+            return table
+        with self._metadata_lock:
+            # the expired table is reflected again
+            if table_name in self.metadata.tables:
+                self.metadata.remove(self.metadata.tables[table_name])
+            table = Table(table_name, self.metadata, autoload_with=self.engine)
+            self._table_name_2_sqla_table[table_name] = (time.monotonic() + self.config.metadata_cache_ttl, table)
+            return table
+
+    def _get_cached_sqla_table(self, table_name):
+        value = self._table_name_2_sqla_table.get(table_name)
+        if value is not None and time.monotonic() < value[0]:
+            return value[1]
+        return None
 
     def _check_enable_deep_control(self):
         if not self.config._enable_deep_control:
@@ -1,11 +1,15 @@
 import os
 import re
 import subprocess
+import threading
+import weakref
+from typing import List
 
 from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 
 from pilotscope.Common.Index import Index
+from pilotscope.Common.RecordStream import RecordStream
 from pilotscope.Common.SSHConnector import SSHConnector
 from pilotscope.DBController.BaseDBController import BaseDBController
 from pilotscope.Exception.Exception import DBStatementTimeoutException, DatabaseCrashException, \
@@ -15,7 +19,8 @@ from pilotscope.PilotConfig import PostgreSQLConfig
 
 # noinspection PyProtectedMember
 class PostgreSQLController(BaseDBController):
-    _instances = set()
+    # the controllers created by `DBControllerFactory.create_db_controller` are not kept alive by it
+    _instances = weakref.WeakSet()
 
     def __new__(cls, *args, **kwargs):
         instance = super().__new__(cls)
@@ -24,19 +29,21 @@ class PostgreSQLController(BaseDBController):
 
     def __del__(self):
         self._disconnect()
-        type(self)._instances.remove(self)
+        type(self)._instances.discard(self)
 
     def __init__(self, config: PostgreSQLConfig, echo=True, enable_simulate_index=False):
+        # the number of SET statements sent to database, the number of SET statements avoided by the session state
+        # and the number of RESET statements sent to database
+        self.hint_stats = {"sets_issued": 0, "sets_avoided": 0, "resets_issued": 0}
+        self._hint_stat_lock = threading.Lock()
         super().__init__(config, echo)
         self.config: PostgreSQLConfig = config
 
         self.enable_simulate_index = enable_simulate_index
         self._add_extension()
         if self.enable_simulate_index:
-            self.simulate_index_visitor = SimulateIndexVisitor(self)
-            for index in super().get_all_indexes():
-                sql = f"SELECT hypopg_hide_index('{index.index_name}'::REGCLASS)"
-                self.execute(sql)
+            self.simulate_index_visitor = SimulateIndexVisitor(self, super().get_all_indexes())
+            self.simulate_index_visitor.init_connection()
 
     def _add_extension(self):
         extensions = self.get_available_extensions()
@@ -61,7 +68,7 @@ class PostgreSQLController(BaseDBController):
         return extensions
 
     def _create_conn_str(self):
-        return "{}://{}:{}@{}:{}/{}?{}".format("postgresql", self.config.db_user, self.config.db_user_pwd,
+        return "{}://{}:{}@{}:{}/{}?{}".format("postgresql+{}".format(self.config.db_driver), self.config.db_user, self.config.db_user_pwd,
                                                self.config.db_host,
                                                self.config.db_port, self.config.db, "connect_timeout=2")
 
@@ -74,11 +81,19 @@ class PostgreSQLController(BaseDBController):
         :param fetch_column_name: it indicates whether to fetch the column names of the result.
         :return: the result of the query if fetch is True, otherwise None
         """
+        return self._execute(sql, fetch, fetch_column_name)
+
+    def _execute_many(self, sql, column_2_value_list: list):
+        self._execute(sql, parameters=column_2_value_list)
+
+    def _execute(self, sql, fetch=False, fetch_column_name=False, flush_pending_reset=True, parameters=None):
         row = None
         try:
             self._connect_if_loss()
+            if flush_pending_reset and len(self._get_pending_reset_hints()) > 0:
+                self._flush_pending_reset()
             conn = self._get_connection()
-            result = conn.execute(text(sql) if isinstance(sql, str) else sql)
+            result = conn.execute(text(sql) if isinstance(sql, str) else sql, parameters)
             if fetch:
                 row = result.all()
                 if fetch_column_name:
@@ -95,6 +110,53 @@ class PostgreSQLController(BaseDBController):
                 raise e
         return row
 
+    def execute_stream(self, sql, batch_size=1000) -> RecordStream:
+        """
+        Execute a SQL query and fetch its result in batches by a server-side cursor, so that the memory usage is
+        bounded by `batch_size` rather than the size of result.
+        The autocommit of the connection is disabled until the stream is exhausted or closed, since the server-side
+        cursor only lives in a transaction block.
+
+        :param sql: the SQL query to execute
+        :param batch_size: the number of rows fetched from database in each batch
+        :return: a `RecordStream` of the lists of rows
+        """
+        self._connect_if_loss()
+        if len(self._get_pending_reset_hints()) > 0:
+            self._flush_pending_reset()
+        conn = self._get_connection()
+        conn.execution_options(isolation_level="READ COMMITTED")
+        try:
+            result = conn.execute(text(sql) if isinstance(sql, str) else sql,
+                                  execution_options={"stream_results": True, "max_row_buffer": batch_size})
+        except OperationalError as e:
+            self._end_stream(conn, None)
+            if "canceling statement due to statement timeout" in str(e):
+                raise DBStatementTimeoutException(str(e))
+            raise e
+        except Exception as e:
+            self._end_stream(conn, None)
+            raise e
+        return RecordStream(tuple(result.keys()), self._fetch_batches(result, batch_size),
+                            lambda: self._end_stream(conn, result))
+
+    def _fetch_batches(self, result, batch_size):
+        try:
+            for rows in result.partitions(batch_size):
+                yield rows
+        except OperationalError as e:
+            if "canceling statement due to statement timeout" in str(e):
+                raise DBStatementTimeoutException(str(e))
+            raise e
+
+    def _end_stream(self, conn, result):
+        try:
+            if result is not None:
+                result.close()
+            conn.commit()
+        finally:
+            conn.execution_options(isolation_level="AUTOCOMMIT")
+
     def set_hint(self, key, value):
         """
         Set the value of each hint (i.e., the run-time config) when execute SQL queries.
@@ -104,8 +166,92 @@ class PostgreSQLController(BaseDBController):
         :param key: the name of the hint
         :param value: the value of the hint
         """
-        sql = "SET {} TO {}".format(key, value)
-        self.execute(sql)
+        self.set_hints({key: value})
+
+    def set_hints(self, key_2_value_for_hint: dict):
+        """
+        Set the value of multiple hints. Only the hints whose values differ from the session are sent,
+        and all of them (including the deferred resetting of last query) are sent in one round trip.
+        The session state is tracked by PilotScope, so the hints should not be changed by `execute("SET ...")`
+        directly.
+
+        :param key_2_value_for_hint: a dict with keys as the names of the hints and values as the values to be set.
+        """
+        hint_2_value, pending_reset_hints = self._copy_session_hints()
+        reset_sqls, set_sqls = self._create_set_hints_sqls(key_2_value_for_hint, hint_2_value, pending_reset_hints)
+        if len(reset_sqls) + len(set_sqls) > 0:
+            # the batch runs in one implicit transaction, so the session is unchanged if any statement fails
+            self._execute(";".join(reset_sqls + set_sqls), flush_pending_reset=False)
+        self._commit_session_hints(hint_2_value, pending_reset_hints)
+        self._count_hint_stats(key_2_value_for_hint, reset_sqls, set_sqls)
+
+    def _create_set_hints_sqls(self, key_2_value_for_hint: dict, hint_2_value: dict, pending_reset_hints: set):
+        """
+        Create the statements setting the hints (including the deferred resetting). The given session state is
+        updated as if they have been executed, so it should be a copy by `_copy_session_hints`, which is committed
+        by `_commit_session_hints` only after the statements succeed.
+
+        :param key_2_value_for_hint: a dict with keys as the names of the hints and values as the values to be set.
+        :param hint_2_value: a copy of the values of hints set in the session
+        :param pending_reset_hints: a copy of the hints to be reset before the next SQL query
+        :return: a list of RESET statements and a list of SET statements
+        """
+        set_sqls = []
+        for key, value in key_2_value_for_hint.items():
+            value = str(value)
+            # if it is set by last query with the same value, it does not need to be set or reset
+            pending_reset_hints.discard(key)
+            if hint_2_value.get(key) != value:
+                set_sqls.append("SET {} TO {}".format(key, value))
+                hint_2_value[key] = value
+        return self._pop_pending_reset_sqls(hint_2_value, pending_reset_hints), set_sqls
+
+    def _pop_pending_reset_sqls(self, hint_2_value: dict, pending_reset_hints: set):
+        sqls = []
+        for hint in sorted(pending_reset_hints):
+            sqls.append("RESET {}".format(hint))
+            hint_2_value.pop(hint, None)
+        pending_reset_hints.clear()
+        return sqls
+
+    def _copy_session_hints(self):
+        return dict(self._get_session_hints()), set(self._get_pending_reset_hints())
+
+    def _commit_session_hints(self, hint_2_value: dict, pending_reset_hints: set):
+        self.connection_thread.hint_2_value = hint_2_value
+        self.connection_thread.pending_reset_hints = pending_reset_hints
+
+    def _count_hint_stats(self, key_2_value_for_hint: dict, reset_sqls, set_sqls):
+        with self._hint_stat_lock:
+            self.hint_stats["sets_issued"] += len(set_sqls)
+            self.hint_stats["sets_avoided"] += len(key_2_value_for_hint) - len(set_sqls)
+            self.hint_stats["resets_issued"] += len(reset_sqls)
+
+    def _flush_pending_reset(self):
+        hint_2_value, pending_reset_hints = self._copy_session_hints()
+        sqls = self._pop_pending_reset_sqls(hint_2_value, pending_reset_hints)
+        if len(sqls) > 0:
+            self._execute(";".join(sqls), flush_pending_reset=False)
+        self._commit_session_hints(hint_2_value, pending_reset_hints)
+        self._count_hint_stats({}, sqls, [])
+
+    def _reset_session(self):
+        """
+        Reset the hints set by `set_hint` to their session defaults, and remove the hypothetical indexes if
+        the simulated index is enabled.
+        The resetting of hints is deferred to the next SQL query, so that the hints set by it again with the same
+        values are neither reset nor set.
+        """
+        self.reset_hints()
+        if self.enable_simulate_index:
+            self.simulate_index_visitor.drop_all_indexes()
+            self.invalidate_plan_cache()
+
+    def _init_connection(self):
+        super()._init_connection()
+        # the visitor is absent when the first connection is established in the constructor
+        if getattr(self, "simulate_index_visitor", None) is not None:
+            self.simulate_index_visitor.init_connection()
 
     def create_index(self, index: Index):
         """
@@ -119,6 +265,8 @@ class PostgreSQLController(BaseDBController):
             column_names = index.joined_column_names()
             sql = f"create index {index.index_name} on {index.table} ({column_names});"
             self.execute(sql, fetch=False)
+            self.invalidate_metadata_cache(index.table)
+        self.invalidate_plan_cache()
 
     def drop_index(self, index: Index):
         """
@@ -133,6 +281,43 @@ class PostgreSQLController(BaseDBController):
                 f"DROP INDEX IF EXISTS {index.index_name};"
             )
             self.execute(statement, fetch=False)
+            self.invalidate_metadata_cache(index.table)
+        self.invalidate_plan_cache()
+
+    def create_indexes(self, indexes: List[Index]):
+        """
+        Create multiple indexes. The hypothetical indexes (i.e., `enable_simulate_index`) are created by one statement.
+
+        :param indexes: a list of Index objects
+        """
+        if self.enable_simulate_index:
+            self.simulate_index_visitor.create_indexes(indexes)
+            self.invalidate_plan_cache()
+        else:
+            super().create_indexes(indexes)
+
+    def drop_indexes(self, indexes: List[Index]):
+        """
+        Drop multiple indexes. The hypothetical indexes (i.e., `enable_simulate_index`) are dropped by one statement.
+
+        :param indexes: a list of indexes that will be dropped
+        """
+        if self.enable_simulate_index:
+            self.simulate_index_visitor.drop_indexes(indexes)
+            self.invalidate_plan_cache()
+        else:
+            super().drop_indexes(indexes)
+
+    def get_indexes_byte(self, indexes: List[Index]):
+        """
+        Get the size of multiple indexes in bytes. The sizes of hypothetical indexes are got by one statement.
+
+        :param indexes: a list of indexes
+        :return: a list of the sizes in the order of `indexes`
+        """
+        if self.enable_simulate_index:
+            return self.simulate_index_visitor.get_indexes_byte(indexes)
+        return super().get_indexes_byte(indexes)
 
     def drop_all_indexes(self):
         """
@@ -144,6 +329,7 @@ class PostgreSQLController(BaseDBController):
             indexes = self.get_all_indexes()
             for index in indexes:
                 self.drop_index(index)
+        self.invalidate_plan_cache()
 
     def get_all_indexes_byte(self):
         """
@@ -238,6 +424,99 @@ class PostgreSQLController(BaseDBController):
         """
         return self._explain(sql, comment, True)
 
+    def explain_analyzed_plan(self, sql, comment="", rollback=False):
+        """
+        Execute a SQL query by `EXPLAIN (ANALYZE, BUFFERS)`, which collects the execution time, the actual rows and
+        the buffer I/O of each plan node in one execution.
+
+        :param sql: The SQL query to be executed.
+        :param comment: A SQL comment will be added to the beginning of the SQL query.
+        :param rollback: If it is True, the SQL query is executed in a transaction that is rolled back, so that
+            it does not change data, e.g., the SQL query has been executed normally.
+        :return: The executed plan of the SQL query.
+        """
+        explain_sql = "{} explain (ANALYZE, BUFFERS, VERBOSE, SETTINGS, SUMMARY, FORMAT JSON) {}".format(comment, sql)
+        if not rollback:
+            return self.execute(text(explain_sql), True)[0][0][0]
+
+        self._connect_if_loss()
+        # the deferred resetting of hints should not be rolled back
+        if len(self._get_pending_reset_hints()) > 0:
+            self._flush_pending_reset()
+        conn = self._get_connection()
+        conn.execution_options(isolation_level="READ COMMITTED")
+        try:
+            return self._execute(text(explain_sql), True, flush_pending_reset=False)[0][0][0]
+        finally:
+            try:
+                conn.rollback()
+            finally:
+                conn.execution_options(isolation_level="AUTOCOMMIT")
+
+    def explain_physical_plans(self, sql, hints_and_comments):
+        """
+        Get the physical plans of a SQL query under multiple configurations, which are sent in one round trip by the
+        pipeline mode if the driver is psycopg 3 (i.e., `config.db_driver = "psycopg"`). Otherwise, each
+        configuration is sent by one multi-statement request including its hints and EXPLAIN.
+        Each configuration is explained from the session without the hints of previous configurations, and all
+        these hints are reset before the next SQL query.
+
+        :param sql: The SQL query to be explained.
+        :param hints_and_comments: a list of (key_2_value_for_hint, comment), where the hints are set before
+            EXPLAIN and the comment is added to the beginning of the EXPLAIN statement.
+        :return: a list of physical plans in the order of `hints_and_comments`
+        """
+        self._connect_if_loss()
+        driver_connection = self._get_connection().connection.driver_connection
+        # the requests are created on a copy of the session state, and the hints of all configurations are reset
+        # before the next SQL query whether the requests succeed or not
+        hint_2_value, pending_reset_hints = self._copy_session_hints()
+        touched_hints = set(hint_2_value.keys())
+        for key_2_value_for_hint, _ in hints_and_comments:
+            touched_hints.update(key_2_value_for_hint or {})
+        try:
+            if hasattr(driver_connection, "pipeline"):
+                requests = [self._create_explain_request(sql, key_2_value_for_hint, comment, hint_2_value,
+                                                         pending_reset_hints)
+                            for key_2_value_for_hint, comment in hints_and_comments]
+                plans = self._explain_in_pipeline(driver_connection, requests)
+                for (key_2_value_for_hint, _), (reset_sqls, set_sqls, _, _) in zip(hints_and_comments, requests):
+                    self._count_hint_stats(key_2_value_for_hint or {}, reset_sqls, set_sqls)
+            else:
+                plans = []
+                for key_2_value_for_hint, comment in hints_and_comments:
+                    reset_sqls, set_sqls, comment, explain_sql = self._create_explain_request(
+                        sql, key_2_value_for_hint, comment, hint_2_value, pending_reset_hints)
+                    # the comment is at the beginning of the whole request, where pg_hint_plan and PilotScope read it
+                    request = "{} {}".format(comment, ";".join(reset_sqls + set_sqls + [explain_sql]))
+                    plans.append(self._execute(request, fetch=True, flush_pending_reset=False)[0][0][0])
+                    self._commit_session_hints(dict(hint_2_value), set(pending_reset_hints))
+                    self._count_hint_stats(key_2_value_for_hint or {}, reset_sqls, set_sqls)
+        except Exception as e:
+            if "canceling statement due to statement timeout" in str(e):
+                raise DBStatementTimeoutException(str(e))
+            raise e
+        finally:
+            # all hints that may have been set are reset before the next SQL query, even if it fails halfway
+            self._get_pending_reset_hints().update(touched_hints)
+        return plans
+
+    def _create_explain_request(self, sql, key_2_value_for_hint, comment, hint_2_value, pending_reset_hints):
+        # the hints of previous configuration are reset
+        pending_reset_hints.update(hint_2_value.keys())
+        reset_sqls, set_sqls = self._create_set_hints_sqls({} if key_2_value_for_hint is None else key_2_value_for_hint,
+                                                           hint_2_value, pending_reset_hints)
+        return reset_sqls, set_sqls, comment, self.get_explain_sql(sql, False)
+
+    def _explain_in_pipeline(self, driver_connection, requests):
+        cursors = []
+        with driver_connection.pipeline():
+            for reset_sqls, set_sqls, comment, explain_sql in requests:
+                for set_hints_sql in reset_sqls + set_sqls:
+                    driver_connection.execute(set_hints_sql)
+                cursors.append(driver_connection.execute("{} {}".format(comment, explain_sql)))
+        return [cursor.fetchone()[0][0] for cursor in cursors]
+
     def _explain(self, sql, comment, execute: bool):
         return self.execute(text(self.get_explain_sql(sql, execute, comment)), True)[0][0][0]
 
@@ -389,10 +668,11 @@ class PostgreSQLController(BaseDBController):
         """
         if enable_all_schema:
             sql = "SELECT column_name FROM information_schema.columns WHERE table_name = '{}';".format(table_name)
-        else:
-            sql = "SELECT column_name FROM information_schema.columns WHERE table_name = '{}' and table_schema='public';".format(
-                table_name)
-        return [x[0] for x in self.execute(sql, fetch=True)]
+            return [x[0] for x in self.execute(sql, fetch=True)]
+        # the columns of the public schema are read from the cached metadata, see `invalidate_metadata_cache`
+        if not self.exist_table(table_name):
+            return []
+        return super().get_table_columns(table_name)
 
     def get_number_of_distinct_value(self, table_name, column_name):
         """
@@ -428,22 +708,71 @@ class PostgreSQLController(BaseDBController):
 
 class SimulateIndexVisitor:
 
-    def __init__(self, db_controller: PostgreSQLController):
+    def __init__(self, db_controller: PostgreSQLController, real_indexes: List[Index]):
+        """
+        :param db_controller: the controller whose connections the hypothetical indexes are created on
+        :param real_indexes: the real indexes, which are hidden from the optimizer on each connection
+        """
         super().__init__()
         self.db_controller = db_controller
+        self.real_indexes = real_indexes
+
+    @property
+    def _index_name_2_oid(self) -> dict:
+        """
+        The index name (i.e., `index_name` and `hypopg_name`) -> the oid of hypothetical index. The hypothetical
+        indexes belong to a connection, so it is kept in the thread-local data of the connection.
+        """
+        connection_thread = self.db_controller.connection_thread
+        if not hasattr(connection_thread, "hypopg_index_name_2_oid"):
+            connection_thread.hypopg_index_name_2_oid = {}
+        return connection_thread.hypopg_index_name_2_oid
+
+    def init_connection(self):
+        """
+        Remove the hypothetical indexes left on the connection of current thread (e.g., a connection reused from
+        the pool) and hide the real indexes on it.
+        """
+        self.drop_all_indexes()
+        self.hide_real_indexes(self.real_indexes)
+
+    def hide_real_indexes(self, indexes: List[Index]):
+        """
+        Hide the real indexes from the optimizer on the connection of current thread by one statement.
+        """
+        statement = text("SELECT hypopg_hide_index(CAST(name AS REGCLASS)) "
+                         "FROM unnest(CAST(:names AS text[])) AS name").bindparams(
+            names=[index.index_name for index in indexes])
+        self.db_controller.execute(statement)
 
     def create_index(self, index: Index):
-        columns = index.joined_column_names()
-        statement = (
-            "select * from hypopg_create_index( "
-            f"'create index on {index.table} "
-            f"({columns})')"
-        )
-        result = self.db_controller.execute(statement, fetch=True)[0]
-        index.hypopg_oid = result[0]
-        index.hypopg_name = result[1]
+        self.create_indexes([index])
+
+    def create_indexes(self, indexes: List[Index]):
+        """
+        Create the hypothetical indexes by one statement.
+
+        :return: the oids of the indexes in the order of `indexes`
+        """
+        if len(indexes) == 0:
+            return []
+        statement = text("SELECT h.indexrelid, h.indexname "
+                         "FROM unnest(CAST(:defs AS text[])) WITH ORDINALITY AS d(def, ord), "
+                         "LATERAL hypopg_create_index(d.def) AS h ORDER BY d.ord").bindparams(
+            defs=[f"create index on {index.table} ({index.joined_column_names()})" for index in indexes])
+        result = self.db_controller.execute(statement, fetch=True)
+        assert len(result) == len(indexes), "Could not create all simulated indexes."
+        for index, (oid, name) in zip(indexes, result):
+            index.hypopg_oid = oid
+            index.hypopg_name = name
+            self._index_name_2_oid[name] = oid
+            if index.index_name is not None:
+                self._index_name_2_oid[index.index_name] = oid
+        return [oid for oid, _ in result]
 
     def _get_oid_by_indexname(self, index_name):
+        if index_name in self._index_name_2_oid:
+            return self._index_name_2_oid[index_name]
         sql = f"SELECT indexrelid FROM hypopg_list_indexes WHERE index_name like '%{index_name}%'"
         res = self.db_controller.execute(sql, fetch=True)
         assert len(res) == 1, f"No oid or more than one oid named like '%{index_name}%'"
@@ -458,14 +787,31 @@ class SimulateIndexVisitor:
             return self._get_oid_by_indexname(index_name=index.index_name)
 
     def drop_index(self, index: Index):
-        oid = self._get_oid_of_index(index)
-        statement = f"select * from hypopg_drop_index({oid})"
+        self.drop_indexes([index])
+
+    def drop_indexes(self, indexes: List[Index]):
+        """
+        Drop the hypothetical indexes by one statement.
+        """
+        if len(indexes) == 0:
+            return
+        oids = [self._get_oid_of_index(index) for index in indexes]
+        statement = text("SELECT hypopg_drop_index(oid) FROM unnest(CAST(:oids AS oid[])) AS oid").bindparams(
+            oids=oids)
         result = self.db_controller.execute(statement, fetch=True)
-        assert result[0][0] is True, f"Could not drop simulated index with oid = {oid}."
+        for (is_dropped,), oid in zip(result, oids):
+            assert is_dropped is True, f"Could not drop simulated index with oid = {oid}."
+        self._remove_index_names(set(oids))
+
+    def _remove_index_names(self, oids: set):
+        index_name_2_oid = self._index_name_2_oid
+        for name in [name for name, oid in index_name_2_oid.items() if oid in oids]:
+            index_name_2_oid.pop(name)
 
     def drop_all_indexes(self):
         sql = "select hypopg_reset()"
         self.db_controller.execute(sql)
+        self._index_name_2_oid.clear()
 
     def get_all_indexes_byte(self):
         return self.get_table_indexes_byte("1' or '1'='1")
@@ -476,12 +822,21 @@ class SimulateIndexVisitor:
         return 0 if res is None else float(res)
 
     def get_index_byte(self, index: Index):
+        return self.get_indexes_byte([index])[0]
+
+    def get_indexes_byte(self, indexes: List[Index]):
+        """
+        Get the sizes of the hypothetical indexes by one statement.
+
+        :return: a list of the sizes in the order of `indexes`
+        """
         try:
-            oid = self._get_oid_of_index(index)
-            statement = f"select hypopg_relation_size({oid})"
-            result = self.db_controller.execute(statement, fetch=True)[0][0]
-            assert result > 0, "Hypothetical index does not exist."
-            return float(result)
+            statement = text("SELECT hypopg_relation_size(o.oid) "
+                             "FROM unnest(CAST(:oids AS oid[])) WITH ORDINALITY AS o(oid, ord) "
+                             "ORDER BY o.ord").bindparams(oids=[self._get_oid_of_index(index) for index in indexes])
+            result = [row[0] for row in self.db_controller.execute(statement, fetch=True)]
+            assert all(size > 0 for size in result), "Hypothetical index does not exist."
+            return [float(size) for size in result]
         except:
             raise RuntimeError
 
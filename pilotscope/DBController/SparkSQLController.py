@@ -358,6 +358,15 @@ class SparkSQLController(BaseDBController):
         table = self.name_2_table[table_name]
         table.insert(self.engine, column_2_value, persist=persist)
 
+    def insert_batch(self, table_name, column_2_value_list: list):
+        if len(column_2_value_list) == 0:
+            return
+        self.load_table_if_exists_in_datasource(table_name)
+        table = self.name_2_table[table_name]
+        for column_2_value in column_2_value_list:
+            table.insert(self.engine, column_2_value, persist=False)
+        table.persist(self.engine)
+
     def execute(self, sql, fetch=False, fetch_column_name=False) -> Union[pandas.DataFrame, DataFrame]:
         row = None
         try:
@@ -0,0 +1,148 @@
+import asyncio
+import uuid
+from concurrent.futures.thread import ThreadPoolExecutor
+from typing import Optional, List, Awaitable
+
+from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
+from pilotscope.Exception.Exception import DBStatementTimeoutException, InteractorReceiveTimeoutException
+from pilotscope.PilotConfig import PilotConfig
+from pilotscope.PilotEnum import DatabaseEnum
+from pilotscope.PilotTransData import PilotTransData
+
+
+# noinspection PyProtectedMember
+class AsyncPilotDataInteractor(PilotDataInteractor):
+    """
+    An asyncio version of `PilotDataInteractor`, i.e., `await interactor.execute(sql)`.
+
+    Each execution carries a unique request id in its pilot comment, and the data pulled from database is handed
+    to the waiting coroutine by resolving an asyncio future of the request id.
+    Thus, one event loop can drive many concurrent push-and-pull queries. Only the SQL statements themselves are
+    executed by a bounded pool of worker threads, since the database driver is blocking.
+    """
+
+    def __init__(self, config: PilotConfig, max_workers=10) -> None:
+        """
+
+        :param config: The configuration of PilotScope.
+        :param max_workers: the maximal number of SQL statements that are submitted to database simultaneously.
+        """
+        super().__init__(config)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pilotscope_async")
+
+    async def execute_batch(self, sqls, is_reset=True) -> List[Optional[PilotTransData]]:
+        """
+        Execute all sqls sequentially. All SQL queries is executed using the identical push/pull configuration.
+
+        :param sqls: a list of sqls to be executed
+        :param is_reset: If it is true, all `push`/`pull` will be removed after execution
+        :return: list of the results for each sql
+        """
+        datas = []
+        for sql in sqls:
+            datas.append(await self.execute(sql, is_reset=False))
+        if is_reset:
+            self._anchor_to_handlers.clear()
+        return datas
+
+    async def execute_parallel(self, sqls, is_reset=True) -> List[Optional[PilotTransData]]:
+        """
+        Execute all SQL statements concurrently on the event loop.
+        All SQL queries is executed using the identical push/pull configuration.
+
+        :param sqls: a list of sqls to be executed
+        :param is_reset: If it is true, all `push`/`pull` will be removed after execution
+        :return: list of the results for each sql
+        """
+        if self.db_controller.enable_simulate_index:
+            raise RuntimeError("simulate index does not support execute_parallel")
+
+        results = await asyncio.gather(*[self.execute(sql, is_reset=False) for sql in sqls])
+        if is_reset:
+            self._anchor_to_handlers.clear()
+        return list(results)
+
+    def execute(self, sql, is_reset=True) -> Awaitable[Optional[PilotTransData]]:
+        """
+        Execute this SQL and finish all registered push-and-pull operators before.
+        It is not a coroutine function, so that the registered operators are captured when this function is called
+        rather than when the returned coroutine starts running. Thus, it is safe to register the operators of next
+        query before awaiting the result.
+
+        :param sql: a sql statement to be executed
+        :param is_reset: If it is true, all `push`/`pull` will be removed after execution
+        :return: a coroutine. If no exceptions, its result is a `PilotTransData` representing extended result;
+            otherwise, its result is None.
+        """
+        anchor_to_handlers = dict(self._anchor_to_handlers)
+        if is_reset:
+            self._anchor_to_handlers.clear()
+        return self._execute_async(sql, anchor_to_handlers)
+
+    async def _execute_async(self, sql, anchor_to_handlers) -> Optional[PilotTransData]:
+        loop = asyncio.get_running_loop()
+        request_id = uuid.uuid4().hex
+        future = None
+        try:
+            self._check_anchor_mutual_exclusion(anchor_to_handlers)
+            if self._is_stream_record(anchor_to_handlers):
+                # the connection of worker thread is reset after each query, so it can not be held by a stream
+                raise RuntimeError("stream record does not support AsyncPilotDataInteractor")
+            comment_sql = self._create_comment_sql(sql, anchor_to_handlers, request_id)
+            is_execute_comment_sql = self._is_execute_comment_sql(anchor_to_handlers)
+
+            # the future must be registered before the database could send data
+            if self._is_need_to_receive_data(anchor_to_handlers):
+                future = self._data_fetcher.register_data_future(request_id, loop)
+
+            outer_data = PilotTransData()
+            records, execution_time_from_outer = await loop.run_in_executor(self._executor, self._execute_in_worker,
+                                                                            sql, comment_sql, is_execute_comment_sql,
+                                                                            outer_data, anchor_to_handlers)
+
+            # wait to fetch data
+            if future is not None:
+                try:
+                    receive_data = await asyncio.wait_for(future, self.config.once_request_timeout)
+                except asyncio.TimeoutError:
+                    raise InteractorReceiveTimeoutException()
+                data: PilotTransData = PilotTransData._parse_2_instance(receive_data, sql)
+            else:
+                data = PilotTransData()
+            self._fill_records(data, records)
+            data.sql = sql
+            self._merge_outer_data(data, outer_data)
+
+            if self.config.db_type == DatabaseEnum.SPARK:
+                self._add_execution_time(data, execution_time_from_outer, anchor_to_handlers)
+
+            return data
+
+        except (DBStatementTimeoutException, InteractorReceiveTimeoutException) as e:
+            print(e)
+            return None
+        finally:
+            if future is not None:
+                self._data_fetcher.remove_data_future(request_id)
+
+    def _execute_in_worker(self, sql, comment_sql, is_execute_comment_sql, outer_data: PilotTransData,
+                           anchor_to_handlers):
+        """
+        Run all the blocking database work of a query in one worker thread, because the session-level push
+        operators (e.g., hints) and the outer fetching (e.g., explain) must be on the same connection.
+        The connection is reset at the end, since the worker thread is shared by other queries.
+        """
+        try:
+            records, execution_time_from_outer = self._execute_sqls(comment_sql, is_execute_comment_sql,
+                                                                    anchor_to_handlers)
+            outer_data.sql = sql
+            self._fetch_data_from_outer(sql, outer_data, anchor_to_handlers, is_execute_comment_sql)
+            return records, execution_time_from_outer
+        finally:
+            self._reset_connection()
+
+    def _merge_outer_data(self, data: PilotTransData, outer_data: PilotTransData):
+        # the data received from database has higher priority, which is the same as `PilotDataInteractor.execute`
+        for key, value in outer_data.__dict__.items():
+            if value is not None and getattr(data, key, None) is None:
+                setattr(data, key, value)
@@ -1,25 +1,24 @@
 import json
 import socket
-import threading
 import time
 from http.server import BaseHTTPRequestHandler, HTTPServer
 
+from pilotscope.Common.Metrics import PilotMetrics, write_metrics_response
 from pilotscope.Common.Thread import ValueThread
 from pilotscope.Common.Util import all_https, singleton
+from pilotscope.DBInteractor import ReceivedDataDispatcher
 from pilotscope.DBInteractor.InteractorReceiver import InteractorReceiver
-from pilotscope.Exception.Exception import InteractorReceiveTimeoutException
+from pilotscope.DBInteractor.ReceivedDataDispatcher import dispatch_received_data, get_receiver_queue_depth
 from pilotscope.PilotConfig import PilotConfig
 
-data_lock = threading.Condition()
-tid_2_lock = {}
-tid_2_data = {}
 
-
-@singleton
-class HttpInteractorReceiver(InteractorReceiver):
+class BaseHttpInteractorReceiver(InteractorReceiver):
     """
     It is used to collect data from all instances of databaseControllers by Http Service.
     The "tid" is used to distinguish the source of data that returned by database connections.
+    It is either a thread id (`block_for_data_from_db`) or a request id registered by `register_data_future`.
+    The subclasses decide which kind of http server is used by overriding `_create_http_server`.
+    The http server also exposes `PilotMetrics` on `GET /metrics`.
     """
 
     def __init__(self, config: PilotConfig) -> None:
@@ -31,34 +30,25 @@ class HttpInteractorReceiver(InteractorReceiver):
 
         self._start(self.url, self.port)
         print("server url is {}, port is {}".format(self.url, self.port))
+        PilotMetrics.register_collector("pilotscope_receiver_queue_depth", get_receiver_queue_depth,
+                                        help_text="The data received from database but not taken by the waiting "
+                                                  "threads or coroutines yet")
 
     def get_extra_infos_for_trans(self) -> dict:
         return {"port": self.port, "url": self.url}
 
     def block_for_data_from_db(self) -> str:
-        tid = str(threading.get_ident())
-        with data_lock:
-            if tid in tid_2_data:
-                data = tid_2_data[tid]
-                tid_2_data.pop(tid)
-                return data
-            else:
-                cond = threading.Condition()
-                tid_2_lock[tid] = cond
-
-            # wait to receive data
-        with cond:
-            if tid not in tid_2_data:
-                timeout_stop = not cond.wait(self.timeout)
-
-        if timeout_stop:
-            raise InteractorReceiveTimeoutException()
-
-        return tid_2_data[tid]
+        return ReceivedDataDispatcher.wait_for_received_data(self.timeout)
+
+    def register_data_future(self, request_id, loop):
+        return ReceivedDataDispatcher.register_data_future(request_id, loop)
+
+    def remove_data_future(self, request_id):
+        ReceivedDataDispatcher.remove_data_future(request_id)
 
     def _start(self, url, port):
         server_address = (url, port)
-        self.httpServer = HTTPServer(server_address, RequestHandler)
+        self.httpServer = self._create_http_server(server_address)
 
         # start http service for the data collection
         http_thread = ValueThread(target=self.httpServer.serve_forever, name="serve_forever", args=())
@@ -66,6 +56,15 @@ class HttpInteractorReceiver(InteractorReceiver):
         http_thread.start()
         all_https.append(self.httpServer)
 
+    def _create_http_server(self, server_address):
+        """
+        Create the http server that receives the data sent by database.
+
+        :param server_address: a tuple of (url, port)
+        :return: an instance of `http.server.HTTPServer` or its subclasses
+        """
+        return HTTPServer(server_address, RequestHandler)
+
     def get_free_port(self):
         sock = socket.socket()
         sock.bind(('', 0))
@@ -74,28 +73,33 @@ class HttpInteractorReceiver(InteractorReceiver):
         return port
 
 
+@singleton
+class HttpInteractorReceiver(BaseHttpInteractorReceiver):
+    """
+    The default receiver. It handles the requests from database one by one by a single-threaded `HTTPServer`,
+    and each request is sent by a new connection.
+    """
+    pass
+
+
 class RequestHandler(BaseHTTPRequestHandler):
 
+    def do_GET(self):
+        write_metrics_response(self)
+
     def do_POST(self):
         content_length = int(self.headers.get('content-length'))
         data = self.rfile.read(content_length).decode('utf-8')
 
-        data = json.loads(data)
-        with data_lock:
-            # receive data
-            tid = data["tid"]
-            tid_2_data[tid] = data
-
-            # release the corresponding thread
-            if tid in tid_2_lock:
-                cond: threading.Condition = tid_2_lock[tid]
-                with cond:
-                    cond.notify()
+        dispatch_received_data(json.loads(data))
 
         self.send_response(200)
+        # it is necessary for the keep-alive connections to find the end of the response
+        self.send_header("Content-Length", "2")
         self.end_headers()
         self.wfile.write(b'OK')
 
     # Overload log_message of BaseHTTPRequestHandler to mute log output
     def log_message(self, format, *args):
         pass
+
@@ -16,3 +16,22 @@ class InteractorReceiver(ABC):
     @abstractmethod
     def block_for_data_from_db(self) -> str:
         pass
+
+    def register_data_future(self, request_id, loop):
+        """
+        Register an asyncio future that will be resolved with the data returned by database for `request_id`.
+        The future should be registered before the corresponding SQL query is sent to database.
+
+        :param request_id: the id carried by the pilot comment of the SQL query
+        :param loop: the event loop the future belongs to
+        :return: an asyncio future
+        """
+        raise NotImplementedError
+
+    def remove_data_future(self, request_id):
+        """
+        Remove the future of `request_id` if it has not been resolved, e.g., the waiting is timeout.
+
+        :param request_id: the id carried by the pilot comment of the SQL query
+        """
+        raise NotImplementedError
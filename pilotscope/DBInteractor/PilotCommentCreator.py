@@ -6,12 +6,15 @@ from pilotscope.PilotSysConfig import PilotSysConfig
 
 class PilotCommentCreator:
 
-    def __init__(self, anchor_params: dict = None, enable_terminate_flag=True, enable_receive_pilot_data=True, extra_comment = None):
+    def __init__(self, anchor_params: dict = None, enable_terminate_flag=True, enable_receive_pilot_data=True, extra_comment = None,
+                 request_id=None):
         self.anchor_params = {} if anchor_params is None else anchor_params
         self.enable_terminate_flag = enable_terminate_flag
         self.enable_receive_pilot_data_flag = enable_receive_pilot_data
         self.other = {}
         self.extra_comment = extra_comment
+        # the database returns it as "tid" such that the receiver can find the caller of the data
+        self.request_id = request_id
 
     def add_anchor_params(self, anchor_params: dict):
         self.anchor_params.update(anchor_params)
@@ -33,7 +36,7 @@ class PilotCommentCreator:
             "enableReceiveData": self.enable_receive_pilot_data_flag
         }
         res.update(self.other)
-        res.update({"tid": str(threading.get_ident())})
+        res.update({"tid": str(threading.get_ident()) if self.request_id is None else str(self.request_id)})
         if self.extra_comment is None:
             return "/*pilotscope {} pilotscope*/".format(json.dumps(res))
         else:
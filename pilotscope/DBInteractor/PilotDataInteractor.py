@@ -1,3 +1,4 @@
+import threading
 import time
 from concurrent.futures import Future
 from concurrent.futures.thread import ThreadPoolExecutor
@@ -7,9 +8,14 @@ import pandas
 
 from pilotscope.Anchor.BaseAnchor.BasePullHandler import *
 from pilotscope.Anchor.BaseAnchor.BasePushHandler import *
+from pilotscope.Common.LatencyTracer import LatencyTracer
+from pilotscope.Common.Metrics import PilotMetrics
+from pilotscope.Common.RecordStream import RecordStream
 from pilotscope.Common.Util import extract_anchor_handlers, extract_handlers, wait_futures_results
+from pilotscope.DBController.BaseDBController import BaseDBController
 from pilotscope.DBInteractor.InteractorReceiver import InteractorReceiver
 from pilotscope.DBInteractor.PilotCommentCreator import PilotCommentCreator
+from pilotscope.DBInteractor.PlanCache import PlanCache
 from pilotscope.Exception.Exception import DBStatementTimeoutException, InteractorReceiveTimeoutException, \
     PilotScopeMutualExclusionException
 from pilotscope.Factory.AnchorHandlerFactory import AnchorHandlerFactory
@@ -25,11 +31,15 @@ class PilotDataInteractor:
     """The core module for interacting with DBMS and handling push-and-pull operators
     """
 
-    def __init__(self, config: PilotConfig, enable_simulate_index=False) -> None:
+    def __init__(self, config: PilotConfig, enable_simulate_index=False,
+                 db_controller: BaseDBController = None) -> None:
         """
 
         :param config: The configuration of PilotScope.
         :param enable_simulate_index: A flag indicating whether to enable the simulated index. This flag is only valid for PostgreSQL.
+        :param db_controller: the db controller used by this interactor, e.g., one created by
+            `DBControllerFactory.create_db_controller`. If it is None, the db controller shared by all interactors
+            with the same config is used.
         """
 
         # if all items of any one comb occur in registered anchors, they will raise an exception
@@ -37,11 +47,27 @@ class PilotDataInteractor:
             [AnchorEnum.CARD_PUSH_ANCHOR, AnchorEnum.SUBQUERY_CARD_PULL_ANCHOR]
         ]
 
-        self.db_controller = DBControllerFactory.get_db_controller(config, enable_simulate_index=enable_simulate_index)
-        self._anchor_to_handlers = {}
+        if db_controller is None:
+            db_controller = DBControllerFactory.get_db_controller(config, enable_simulate_index=enable_simulate_index)
+        self.db_controller = db_controller
+        self._thread_local = threading.local()
         self.config = config
         self.spark_analyzed = False
         self._data_fetcher: InteractorReceiver = InteractorReceiverFactory.get_data_fetcher(config)
+        self.plan_cache: Optional[PlanCache] = None
+        if config.plan_cache_capacity is not None:
+            self.plan_cache = PlanCache.get_plan_cache(self.db_controller, config.plan_cache_capacity,
+                                                       config.plan_cache_ttl)
+
+    @property
+    def _anchor_to_handlers(self) -> dict:
+        """
+        The registered push-and-pull operators. They are kept per thread, so the threads sharing a data interactor
+        (e.g., the handlers called by `PilotScheduler` in multiple threads) do not affect each other.
+        """
+        if not hasattr(self._thread_local, "anchor_to_handlers"):
+            self._thread_local.anchor_to_handlers = {}
+        return self._thread_local.anchor_to_handlers
 
     def push_hint(self, key_2_value_for_hint: dict):
         """
@@ -207,13 +233,23 @@ class PilotDataInteractor:
         anchor = AnchorHandlerFactory.get_anchor_handler(self.config, AnchorEnum.ESTIMATED_COST_PULL_ANCHOR)
         self._anchor_to_handlers[AnchorEnum.ESTIMATED_COST_PULL_ANCHOR] = anchor
 
-    def pull_record(self):
+    def pull_record(self, stream=False, batch_size=1000):
         """
         Require PilotScope to collect execution records when execute a SQL query.
         PilotScope will not to execute a complete process of recode retrieval, unless you require it to collect records.
+
+        :param stream: If it is true, `records` of the result is a `RecordStream` fetching the lists of rows from
+            database in batches by a server-side cursor, rather than a `DataFrame` of all rows. It keeps the memory
+            usage constant for a large result. The stream should be exhausted or closed before the next execution
+            in the same thread. Only PostgreSQL is supported.
+        :param batch_size: the number of rows in each batch if `stream` is true
         """
+        if stream and self.config.db_type != DatabaseEnum.POSTGRESQL:
+            raise NotImplementedError("stream record only is implemented for PostgresSQL database")
         anchor: RecordPullHandler = AnchorHandlerFactory.get_anchor_handler(self.config,
                                                                             AnchorEnum.RECORD_PULL_ANCHOR)
+        anchor.stream = stream
+        anchor.batch_size = batch_size
         self._anchor_to_handlers[AnchorEnum.RECORD_PULL_ANCHOR] = anchor
 
     def pull_buffercache(self):
@@ -224,17 +260,108 @@ class PilotDataInteractor:
                                                                                  AnchorEnum.BUFFERCACHE_PULL_ANCHOR)
         self._anchor_to_handlers[AnchorEnum.BUFFERCACHE_PULL_ANCHOR] = anchor
 
+    def pull_analyzed_plan(self):
+        """
+        Require PilotScope to execute a SQL query once by `EXPLAIN ANALYZE`, and collect the execution time,
+        the executed plan (as `physical_plan`), the actual rows of each plan node (as `real_node_cards`) and the
+        buffer I/O (as `buffer_io`) from this execution. Only PostgreSQL is supported.
+
+        `EXPLAIN ANALYZE` does not return the records, so the SQL query is executed twice if the records or the data
+        collected in database are also pulled (e.g., by `PilotScheduler`, which always pulls the records). In that
+        case, the execution by `EXPLAIN ANALYZE` is rolled back, so the SQL query changing data (e.g., an UPDATE or
+        a data-modifying WITH) only changes data once. The execution time of
+        `pull_execution_time` measures the normal execution, so it takes precedence over the one of this anchor if
+        both are pulled, while the executed plan takes precedence over `pull_physical_plan`.
+        """
+        if self.config.db_type != DatabaseEnum.POSTGRESQL:
+            raise NotImplementedError("analyzed plan only is implemented for PostgresSQL database")
+        anchor = AnchorHandlerFactory.get_anchor_handler(self.config, AnchorEnum.ANALYZED_PLAN_PULL_ANCHOR)
+        self._anchor_to_handlers[AnchorEnum.ANALYZED_PLAN_PULL_ANCHOR] = anchor
+
     def _pull_real_node_cost(self):
         """
-        Placeholder method for pulling real node cost information.
+        The actual time of each node is in the executed plan, see `pull_analyzed_plan`.
         """
-        pass
+        self.pull_analyzed_plan()
 
     def _pull_real_node_card(self):
         """
-        Placeholder method for pulling real node cardinality information.
+        The actual rows of each node are collected as `real_node_cards`, see `pull_analyzed_plan`.
         """
-        pass
+        self.pull_analyzed_plan()
+
+    def explain_many(self, sql, push_configs: List[dict]) -> List[dict]:
+        """
+        Get the physical plans of a SQL query under multiple push configurations, which are sent to database in one
+        round trip if possible (see `PostgreSQLController.explain_physical_plans`). It is much faster than
+        calling `push_*`, `pull_physical_plan` and `execute` for each configuration.
+        The registered push-and-pull operators are not affected. The function is only valid for PostgreSQL.
+
+        :param sql: the SQL query to be explained
+        :param push_configs: a list of push configurations. Each one is a dict from the name of push operator to its
+            data, e.g., {"hint": {"enable_nestloop": "off"}, "card": {"subquery_1": 100},
+            "pg_hint_comment": "/*+ SeqScan(a) */", "scan_join_methods": [(ScanJoinMethodEnum.SEQ, ("a",))]}
+        :return: a list of physical plans in the order of `push_configs`
+        """
+        if self.config.db_type != DatabaseEnum.POSTGRESQL:
+            raise NotImplementedError("explain_many only is implemented for PostgresSQL database")
+
+        plans = [None] * len(push_configs)
+        plan_cache_keys = [None] * len(push_configs)
+        missed_idxes = []
+        hints_and_comments = []
+        for i, push_config in enumerate(push_configs):
+            anchor_to_handlers = self._create_push_handlers(push_config)
+            replace_anchor_params = self._get_replace_anchor_params(anchor_to_handlers.values())
+            if self.plan_cache is not None:
+                plan_cache_keys[i] = self._create_plan_cache_key(sql, replace_anchor_params, anchor_to_handlers)
+                plans[i] = self.plan_cache.get(plan_cache_keys[i])
+                if plans[i] is not None:
+                    continue
+
+            comment = PilotCommentCreator(anchor_params=replace_anchor_params, enable_terminate_flag=False,
+                                          extra_comment=self._get_extra_comment_from_anchor(
+                                              anchor_to_handlers)).create_comment()
+            key_2_value_for_hint = None
+            if AnchorEnum.HINT_PUSH_ANCHOR in anchor_to_handlers:
+                key_2_value_for_hint = anchor_to_handlers[AnchorEnum.HINT_PUSH_ANCHOR].key_2_value_for_hint
+            missed_idxes.append(i)
+            hints_and_comments.append((key_2_value_for_hint, comment))
+
+        if len(hints_and_comments) > 0:
+            explained_plans = self.db_controller.explain_physical_plans(sql, hints_and_comments)
+            for i, plan in zip(missed_idxes, explained_plans):
+                plans[i] = plan
+                if self.plan_cache is not None:
+                    self.plan_cache.put(plan_cache_keys[i], plan)
+        return plans
+
+    def _create_push_handlers(self, push_config: dict):
+        """
+        Create the push handlers of a push configuration without registering them, see `explain_many`.
+
+        :param push_config: a dict from the name of push operator to its data
+        :return: a dict mapping anchors to their handlers
+        """
+        anchor_to_handlers = {}
+        for name, value in push_config.items():
+            if name == "hint":
+                anchor = AnchorHandlerFactory.get_anchor_handler(self.config, AnchorEnum.HINT_PUSH_ANCHOR)
+                anchor.key_2_value_for_hint = value
+            elif name == "card":
+                anchor = AnchorHandlerFactory.get_anchor_handler(self.config, AnchorEnum.CARD_PUSH_ANCHOR)
+                anchor.subquery_2_card = value
+            elif name == "pg_hint_comment":
+                anchor = AnchorHandlerFactory.get_anchor_handler(self.config, AnchorEnum.COMMENT_PUSH_ANCHOR)
+                anchor.comment_str = value
+            elif name == "scan_join_methods":
+                anchor = AnchorHandlerFactory.get_anchor_handler(self.config,
+                                                                 AnchorEnum.SCAN_JOIN_METHOD_PUSH_ANCHOR)
+                anchor.methods = list(value)
+            else:
+                raise RuntimeError("the push operator {} is not supported in a push configuration".format(name))
+            anchor_to_handlers[AnchorEnum.to_anchor_enum(anchor.anchor_name)] = anchor
+        return anchor_to_handlers
 
     def execute_batch(self, sqls, is_reset=True) -> List[Optional[PilotTransData]]:
         """
@@ -266,11 +393,13 @@ class PilotDataInteractor:
         if self.db_controller.enable_simulate_index:
             raise RuntimeError("simulate index does not support execute_parallel")
 
+        # the registered operators are only visible in current thread, so they are passed to the worker threads
+        anchor_to_handlers = self._anchor_to_handlers
         parallel_num = min(len(sqls), parallel_num)
         with ThreadPoolExecutor(max_workers=parallel_num) as pool:
             futures = []
             for sql in sqls:
-                future: Future = pool.submit(self.execute, sql, False)
+                future: Future = pool.submit(self._execute, sql, anchor_to_handlers, False)
                 future.add_done_callback(self._reset_connection)
                 futures.append(future)
             results = wait_futures_results(futures)
@@ -287,53 +416,72 @@ class PilotDataInteractor:
         :param is_reset: If it is true, all `push`/`pull` will be removed after execution
         :return: If no exceptions, it returns a `PilotTransData` representing extended result; otherwise, it returns None.
         """
+        return self._execute(sql, self._anchor_to_handlers, is_reset)
+
+    def _execute(self, sql, anchor_to_handlers, is_reset=True) -> Optional[PilotTransData]:
+        """
+        Execute this SQL with the given push-and-pull operators, see `execute`.
+
+        :param anchor_to_handlers: A dictionary mapping anchors to their handlers, e.g. {RECORD_PULL_ANCHOR: handler}.
+            It is cleared after execution if `is_reset` is true.
+        """
+        records = None
+        is_return_stream = False
+        PilotMetrics.inc("pilotscope_interactor_queries_total", help_text="The queries executed by data interactors")
+        for anchor in anchor_to_handlers.keys():
+            PilotMetrics.inc("pilotscope_anchor_calls_total", help_text="The calls of each push or pull anchor",
+                             anchor=anchor.name)
         try:
-            self._check_anchor_mutual_exclusion()
+            self._check_anchor_mutual_exclusion(anchor_to_handlers)
+            if self._is_stream_record(anchor_to_handlers) and self._is_need_to_receive_data(anchor_to_handlers):
+                raise RuntimeError("stream record does not support the pull operators collecting data in database")
             origin_sql = sql
-            enable_receive_pilot_data = self._is_need_to_receive_data(self._anchor_to_handlers)
-
-            # create pilot comment
-            comment_creator = PilotCommentCreator(enable_receive_pilot_data=enable_receive_pilot_data,
-                                                  extra_comment = self._get_extra_comment_from_anchor(self._anchor_to_handlers))
-            comment_creator.add_params(self._data_fetcher.get_extra_infos_for_trans())
-            comment_creator.enable_terminate(
-                False if AnchorEnum.RECORD_PULL_ANCHOR in self._anchor_to_handlers else True)
-            comment_creator.add_anchor_params(self._get_anchor_params_as_comment())
-            comment_sql = comment_creator.create_comment_sql(sql)
+            with LatencyTracer.span("interactor.create_comment"):
+                comment_sql = self._create_comment_sql(sql, anchor_to_handlers)
 
             # execution sqls. Sometimes, data do not need to be got from inner
-            is_execute_comment_sql = self._is_execute_comment_sql(self._anchor_to_handlers)
+            is_execute_comment_sql = self._is_execute_comment_sql(anchor_to_handlers)
 
-            records, execution_time_from_outer = self._execute_sqls(comment_sql, is_execute_comment_sql)
+            records, execution_time_from_outer = self._execute_sqls(comment_sql, is_execute_comment_sql,
+                                                                    anchor_to_handlers)
 
             # wait to fetch data
-            if self._is_need_to_receive_data(self._anchor_to_handlers):
-                receive_data = self._data_fetcher.block_for_data_from_db()
-                data: PilotTransData = PilotTransData._parse_2_instance(receive_data, origin_sql)
+            if self._is_need_to_receive_data(anchor_to_handlers):
+                with LatencyTracer.span("interactor.wait_for_data"):
+                    receive_data = self._data_fetcher.block_for_data_from_db()
+                with LatencyTracer.span("interactor.parse_data"):
+                    data: PilotTransData = PilotTransData._parse_2_instance(receive_data, origin_sql)
                 # fetch data from outer
             else:
                 data = PilotTransData()
-            if records is not None:
-                if self.config.db_type == DatabaseEnum.POSTGRESQL:
-                    data.records = pandas.DataFrame.from_records(records[1:], columns=records[0])
-                else:
-                    data.records = records
+            self._fill_records(data, records)
             data.sql = origin_sql
-            self._fetch_data_from_outer(origin_sql, data)
+            with LatencyTracer.span("interactor.fetch_from_outer"):
+                self._fetch_data_from_outer(origin_sql, data, anchor_to_handlers, is_execute_comment_sql)
 
             if self.config.db_type == DatabaseEnum.SPARK:
-                self._add_execution_time(data, execution_time_from_outer)
+                self._add_execution_time(data, execution_time_from_outer, anchor_to_handlers)
 
+            is_return_stream = isinstance(records, RecordStream)
             return data
 
         except (DBStatementTimeoutException, InteractorReceiveTimeoutException) as e:
+            PilotMetrics.inc("pilotscope_timeouts_total", help_text="The statement timeouts and receive timeouts",
+                             type=type(e).__name__)
             print(e)
             return None
         except Exception as e:
             raise e
         finally:
+            if isinstance(records, RecordStream) and not is_return_stream:
+                records.close()
             if is_reset:
-                self.reset()
+                anchor_to_handlers.clear()
+                if is_return_stream:
+                    # the connection is used by the stream, so it is reset after the stream is closed
+                    records.add_close_callback(self._reset_connection)
+                else:
+                    self._reset_connection()
 
     def reset(self):
         """
@@ -352,10 +500,41 @@ class PilotDataInteractor:
         """
         return self._anchor_to_handlers.values()
 
-    def _add_execution_time(self, data: PilotTransData, execution_time):
-        if AnchorEnum.EXECUTION_TIME_PULL_ANCHOR in self._anchor_to_handlers:
+    def _add_execution_time(self, data: PilotTransData, execution_time, anchor_to_handlers):
+        if AnchorEnum.EXECUTION_TIME_PULL_ANCHOR in anchor_to_handlers:
             data.execution_time = execution_time
 
+    def _is_stream_record(self, anchor_to_handlers):
+        return AnchorEnum.RECORD_PULL_ANCHOR in anchor_to_handlers and anchor_to_handlers[
+            AnchorEnum.RECORD_PULL_ANCHOR].stream
+
+    def _fill_records(self, data: PilotTransData, records):
+        if records is not None:
+            if isinstance(records, RecordStream):
+                data.records = records
+            elif self.config.db_type == DatabaseEnum.POSTGRESQL:
+                data.records = pandas.DataFrame.from_records(records[1:], columns=records[0])
+            else:
+                data.records = records
+
+    def _create_comment_sql(self, sql, anchor_to_handlers, request_id=None):
+        """
+        Create the SQL query with a pilot comment that carries all registered push-and-pull operators.
+
+        :param sql: the origin SQL query
+        :param anchor_to_handlers: A dictionary mapping anchors to their handlers, e.g. {RECORD_PULL_ANCHOR: handler}
+        :param request_id: An id used by the database to tag the returned data. The thread id is used if it is None.
+        :return: the SQL query with the pilot comment
+        """
+        enable_receive_pilot_data = self._is_need_to_receive_data(anchor_to_handlers)
+        comment_creator = PilotCommentCreator(enable_receive_pilot_data=enable_receive_pilot_data,
+                                              extra_comment=self._get_extra_comment_from_anchor(anchor_to_handlers),
+                                              request_id=request_id)
+        comment_creator.add_params(self._data_fetcher.get_extra_infos_for_trans())
+        comment_creator.enable_terminate(False if AnchorEnum.RECORD_PULL_ANCHOR in anchor_to_handlers else True)
+        comment_creator.add_anchor_params(self._get_anchor_params_as_comment(anchor_to_handlers))
+        return comment_creator.create_comment_sql(sql)
+
     def _is_need_to_receive_data(self, anchor_2_handlers):
         """
         Determines if data needs to be received based on the presence of anchors.
@@ -403,22 +582,28 @@ class PilotDataInteractor:
         if self.config.db_type != DatabaseEnum.SPARK:
             self.db_controller._reset()
 
-    def _execute_sqls(self, comment_sql, is_execute_comment_sql):
-        handlers = extract_handlers(self._anchor_to_handlers.values(), extract_pull_anchor=False)
+    def _execute_sqls(self, comment_sql, is_execute_comment_sql, anchor_to_handlers):
+        handlers = extract_handlers(anchor_to_handlers.values(), extract_pull_anchor=False)
         handlers = sorted(handlers, key=lambda x: cast(BaseAnchorHandler, x).get_call_priority())
-        for handler in handlers:
-            handler._exec_commands_before_sql(self.db_controller)
+        with LatencyTracer.span("interactor.push"):
+            for handler in handlers:
+                handler._exec_commands_before_sql(self.db_controller)
+        self._invalidate_plan_cache_if_need(anchor_to_handlers)
 
         records = execution_time_from_outer = None
-        if is_execute_comment_sql:
+        if is_execute_comment_sql and self._is_stream_record(anchor_to_handlers):
+            records = self.db_controller.execute_stream(comment_sql,
+                                                        anchor_to_handlers[AnchorEnum.RECORD_PULL_ANCHOR].batch_size)
+        elif is_execute_comment_sql:
             start_time = time.time()
-            records = self.db_controller.execute(comment_sql, fetch=True, fetch_column_name=True)
+            with LatencyTracer.span("interactor.execute_sql"):
+                records = self.db_controller.execute(comment_sql, fetch=True, fetch_column_name=True)
             execution_time_from_outer = time.time() - start_time
         return records, execution_time_from_outer
 
-    def _get_anchor_params_as_comment(self):
+    def _get_anchor_params_as_comment(self, anchor_to_handlers):
         anchor_params = {}
-        for anchor, handle in self._anchor_to_handlers.items():
+        for anchor, handle in anchor_to_handlers.items():
             params = {}
             if isinstance(handle, BasePushHandler):
                 handle._add_trans_params(params)
@@ -436,18 +621,51 @@ class PilotDataInteractor:
             result[anchor] = handle
         return result
 
-    def _fetch_data_from_outer(self, sql, data: PilotTransData):
-        replace_anchor_params = self._get_replace_anchor_params(self._anchor_to_handlers.values())
+    def _fetch_data_from_outer(self, sql, data: PilotTransData, anchor_to_handlers, is_sql_executed=False):
+        replace_anchor_params = self._get_replace_anchor_params(anchor_to_handlers.values())
         anchor_data = AnchorTransData()
-        handles = self._anchor_to_handlers.values()
+        anchor_data.is_sql_executed = is_sql_executed
+
+        # the cached plan is shared by all outer-fetch anchors of this query by `anchor_data`
+        plan_cache_key = None
+        if self.plan_cache is not None and self._is_exist_outer_fetch_anchor(anchor_to_handlers):
+            plan_cache_key = self._create_plan_cache_key(sql, replace_anchor_params, anchor_to_handlers)
+            anchor_data.physical_plan = self.plan_cache.get(plan_cache_key)
+        is_plan_cached = anchor_data.physical_plan is not None
+
+        handles = anchor_to_handlers.values()
         handles = sorted(handles, key=lambda x: cast(BaseAnchorHandler, x).get_call_priority())
         for handle in handles:
             if isinstance(handle, BasePullHandler) and handle.fetch_method == FetchMethod.OUTER:
                 comment_creator = PilotCommentCreator(anchor_params=replace_anchor_params, enable_terminate_flag=False,
-                                                      extra_comment=self._get_extra_comment_from_anchor(self._anchor_to_handlers))
+                                                      extra_comment=self._get_extra_comment_from_anchor(anchor_to_handlers))
                 comment = comment_creator.create_comment()
                 handle.fetch_from_outer(self.db_controller, sql, comment, anchor_data, data)
 
+        if plan_cache_key is not None and not is_plan_cached and anchor_data.physical_plan is not None:
+            self.plan_cache.put(plan_cache_key, anchor_data.physical_plan)
+
+    def _is_exist_outer_fetch_anchor(self, anchor_to_handlers):
+        for handle in anchor_to_handlers.values():
+            if isinstance(handle, BasePullHandler) and handle.fetch_method == FetchMethod.OUTER:
+                return True
+        return False
+
+    def _create_plan_cache_key(self, sql, replace_anchor_params, anchor_to_handlers):
+        key_2_value_for_hint = None
+        if AnchorEnum.HINT_PUSH_ANCHOR in anchor_to_handlers:
+            key_2_value_for_hint = anchor_to_handlers[AnchorEnum.HINT_PUSH_ANCHOR].key_2_value_for_hint
+        return PlanCache.create_key(sql, replace_anchor_params, self._get_extra_comment_from_anchor(anchor_to_handlers),
+                                    key_2_value_for_hint)
+
+    def _invalidate_plan_cache_if_need(self, anchor_to_handlers):
+        if self.plan_cache is None:
+            return
+        for anchor in PlanCache.invalidate_anchors:
+            if anchor in anchor_to_handlers:
+                self.plan_cache.invalidate()
+                return
+
     def _get_replace_anchor_params(self, handles):
         anchor_params = {}
         for handle in handles:
@@ -486,14 +704,14 @@ class PilotDataInteractor:
             anchor = AnchorEnum.to_anchor_enum(anchor)
         self._anchor_to_handlers[anchor] = handler
 
-    def _check_anchor_mutual_exclusion(self):
+    def _check_anchor_mutual_exclusion(self, anchor_to_handlers):
         """
         Checks if there are any mutual exclusion anchors in the current session.
         """
         for exclusion_anchors in self.mutual_exclusion_combs:
             anchors = []
             for exclusion_anchor in exclusion_anchors:
-                if exclusion_anchor in self._anchor_to_handlers:
+                if exclusion_anchor in anchor_to_handlers:
                     anchors.append(exclusion_anchor)
             if len(anchors) == len(exclusion_anchors):
                 raise PilotScopeMutualExclusionException(exclusion_anchors)
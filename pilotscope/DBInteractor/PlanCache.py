@@ -0,0 +1,152 @@
+import hashlib
+import json
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from pilotscope.Anchor.AnchorEnum import AnchorEnum
+from pilotscope.Common.Metrics import PilotMetrics
+
+# a quoted literal is kept as it is, and a run of whitespace out of literals is replaced by a single space
+_sql_whitespace_pattern = re.compile(r"('(?:[^']|'')*')|\s+")
+
+
+class PlanCache:
+    """
+    A bounded LRU cache with TTL for the physical plans explained by the outer-fetch pull anchors
+    (e.g., `PHYSICAL_PLAN_PULL_ANCHOR` and `ESTIMATED_COST_PULL_ANCHOR`).
+
+    The key is the normalized SQL query and a digest of the push operators that affect the optimizer, i.e.,
+    the params transmitted to database, the hints and the extra comment. The indexes and knobs are not a part of
+    the key, so all plans are invalidated when they are pushed, or when the indexes are changed by the functions of
+    `db_controller` (e.g., `create_index` and `drop_indexes`). The other changes of database (e.g., `ANALYZE` or
+    the indexes created by `execute` directly) are only bounded by TTL, call `invalidate` after them if needed.
+    """
+
+    # the push anchors changing the state of the whole database
+    invalidate_anchors = [AnchorEnum.INDEX_PUSH_ANCHOR, AnchorEnum.KNOB_PUSH_ANCHOR]
+
+    # the db controller -> its plan cache, the interactors sharing a db controller share a plan cache
+    _db_controller_2_cache = weakref.WeakKeyDictionary()
+    _registry_lock = threading.Lock()
+
+    def __init__(self, capacity=1024, ttl=300):
+        """
+        :param capacity: the maximal number of cached plans
+        :param ttl: the time-to-live of each cached plan, unit: second
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self._key_2_plan = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @classmethod
+    def get_plan_cache(cls, db_controller, capacity=1024, ttl=300):
+        """
+        Get the plan cache of a db controller. It is created if absent.
+
+        :param db_controller: the db controller that the plans are explained by
+        :param capacity: the maximal number of cached plans, only used when the cache is created
+        :param ttl: the time-to-live of each cached plan, only used when the cache is created
+        :return: a `PlanCache` shared by all interactors of the db controller
+        """
+        with cls._registry_lock:
+            if db_controller not in cls._db_controller_2_cache:
+                cls._db_controller_2_cache[db_controller] = PlanCache(capacity, ttl)
+                # the index DDL of db controller invalidates the cache, see `invalidate_plan_cache`
+                db_controller.plan_cache = cls._db_controller_2_cache[db_controller]
+                PilotMetrics.register_collector("pilotscope_plan_cache_hits_total",
+                                                lambda: cls._sum_counter("hits"), "counter",
+                                                "The hits of all plan caches")
+                PilotMetrics.register_collector("pilotscope_plan_cache_misses_total",
+                                                lambda: cls._sum_counter("misses"), "counter",
+                                                "The misses of all plan caches")
+            return cls._db_controller_2_cache[db_controller]
+
+    @classmethod
+    def _sum_counter(cls, counter_name):
+        with cls._registry_lock:
+            caches = list(cls._db_controller_2_cache.values())
+        return sum(getattr(cache, counter_name) for cache in caches)
+
+    @staticmethod
+    def create_key(sql, anchor_params: dict, extra_comment=None, key_2_value_for_hint: dict = None):
+        """
+        Create the key of a SQL query explained with a push configuration.
+
+        :param sql: the SQL query
+        :param anchor_params: the params of push anchors transmitted to database, e.g., `_get_replace_anchor_params`
+        :param extra_comment: the comment added before the SQL query, e.g., the comment of `pg_hint_plan`
+        :param key_2_value_for_hint: the hints set in the session
+        :return: a key of the plan cache
+        """
+        push_config = json.dumps([anchor_params, extra_comment, key_2_value_for_hint], sort_keys=True, default=str)
+        digest = hashlib.sha1(push_config.encode("utf-8")).hexdigest()
+        return PlanCache.normalize_sql(sql), digest
+
+    @staticmethod
+    def normalize_sql(sql: str):
+        sql = _sql_whitespace_pattern.sub(lambda m: m.group(1) if m.group(1) is not None else " ", sql)
+        return sql.strip().rstrip(";").strip()
+
+    def get(self, key):
+        """
+        :param key: the key created by `create_key`
+        :return: a copy of the cached plan, or None if it is absent or expired
+        """
+        with self._lock:
+            value = self._key_2_plan.get(key)
+            if value is not None:
+                expire_time, plan_json = value
+                if time.monotonic() < expire_time:
+                    self._key_2_plan.move_to_end(key)
+                    self.hits += 1
+                    # the plan may be modified by users, so each hit returns a new copy
+                    return json.loads(plan_json)
+                self._key_2_plan.pop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, plan):
+        """
+        :param key: the key created by `create_key`
+        :param plan: the physical plan, which should be serializable by json
+        """
+        plan_json = json.dumps(plan)
+        with self._lock:
+            self._key_2_plan[key] = (time.monotonic() + self.ttl, plan_json)
+            self._key_2_plan.move_to_end(key)
+            while len(self._key_2_plan) > self.capacity:
+                self._key_2_plan.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """
+        Remove all cached plans.
+        """
+        with self._lock:
+            self._key_2_plan.clear()
+            self.invalidations += 1
+
+    def get_hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def get_stats(self):
+        """
+        :return: a dict of the counters of the cache
+        """
+        with self._lock:
+            return {"size": len(self._key_2_plan), "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.get_hit_rate(), "evictions": self.evictions,
+                    "invalidations": self.invalidations}
+
+    def __len__(self):
+        return len(self._key_2_plan)
@@ -0,0 +1,100 @@
+import json
+from concurrent.futures.thread import ThreadPoolExecutor
+from typing import List, Tuple
+
+from pilotscope.Common.Util import wait_futures_results
+from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
+from pilotscope.PilotConfig import PilotConfig
+
+# the keys of a plan node deciding the structure of plan, the costs and cardinalities are not included
+_plan_structure_keys = ["Node Type", "Join Type", "Strategy", "Parent Relationship", "Relation Name", "Alias",
+                        "Index Name", "Scan Direction"]
+
+
+class PlanExplorer:
+    """
+    Explore the physical plans of a SQL query under many push configurations, e.g., the arms of hints in Bao,
+    the scaled cardinalities in Lero and the plans with true/estimated cardinalities in p-error.
+
+    The configurations are split into `parallel_num` shards, and each shard is explained by `explain_many` in a
+    worker thread with its own database connection (the connections of `DBController` are thread-local).
+    """
+
+    def __init__(self, config: PilotConfig, parallel_num=4) -> None:
+        """
+        :param config: The configuration of PilotScope.
+        :param parallel_num: the number of worker threads, i.e., the number of database connections used at most.
+        """
+        self.config = config
+        self.parallel_num = parallel_num
+        self.data_interactor = PilotDataInteractor(config)
+        if self.data_interactor.db_controller.enable_simulate_index:
+            # the hypothetical indexes are only visible in the connection creating them
+            raise RuntimeError("simulate index does not support PlanExplorer")
+        self._executor = ThreadPoolExecutor(max_workers=parallel_num, thread_name_prefix="pilotscope_explorer")
+
+    def explore(self, sql, push_configs: List[dict], enable_dedup=True) -> List[Tuple[dict, dict]]:
+        """
+        Get the physical plans of a SQL query under each push configuration concurrently.
+
+        :param sql: the SQL query to be explained
+        :param push_configs: a list of push configurations, see `PilotDataInteractor.explain_many`
+        :param enable_dedup: if it is True, only the first configuration of the plans with an identical structure
+            (see `get_plan_signature`) is returned.
+        :return: a list of (push configuration, physical plan) in the order of `push_configs`
+        """
+        shard_size = (len(push_configs) + self.parallel_num - 1) // self.parallel_num
+        futures = []
+        for start in range(0, len(push_configs), max(shard_size, 1)):
+            shard = push_configs[start:start + shard_size]
+            futures.append(self._executor.submit(self.data_interactor.explain_many, sql, shard))
+
+        plans = []
+        for shard_plans in wait_futures_results(futures):
+            plans.extend(shard_plans)
+        config_and_plans = list(zip(push_configs, plans))
+
+        if enable_dedup:
+            config_and_plans = self.dedup(config_and_plans)
+        return config_and_plans
+
+    @classmethod
+    def dedup(cls, config_and_plans: List[Tuple[dict, dict]]) -> List[Tuple[dict, dict]]:
+        """
+        Remove the plans having the identical structure with a previous plan.
+
+        :param config_and_plans: a list of (push configuration, physical plan)
+        :return: a list of (push configuration, physical plan) with distinct plan structures
+        """
+        signatures = set()
+        res = []
+        for push_config, plan in config_and_plans:
+            signature = cls.get_plan_signature(plan)
+            if signature not in signatures:
+                signatures.add(signature)
+                res.append((push_config, plan))
+        return res
+
+    @classmethod
+    def get_plan_signature(cls, plan: dict) -> str:
+        """
+        Get the signature of a physical plan, which consists of the operators, the join order, the scanned relations
+        and indexes. The plans with different costs or cardinalities have the same signature if their structures
+        are identical.
+
+        :param plan: a physical plan of PostgreSQL, i.e., {"Plan": {...}} or the root node
+        :return: a string of the signature
+        """
+        if "Plan" in plan:
+            plan = plan["Plan"]
+        return json.dumps(cls._get_node_signature(plan))
+
+    @classmethod
+    def _get_node_signature(cls, node: dict):
+        signature = [node.get(key) for key in _plan_structure_keys]
+        if "Plans" in node:
+            signature.append([cls._get_node_signature(child) for child in node["Plans"]])
+        return signature
+
+    def close(self):
+        self._executor.shutdown(wait=False)
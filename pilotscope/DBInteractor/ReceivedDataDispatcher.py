@@ -0,0 +1,77 @@
+import threading
+
+from pilotscope.Exception.Exception import InteractorReceiveTimeoutException
+
+# The data received from database is handed over to the waiting threads or coroutines by the functions below,
+# which are shared by all kinds of `InteractorReceiver`.
+
+data_lock = threading.Lock()
+# thread id -> condition on `data_lock`, which is notified when the data of the thread arrives
+tid_2_lock = {}
+tid_2_data = {}
+# request id -> (event loop, asyncio future), used by AsyncPilotDataInteractor
+rid_2_future = {}
+
+
+def dispatch_received_data(data: dict):
+    """
+    Hand the data received from database over to the thread or the coroutine waiting for it by its "tid".
+
+    :param data: the parsed json sent by database
+    """
+    with data_lock:
+        tid = data["tid"]
+        if tid in rid_2_future:
+            # resolve the future of the waiting coroutine
+            loop, future = rid_2_future.pop(tid)
+            loop.call_soon_threadsafe(_set_future_result, future, data)
+        else:
+            tid_2_data[tid] = data
+
+            # release the corresponding thread
+            if tid in tid_2_lock:
+                tid_2_lock[tid].notify()
+
+
+def wait_for_received_data(timeout):
+    """
+    Block the current thread until the data of it is received from database.
+
+    :param timeout: the maximal time of waiting, unit: second
+    :return: the parsed json sent by database
+    """
+    tid = str(threading.get_ident())
+    with data_lock:
+        if tid not in tid_2_data:
+            if tid not in tid_2_lock:
+                tid_2_lock[tid] = threading.Condition(data_lock)
+            cond: threading.Condition = tid_2_lock[tid]
+
+            # wait to receive data, `data_lock` is released during waiting
+            if not cond.wait_for(lambda: tid in tid_2_data, timeout):
+                raise InteractorReceiveTimeoutException()
+
+        return tid_2_data.pop(tid)
+
+
+def register_data_future(request_id, loop):
+    future = loop.create_future()
+    with data_lock:
+        rid_2_future[str(request_id)] = (loop, future)
+    return future
+
+
+def remove_data_future(request_id):
+    with data_lock:
+        rid_2_future.pop(str(request_id), None)
+
+
+def get_receiver_queue_depth():
+    with data_lock:
+        return len(tid_2_data)
+
+
+def _set_future_result(future, data):
+    # the future may have been cancelled by a timeout of the waiting coroutine
+    if not future.done():
+        future.set_result(data)
@@ -0,0 +1,66 @@
+from concurrent.futures.thread import ThreadPoolExecutor
+from http.server import HTTPServer
+
+from pilotscope.Common.Util import singleton
+from pilotscope.DBInteractor.HttpInteractorReceiver import BaseHttpInteractorReceiver, RequestHandler
+from pilotscope.PilotConfig import PilotConfig
+
+
+class KeepAliveRequestHandler(RequestHandler):
+    """
+    The same as `RequestHandler`, but the connection is kept alive (HTTP/1.1) so that the database can send
+    the data of many queries by one connection.
+    """
+    protocol_version = "HTTP/1.1"
+
+    # the data is small and latency-sensitive
+    disable_nagle_algorithm = True
+
+    # close the idle connections, otherwise they hold the workers forever. unit: second
+    timeout = 5
+
+
+class BoundedThreadingHTTPServer(HTTPServer):
+    """
+    A http server that handles each connection in a bounded pool of worker threads.
+    Different from `socketserver.ThreadingMixIn`, the number of threads does not grow with the number of connections.
+    """
+    # the pending connections when all workers are busy, e.g., many queries of `execute_parallel` finish together
+    request_queue_size = 128
+
+    def __init__(self, server_address, request_handler_class, max_workers):
+        super().__init__(server_address, request_handler_class)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pilotscope_receiver")
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process_request_in_worker, request, client_address)
+
+    def _process_request_in_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=False)
+
+
+@singleton
+class ThreadedHttpInteractorReceiver(BaseHttpInteractorReceiver):
+    """
+    A high-throughput receiver. The requests from database are handled concurrently by a bounded pool of worker
+    threads, and the connections are kept alive to avoid a TCP handshake for each request.
+
+    Each keep-alive connection occupies a worker until it is idle for `KeepAliveRequestHandler.timeout` seconds,
+    so `config.receiver_max_workers` should be larger than the number of database connections sending data.
+    """
+
+    def __init__(self, config: PilotConfig) -> None:
+        self.max_workers = config.receiver_max_workers
+        super().__init__(config)
+
+    def _create_http_server(self, server_address):
+        return BoundedThreadingHTTPServer(server_address, KeepAliveRequestHandler, self.max_workers)
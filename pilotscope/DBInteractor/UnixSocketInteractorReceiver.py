@@ -0,0 +1,195 @@
+import json
+import os
+import socket
+import socketserver
+import struct
+import tempfile
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+from pilotscope.Common.Metrics import PilotMetrics
+from pilotscope.Common.Thread import ValueThread
+from pilotscope.Common.Util import all_https, singleton
+from pilotscope.DBInteractor import ReceivedDataDispatcher
+from pilotscope.DBInteractor.InteractorReceiver import InteractorReceiver
+from pilotscope.DBInteractor.ReceivedDataDispatcher import dispatch_received_data, get_receiver_queue_depth
+from pilotscope.PilotConfig import PilotConfig
+
+# A frame is a header of (body length, frame type) followed by the body.
+FRAME_HEADER = struct.Struct("!IB")
+# the body is the json of pull data
+FRAME_TYPE_INLINE = 0
+# the body is a json of {"offset": ..., "size": ...} locating the json of pull data in the shared memory buffer
+FRAME_TYPE_SHARED_MEMORY = 1
+# the body is a json of {"name": ..., "size": ..., "pid": ...} announcing the shared memory buffer of the sender
+FRAME_TYPE_ATTACH = 2
+# the receiver replies one byte for each frame, so the sender can reuse the shared memory buffer after that
+ACK = b"\x01"
+
+
+def _recv_exactly(sock: socket.socket, size):
+    buf = bytearray(size)
+    view = memoryview(buf)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise ConnectionError("the connection is closed by peer")
+        received += n
+    return buf
+
+
+def _attach_shared_memory(name, owner_pid):
+    shm = SharedMemory(name=name)
+    if owner_pid != os.getpid():
+        # the buffer is owned by the sender, prevent the resource tracker of this process from unlinking it
+        # noinspection PyProtectedMember
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+class UnixSocketRequestHandler(socketserver.BaseRequestHandler):
+    """
+    Handle all frames of a connection. Each database connection keeps its socket open and sends the pull data of
+    all its queries by it.
+    """
+
+    def handle(self):
+        shm = None
+        try:
+            while True:
+                try:
+                    header = _recv_exactly(self.request, FRAME_HEADER.size)
+                except ConnectionError:
+                    break
+                size, frame_type = FRAME_HEADER.unpack(header)
+                body = _recv_exactly(self.request, size)
+
+                if frame_type == FRAME_TYPE_ATTACH:
+                    if shm is not None:
+                        shm.close()
+                    info = json.loads(body)
+                    shm = _attach_shared_memory(info["name"], info.get("pid"))
+                elif frame_type == FRAME_TYPE_SHARED_MEMORY:
+                    location = json.loads(body)
+                    offset, size = location["offset"], location["size"]
+                    # decode before acknowledging, the buffer may be overwritten after that
+                    dispatch_received_data(json.loads(bytes(shm.buf[offset:offset + size])))
+                else:
+                    dispatch_received_data(json.loads(body))
+                self.request.sendall(ACK)
+        finally:
+            if shm is not None:
+                shm.close()
+
+
+class PilotUnixStreamServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+@singleton
+class UnixSocketInteractorReceiver(InteractorReceiver):
+    """
+    A receiver for the database running on the same machine as PilotScope Core. The pull data is sent by a
+    Unix domain socket instead of the loopback http, and the large payloads (e.g., the subquery cards of a
+    complex join query) can be passed by a shared memory buffer of each database connection to avoid copying them
+    through the socket. See `UnixSocketDataSender` for the protocol.
+
+    The database side has to send the data by this protocol. The PostgreSQL extension of PilotScope only sends
+    the data by http currently, so this receiver waits for data that never arrives with it.
+    """
+
+    def __init__(self, config: PilotConfig) -> None:
+        super().__init__(config)
+        self.timeout = self.config.once_request_timeout
+        self.socket_path = config.receiver_socket_path
+        if self.socket_path is None:
+            self.socket_path = os.path.join(tempfile.gettempdir(), "pilotscope_{}.sock".format(os.getpid()))
+        self.shared_memory_threshold = config.receiver_shared_memory_threshold
+        self.httpServer = None
+
+        self._start_unix_socket_server()
+        print("server socket path is {}".format(self.socket_path))
+        # the metrics are not served by the unix socket, see `PilotMetrics.start_http_server`
+        PilotMetrics.register_collector("pilotscope_receiver_queue_depth", get_receiver_queue_depth,
+                                        help_text="The data received from database but not taken by the waiting "
+                                                  "threads or coroutines yet")
+
+    def get_extra_infos_for_trans(self) -> dict:
+        return {"socket_path": self.socket_path, "shm_threshold": self.shared_memory_threshold}
+
+    def block_for_data_from_db(self) -> str:
+        return ReceivedDataDispatcher.wait_for_received_data(self.timeout)
+
+    def register_data_future(self, request_id, loop):
+        return ReceivedDataDispatcher.register_data_future(request_id, loop)
+
+    def remove_data_future(self, request_id):
+        ReceivedDataDispatcher.remove_data_future(request_id)
+
+    def _start_unix_socket_server(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self.httpServer = PilotUnixStreamServer(self.socket_path, UnixSocketRequestHandler)
+
+        server_thread = ValueThread(target=self.httpServer.serve_forever, name="serve_forever", args=())
+        server_thread.daemon = True
+        server_thread.start()
+        all_https.append(self.httpServer)
+
+
+class UnixSocketDataSender:
+    """
+    The sender side of `UnixSocketInteractorReceiver`, which is the reference for the implementation in database.
+
+    The payload smaller than `shared_memory_threshold` bytes is sent inline. Otherwise, it is written to a shared
+    memory buffer created by the sender, and only its location is sent. Since each frame is acknowledged before the
+    next one is sent, the buffer is reused from the beginning for each payload. The payload larger than the buffer
+    falls back to be sent inline.
+    """
+
+    def __init__(self, socket_path, shared_memory_threshold=1024 * 1024, shared_memory_size=64 * 1024 * 1024):
+        """
+        :param socket_path: the path of unix socket of receiver, i.e., `UnixSocketInteractorReceiver.socket_path`
+        :param shared_memory_threshold: the minimal size of payloads in bytes sent by shared memory. If it is None,
+            the shared memory is disabled.
+        :param shared_memory_size: the size of shared memory buffer in bytes
+        """
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.shared_memory_threshold = shared_memory_threshold
+        self.shm = None
+        if shared_memory_threshold is not None:
+            self.shm = SharedMemory(create=True, size=shared_memory_size)
+            info = {"name": self.shm.name, "size": self.shm.size, "pid": os.getpid()}
+            self._send_frame(FRAME_TYPE_ATTACH, json.dumps(info).encode())
+
+    def send(self, data: dict):
+        """
+        Send the pull data to receiver.
+
+        :param data: the pull data including the "tid" given in pilot comment
+        """
+        payload = json.dumps(data).encode("utf-8")
+        if self.shm is not None and self.shared_memory_threshold <= len(payload) <= self.shm.size:
+            self.shm.buf[:len(payload)] = payload
+            self._send_frame(FRAME_TYPE_SHARED_MEMORY, json.dumps({"offset": 0, "size": len(payload)}).encode())
+        else:
+            self._send_frame(FRAME_TYPE_INLINE, payload)
+
+    def _send_frame(self, frame_type, body: bytes):
+        self.sock.sendall(FRAME_HEADER.pack(len(body), frame_type) + body)
+        if _recv_exactly(self.sock, len(ACK)) != ACK:
+            raise RuntimeError("unexpected acknowledgement from receiver")
+
+    def close(self):
+        self.sock.close()
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
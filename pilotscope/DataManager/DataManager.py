@@ -1,10 +1,14 @@
 import json
+import threading
 from copy import deepcopy
+from typing import Optional
 
 from pandas import DataFrame
 
+from pilotscope.Common.Metrics import PilotMetrics
 from pilotscope.DBController.BaseDBController import BaseDBController
 from pilotscope.DataManager.TableVisitedTracker import TableVisitedTracker
+from pilotscope.DataManager.WriteBehindBuffer import WriteBehindBuffer
 from pilotscope.Factory.DBControllerFectory import DBControllerFactory
 from pilotscope.PilotConfig import PilotConfig
 from pilotscope.PilotEnum import DatabaseEnum
@@ -34,6 +38,10 @@ class DataManager:
 
         self.table_visited_tracker = TableVisitedTracker(self.db_controller)
 
+        # it is created when `save_data_async` is called first time, see `PilotConfig.enable_write_behind`
+        self._write_behind_buffer: Optional[WriteBehindBuffer] = None
+        self._write_behind_lock = threading.Lock()
+
     def read_all(self, table_name):
         """
         Read all rows from a given table.
@@ -41,6 +49,7 @@ class DataManager:
         :param table_name: The name of the table to read from.
         :return: All rows in the specified table as a pandas DataFrame.
         """
+        self.flush()
         query = "select * from {}".format(table_name)
         data = DataFrame(self.db_controller.execute(query, fetch=True))
 
@@ -58,6 +67,7 @@ class DataManager:
         if self.config.db_type == DatabaseEnum.SPARK:
             raise RuntimeError("spark not support read_update")
 
+        self.flush()
         last_id = self.table_visited_tracker.read_data_visit_id(table_name)
         last_id = -1 if last_id is None else last_id
 
@@ -78,16 +88,53 @@ class DataManager:
             column_2_value = self._convert_data_type(column_2_value)
             self._create_table_if_absence(table_name, column_2_value)
             self.db_controller.insert(table_name, column_2_value)
+            PilotMetrics.inc("pilotscope_saved_rows_total", help_text="The rows saved by DataManager")
 
     def save_data_batch(self, table_name, column_2_value_list):
         """
-        Save data batch.
+        Save data batch. The table is created (if absent) and reflected only once, and the rows are inserted in bulk.
 
         :param table_name: The name of the table to be saved.
         :param column_2_value_list: A list of dictionaries, where each dictionary represents one row of data, e.g., [{'id': 1, 'name': 'John Doe'}, {'id': 2, 'name': 'Jane Doe'}]
         """
-        for i, column_2_value in enumerate(column_2_value_list):
+        column_2_value_list = [self._convert_data_type(column_2_value) for column_2_value in column_2_value_list
+                               if len(column_2_value) > 0]
+        if len(column_2_value_list) > 0:
+            self._create_table_if_absence(table_name, column_2_value_list[0])
+            self.db_controller.insert_batch(table_name, column_2_value_list)
+            PilotMetrics.inc("pilotscope_saved_rows_total", len(column_2_value_list),
+                             help_text="The rows saved by DataManager")
+
+    def save_data_async(self, table_name, column_2_value):
+        """
+        Save data to the specified table in a background thread if `PilotConfig.enable_write_behind` is called,
+        otherwise it is the same as `save_data`. It blocks only if too many rows are waiting to be written.
+
+        :param table_name: The name of the table to insert the data into.
+        :param column_2_value: A dictionary of column names and their corresponding values, e.g., {'id': 1, 'name': 'John Doe'}
+        """
+        if self.config.write_behind_batch_size is None:
             self.save_data(table_name, column_2_value)
+        elif len(column_2_value) > 0:
+            # the data type is checked in the caller's thread
+            column_2_value = self._convert_data_type(column_2_value)
+            self._get_write_behind_buffer().put(table_name, column_2_value)
+
+    def flush(self):
+        """
+        Block until all data saved by `save_data_async` are written into the tables.
+        """
+        if self._write_behind_buffer is not None:
+            self._write_behind_buffer.flush()
+
+    def close(self):
+        """
+        Write all data saved by `save_data_async` and stop the background thread.
+        """
+        with self._write_behind_lock:
+            buffer, self._write_behind_buffer = self._write_behind_buffer, None
+        if buffer is not None:
+            buffer.close()
 
     def remove_table_and_tracker(self, table_name):
         """
@@ -95,10 +142,20 @@ class DataManager:
 
         :param table_name: The name of the table to be dropped.
         """
+        self.flush()
         if self.db_controller.exist_table(table_name):
             self.db_controller.drop_table_if_exist(table_name)
             self.table_visited_tracker.delete_visited_record(table_name)
 
+    def _get_write_behind_buffer(self):
+        with self._write_behind_lock:
+            if self._write_behind_buffer is None:
+                self._write_behind_buffer = WriteBehindBuffer(self.save_data_batch,
+                                                              self.config.write_behind_batch_size,
+                                                              self.config.write_behind_flush_interval,
+                                                              self.config.write_behind_max_queue_size)
+            return self._write_behind_buffer
+
     def _create_table_if_absence(self, table_name, column_2_value):
         """
         Create a table if it does not exist.
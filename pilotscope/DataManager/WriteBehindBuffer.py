@@ -0,0 +1,141 @@
+import queue
+import threading
+import time
+import weakref
+from typing import Callable, Optional
+
+from pilotscope.Common.Metrics import PilotMetrics
+
+
+class _FlushRequest:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+_close_flag = object()
+
+
+class WriteBehindBuffer:
+    """
+    A buffer writing rows into tables in a background thread. The rows are grouped by table and written in batches
+    when `batch_size` rows are buffered or `flush_interval` seconds have passed since the first buffered row.
+    The queue is bounded by `max_queue_size`, so `put` blocks if the writing can not keep up (i.e., backpressure).
+    The rows of the same table are written in the order of `put`.
+    """
+
+    # the buffers that are not closed, whose queues are summed up by the metric of queue size
+    _open_buffers = weakref.WeakSet()
+    _registry_lock = threading.Lock()
+
+    def __init__(self, save_data_batch: Callable, batch_size=256, flush_interval=1.0, max_queue_size=10000) -> None:
+        """
+        :param save_data_batch: a function writing a list of rows into a table, e.g., `DataManager.save_data_batch`
+        :param batch_size: the number of buffered rows triggering a writing
+        :param flush_interval: the maximal delay of a buffered row, unit: second
+        :param max_queue_size: the maximal number of rows waiting in the queue
+        """
+        self.save_data_batch = save_data_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.num_written_rows = 0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._error: Optional[Exception] = None
+        self._is_closed = False
+        self._thread = threading.Thread(target=self._run, name="pilotscope_write_behind", daemon=True)
+        self._thread.start()
+        with self._registry_lock:
+            self._open_buffers.add(self)
+        PilotMetrics.register_collector("pilotscope_write_behind_queue_size", WriteBehindBuffer._get_total_queue_size,
+                                        help_text="The rows waiting to be written by all write-behind buffers")
+
+    def put(self, table_name, column_2_value: dict):
+        """
+        Add a row into the buffer. It blocks if the queue is full.
+
+        :param table_name: the name of the table to write into
+        :param column_2_value: a dict of column names and values
+        """
+        if self._is_closed:
+            raise RuntimeError("the write-behind buffer has been closed")
+        self._queue.put((table_name, column_2_value))
+
+    def get_queue_size(self):
+        """
+        :return: the approximate number of rows and requests waiting in the queue
+        """
+        return self._queue.qsize()
+
+    @classmethod
+    def _get_total_queue_size(cls):
+        with cls._registry_lock:
+            buffers = list(cls._open_buffers)
+        return sum(buffer.get_queue_size() for buffer in buffers)
+
+    def flush(self):
+        """
+        Block until all rows added before are written.
+
+        :raises RuntimeError: some rows are failed to be written since the last `flush`
+        """
+        if self._is_closed:
+            return
+        request = _FlushRequest()
+        self._queue.put(request)
+        request.done.wait()
+        self._raise_error_if_exist()
+
+    def close(self):
+        """
+        Write all buffered rows and stop the background thread.
+        """
+        if self._is_closed:
+            return
+        self._is_closed = True
+        with self._registry_lock:
+            self._open_buffers.discard(self)
+        self._queue.put(_close_flag)
+        self._thread.join()
+        self._raise_error_if_exist()
+
+    def _raise_error_if_exist(self):
+        error, self._error = self._error, None
+        if error is not None:
+            raise RuntimeError("fail to write the buffered rows: {}".format(error))
+
+    def _run(self):
+        table_2_rows = {}
+        num_rows = 0
+        deadline = None
+        while True:
+            timeout = None if num_rows == 0 else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is None or isinstance(item, _FlushRequest) or item is _close_flag:
+                self._write(table_2_rows)
+                table_2_rows, num_rows = {}, 0
+                if isinstance(item, _FlushRequest):
+                    item.done.set()
+                elif item is _close_flag:
+                    return
+                continue
+
+            table_name, column_2_value = item
+            table_2_rows.setdefault(table_name, []).append(column_2_value)
+            num_rows += 1
+            if num_rows == 1:
+                deadline = time.monotonic() + self.flush_interval
+            if num_rows >= self.batch_size:
+                self._write(table_2_rows)
+                table_2_rows, num_rows = {}, 0
+
+    def _write(self, table_2_rows: dict):
+        for table_name, rows in table_2_rows.items():
+            try:
+                self.save_data_batch(table_name, rows)
+                self.num_written_rows += len(rows)
+            except Exception as e:
+                print("fail to write {} rows into {}: {}".format(len(rows), table_name, e))
+                self._error = e
@@ -87,5 +87,8 @@ class AnchorHandlerFactory:
         elif anchor == AnchorEnum.BUFFERCACHE_PULL_ANCHOR:
             from pilotscope.Anchor.PostgreSQL.PullAnhor import PostgreSQLBuffercachePullHandler
             return PostgreSQLBuffercachePullHandler(config)
+        elif anchor == AnchorEnum.ANALYZED_PLAN_PULL_ANCHOR:
+            from pilotscope.Anchor.PostgreSQL.PullAnhor import PostgreSQLAnalyzedPlanPullHandler
+            return PostgreSQLAnalyzedPlanPullHandler(config)
         else:
             raise RuntimeError()
@@ -31,22 +31,34 @@ class DBControllerFactory:
                 db_controller._connect_if_loss()
                 return db_controller
 
-            if config.db_type == DatabaseEnum.POSTGRESQL:
-                from pilotscope.DBController.PostgreSQLController import PostgreSQLController
-                db_controller = PostgreSQLController(config, echo, enable_simulate_index)
-            elif config.db_type == DatabaseEnum.SPARK:
-                from pilotscope.DBController.SparkSQLController import SparkSQLController
-                if enable_simulate_index:
-                    raise RuntimeError("SparkSQL does not support simulate index")
-                db_controller = SparkSQLController(config, echo)
-                pass
-            else:
-                raise RuntimeError()
+            db_controller = cls.create_db_controller(config, echo, enable_simulate_index)
             DBControllerFactory._identifier_2_db_controller[identifier] = db_controller
             return db_controller
         finally:
             lock.release()
 
+    @classmethod
+    def create_db_controller(cls, config: PilotConfig, echo=False, enable_simulate_index=False):
+        """
+        Create a new db controller instance based on the config, which is not shared with others, i.e., it has its
+        own engine, plan cache and hypothetical indexes.
+
+        :param config: The config of PilotScope.
+        :param echo: Whether to print the SQL statement.
+        :param enable_simulate_index: Whether to enable the simulated index. This is only valid for PostgreSQL.
+        :return: A new db controller instance.
+        """
+        if config.db_type == DatabaseEnum.POSTGRESQL:
+            from pilotscope.DBController.PostgreSQLController import PostgreSQLController
+            return PostgreSQLController(config, echo, enable_simulate_index)
+        elif config.db_type == DatabaseEnum.SPARK:
+            from pilotscope.DBController.SparkSQLController import SparkSQLController
+            if enable_simulate_index:
+                raise RuntimeError("SparkSQL does not support simulate index")
+            return SparkSQLController(config, echo)
+        else:
+            raise RuntimeError()
+
     @classmethod
     def _get_identifier(cls, config: PilotConfig, enable_simulate_index=False):
         return "{}_{}".format(config, enable_simulate_index)
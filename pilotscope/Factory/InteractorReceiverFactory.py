@@ -1,4 +1,6 @@
 from pilotscope.DBInteractor.HttpInteractorReceiver import HttpInteractorReceiver
+from pilotscope.DBInteractor.ThreadedHttpInteractorReceiver import ThreadedHttpInteractorReceiver
+from pilotscope.DBInteractor.UnixSocketInteractorReceiver import UnixSocketInteractorReceiver
 from pilotscope.PilotConfig import PilotConfig
 from pilotscope.PilotEnum import DataFetchMethodEnum
 
@@ -8,5 +10,9 @@ class InteractorReceiverFactory:
     def get_data_fetcher(config: PilotConfig):
         if config.data_fetch_method == DataFetchMethodEnum.HTTP:
             return HttpInteractorReceiver(config)
+        elif config.data_fetch_method == DataFetchMethodEnum.THREADED_HTTP:
+            return ThreadedHttpInteractorReceiver(config)
+        elif config.data_fetch_method == DataFetchMethodEnum.UNIX_SOCKET:
+            return UnixSocketInteractorReceiver(config)
         else:
             raise RuntimeError()
@@ -1,7 +1,8 @@
 import os
 import json
 from pilotscope.Common.SSHConnector import SSHConnector
-from pilotscope.PilotEnum import DataFetchMethodEnum, DatabaseEnum, TrainSwitchMode, SparkSQLDataSourceEnum
+from pilotscope.PilotEnum import DataFetchMethodEnum, DatabaseEnum, TrainSwitchMode, SparkSQLDataSourceEnum, \
+    EventCoalescePolicyEnum
 import logging
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -32,10 +33,30 @@ class PilotConfig:
 
         self.pilotscope_core_host = pilotscope_core_host
         self.data_fetch_method = DataFetchMethodEnum.HTTP
+        self.receiver_max_workers = 32
+        self.receiver_socket_path = None
+        self.receiver_shared_memory_threshold = None
+        self.plan_cache_capacity = None
+        self.plan_cache_ttl = None
+        # if it is true, the subqueries of card push and pull are transmitted by their ids, see `SubqueryId`
+        self.compact_subquery = False
+        self.decision_cache_capacity = None
+        self.decision_cache_ttl = None
+        # the maximal time of acquiring the injected data for a query, unit: second
+        self.inference_budget = None
+        self.inference_max_workers = None
+        self.write_behind_batch_size = None
+        self.write_behind_flush_interval = None
+        self.write_behind_max_queue_size = None
+        # the time-to-live of the table metadata cached by db controller, unit: second
+        self.metadata_cache_ttl = 60
+        # if it is not None, the events triggered after queries are processed in a background thread
+        self.event_coalesce_policy = None
         self.db = db
         self.user_data_db_name = user_data_db_name
 
         self._enable_deep_control = False
+        self._enable_session_reset = False
         self._is_local = True
         self.sql_execution_timeout = sql_execution_timeout
         self.once_request_timeout = once_request_timeout
@@ -43,6 +64,113 @@ class PilotConfig:
         # pretraining
         self.pretraining_model = TrainSwitchMode.WAIT
 
+    def enable_threaded_http_receiver(self, max_workers=32):
+        """
+        Receive the data from database by a multi-threaded http server with keep-alive connections,
+        which is recommended when many queries are executed concurrently, e.g., `execute_parallel`.
+
+        :param max_workers: the maximal number of threads handling the requests from database
+        """
+        self.data_fetch_method = DataFetchMethodEnum.THREADED_HTTP
+        self.receiver_max_workers = max_workers
+
+    def enable_unix_socket_receiver(self, socket_path=None, shared_memory_threshold=1024 * 1024):
+        """
+        Receive the data from database by a Unix domain socket, and the large payloads by shared memory.
+        It is only available when the database and PilotScope Core are on the same machine.
+        The database should send the data by the protocol of `UnixSocketDataSender`. Note that the PostgreSQL
+        extension of PilotScope does not implement it yet and only sends the data by http, so the pulled data
+        is never received in this mode with it.
+
+        :param socket_path: the path of the unix socket. If it is None, a path in the temporary directory is used.
+        :param shared_memory_threshold: the payloads larger than this (unit: byte) are sent by shared memory.
+            If it is None, all payloads are sent by the socket.
+        """
+        if not self._is_local:
+            raise RuntimeError("the unix socket receiver requires the database to be on the same machine")
+        self.data_fetch_method = DataFetchMethodEnum.UNIX_SOCKET
+        self.receiver_socket_path = socket_path
+        self.receiver_shared_memory_threshold = shared_memory_threshold
+
+    def enable_session_reset(self):
+        """
+        Reuse the database connection after each execution of `PilotDataInteractor`. Only the session state changed
+        by PilotScope (e.g., the hints set by `push_hint`) is reset, instead of establishing a new connection,
+        which saves a new backend process of database for each SQL query.
+        """
+        self._enable_session_reset = True
+
+    def enable_plan_cache(self, capacity=1024, ttl=300):
+        """
+        Cache the physical plans explained by the outer-fetch pull anchors, e.g., `pull_physical_plan` and
+        `pull_estimated_cost`. The SQL query explained with the same push configuration will reuse the cached plan.
+
+        :param capacity: the maximal number of cached plans
+        :param ttl: the time-to-live of each cached plan, unit: second
+        """
+        self.plan_cache_capacity = capacity
+        self.plan_cache_ttl = ttl
+
+    def enable_compact_subquery(self):
+        """
+        Transmit the subqueries of `push_card` and `pull_subquery_card` by their stable ids (i.e., a hash of the
+        text) instead of their full texts. The database sends the text of a subquery only for the first time in a
+        session, so the size of the pilot comment and the returned data is reduced for the queries with many joins.
+        It requires the database extension to support the compact subquery protocol.
+        """
+        self.compact_subquery = True
+
+    def enable_decision_cache(self, capacity=1024, ttl=300):
+        """
+        Reuse the data injected by the push handlers of `PilotScheduler` for the SQL queries with the same
+        fingerprint (i.e., only differing in literals), instead of calling `acquire_injected_data` for each query.
+        Only the handlers whose `is_decision_reusable` is true are cached, e.g., `HintPushHandler`.
+
+        :param capacity: the maximal number of cached decisions
+        :param ttl: the time-to-live of each cached decision, unit: second
+        """
+        self.decision_cache_capacity = capacity
+        self.decision_cache_ttl = ttl
+
+    def enable_inference_budget(self, budget, max_workers=8):
+        """
+        Bound the time of `PilotScheduler` waiting for the push handlers to acquire their injected data
+        (e.g., the model inference of `acquire_injected_data`). The handlers run in background threads, and a handler
+        missing the budget is not pushed, i.e., the query is optimized by the native optimizer for it. The handler
+        still finishes in background if it has started, which warms the decision cache if `enable_decision_cache` is
+        called. Otherwise, it is cancelled, e.g., all background threads are busy.
+
+        :param budget: the maximal waiting time for each query, unit: second
+        :param max_workers: the number of background threads running the handlers
+        """
+        self.inference_budget = budget
+        self.inference_max_workers = max_workers
+
+    def enable_write_behind(self, batch_size=256, flush_interval=1.0, max_queue_size=10000):
+        """
+        Write the data collected by `PilotScheduler` in a background thread, so that the latency of each SQL query
+        does not include the writing. The rows are written in batches, and the buffered rows are written before
+        reading the tables by `DataManager`.
+
+        :param batch_size: the number of buffered rows triggering a writing
+        :param flush_interval: the maximal delay of a buffered row, unit: second
+        :param max_queue_size: the maximal number of buffered rows. The execution is blocked if the queue is full.
+        """
+        self.write_behind_batch_size = batch_size
+        self.write_behind_flush_interval = flush_interval
+        self.write_behind_max_queue_size = max_queue_size
+
+    def enable_background_events(self, coalesce_policy=EventCoalescePolicyEnum.MERGE):
+        """
+        Process the events triggered after queries (i.e., `QueryFinishEvent` and `PeriodicModelUpdateEvent`) in a
+        background thread of `PilotScheduler`, so that the query triggering them is not blocked by the processing.
+        The model of `PeriodicModelUpdateEvent` is updated on a copy and swapped in when it is ready.
+
+        :param coalesce_policy: the policy for the triggers of an event that is waiting or running,
+            see `EventCoalescePolicyEnum`
+        """
+        self.event_coalesce_policy = coalesce_policy
+
     def __str__(self):
         return self.__dict__.__str__()
 
@@ -70,6 +198,8 @@ class PostgreSQLConfig(PilotConfig):
         self.db_port = db_port
         self.db_user = db_user
         self.db_user_pwd = db_user_pwd
+        # the driver of SQLAlchemy, e.g., "psycopg2" or "psycopg" (i.e., psycopg 3 supporting the pipeline mode)
+        self.db_driver = "psycopg2"
         with open(os.path.join(os.path.dirname(__file__), "pilotscope_conf.json"), "r") as f:
             d = json.load(f)["PostgreSQLConfig"]
         for k, v in d.items():
@@ -20,7 +20,9 @@ class PushHandlerTriggerLevelEnum(PilotEnum):
 
 
 class DataFetchMethodEnum(PilotEnum):
-    HTTP = 0
+    HTTP = 0,
+    THREADED_HTTP = 1,
+    UNIX_SOCKET = 2
 
 
 class FetchMethod(PilotEnum):
@@ -33,6 +35,15 @@ class TrainSwitchMode(PilotEnum):
     DB = 1
 
 
+class EventCoalescePolicyEnum(PilotEnum):
+    # the triggers of an event are ignored when it is waiting or running
+    DROP = 0,
+    # the triggers of an event are merged into one pending run when it is running
+    MERGE = 1,
+    # each trigger of an event runs in order
+    QUEUE = 2
+
+
 class SparkSQLDataSourceEnum(PilotEnum):
     POSTGRESQL = "postgresql"
 
@@ -1,3 +1,4 @@
+import copy
 from abc import ABC, abstractmethod
 
 from pilotscope.DBController.BaseDBController import BaseDBController
@@ -39,15 +40,24 @@ class QueryFinishEvent(Event, ABC):
         self.interval_count = interval_count
         self.query_execution_count = 0
 
-    def _update(self, db_controller: BaseDBController, data_manager: DataManager):
+    def _update(self, db_controller: BaseDBController, data_manager: DataManager, event_executor=None):
         """
         This function will be called when a query is finished.
         It will call process function when `interval_count` query is finished.
+
+        :param event_executor: a `BackgroundEventExecutor`. If it is not None, the process function is called in its
+            background thread rather than the current thread.
         """
         self.query_execution_count += 1
         if self.query_execution_count >= self.interval_count:
             self.query_execution_count = 0
-            self.process(db_controller, data_manager)
+            if event_executor is None:
+                self.process(db_controller, data_manager)
+            else:
+                event_executor.submit(self, db_controller, data_manager)
+
+    def _process_in_background(self, db_controller: BaseDBController, data_manager: DataManager):
+        self.process(db_controller, data_manager)
 
     @abstractmethod
     def process(self, db_controller: BaseDBController, data_manager: DataManager):
@@ -123,8 +133,25 @@ class PeriodicModelUpdateEvent(QueryFinishEvent, ABC):
     def process(self, db_controller: BaseDBController, data_manager: DataManager):
         model = self.custom_model_update(self.pilot_model, db_controller, data_manager)
         if self.pilot_model is not None:
-            self.pilot_model.model = model
-            self.pilot_model.save_model()
+            self.pilot_model._update_model(model)
+
+    def _process_in_background(self, db_controller: BaseDBController, data_manager: DataManager):
+        """
+        The model is updated on a copy, since the queries executed meanwhile are still using the current model.
+        The updated model is swapped in when it is ready (as a new version if it is managed by `PilotModelRegistry`).
+        """
+        if self.pilot_model is None:
+            self.custom_model_update(None, db_controller, data_manager)
+            return
+
+        training_model = copy.copy(self.pilot_model)
+        try:
+            training_model.model = copy.deepcopy(self.pilot_model.model)
+        except Exception as e:
+            print("fail to copy the model of {}, it is updated in place: {}".format(self.pilot_model.model_name, e))
+            training_model = self.pilot_model
+        model = self.custom_model_update(training_model, db_controller, data_manager)
+        self.pilot_model._update_model(model)
 
     @abstractmethod
     def custom_model_update(self, pilot_model: PilotModel, db_controller: BaseDBController,
@@ -211,8 +238,7 @@ class PretrainingModelEvent(Event, ABC):
         :type train_data_manager: DataManager
         """
         if self.enable_training:
-            self._model.model = self.custom_model_training(self._model.model, db_controller, train_data_manager)
-            self._model.save_model()
+            self._model._update_model(self.custom_model_training(self._model.model, db_controller, train_data_manager))
 
     @abstractmethod
     def iterative_data_collection(self, db_controller: BaseDBController, train_data_manager: DataManager):
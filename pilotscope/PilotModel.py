@@ -8,7 +8,49 @@ class PilotModel(ABC):
         :param model_name: The name of the model.
         """
         self.model_name = model_name
-        self.model = None
+        # the user model and its version are replaced together, so a reader never sees a mixed pair
+        self._model_and_version = (None, None)
+        # it is set by `PilotModelRegistry` if the model is managed by a registry
+        self.registry = None
+
+    @property
+    def model(self):
+        """
+        The current user model. Read it once (or use `get_model_and_version`) when serving a query, since it may be
+        swapped by a model updating in background.
+        """
+        return self._model_and_version[0]
+
+    @model.setter
+    def model(self, model):
+        self._model_and_version = (model, None)
+
+    @property
+    def model_version(self):
+        """
+        The version of current user model in `PilotModelRegistry`, or None if it is not published by a registry.
+        """
+        return self._model_and_version[1]
+
+    def get_model_and_version(self):
+        """
+        :return: a consistent snapshot of the current user model and its version
+        """
+        return self._model_and_version
+
+    def _publish(self, model, version):
+        self._model_and_version = (model, version)
+
+    def _update_model(self, model):
+        """
+        Replace the user model with an updated one. It is published as a new version if the model is managed by a
+        `PilotModelRegistry`, otherwise it is assigned and saved by `save_model`.
+        """
+        if self.registry is not None:
+            self.registry.publish(model)
+        else:
+            self.model = model
+            self.save_model()
 
     @abstractmethod
     def save_model(self):
@@ -0,0 +1,126 @@
+import copy
+import os
+import re
+import shutil
+import threading
+
+from pilotscope.Common.Thread import ValueThread
+from pilotscope.PilotModel import PilotModel
+
+_version_dir_pattern = re.compile(r"^v(\d+)$")
+
+
+class PilotModelRegistry:
+    """
+    Keep the versions of a `PilotModel` on disk and publish them to the pilot model by an atomic reference swap,
+    so that the model can be updated or rolled back without blocking the queries using it.
+
+    The versions are saved and loaded by the `save_model` and `load_model` of the pilot model, with its `model_path`
+    redirected to `{registry_dir}/{model_name}/v{version}/{model_name}`. So the pilot model should save and load its
+    model at `self.model_path`, like the models in `algorithm_examples`.
+    """
+
+    def __init__(self, pilot_model: PilotModel, registry_dir, max_versions=5) -> None:
+        """
+        :param pilot_model: the pilot model managed by the registry. Its updated models (e.g., by
+            `PeriodicModelUpdateEvent`) are published as new versions.
+        :param registry_dir: the directory saving the versions
+        :param max_versions: the number of the latest versions kept for rolling back
+        """
+        if not hasattr(pilot_model, "model_path"):
+            raise RuntimeError("the pilot model should save and load its model at `model_path`")
+        self.pilot_model = pilot_model
+        self.max_versions = max_versions
+        self.model_dir = os.path.join(registry_dir, pilot_model.model_name)
+        os.makedirs(self.model_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        pilot_model.registry = self
+
+    def get_versions(self):
+        """
+        :return: the versions saved on disk in ascending order
+        """
+        versions = []
+        for name in os.listdir(self.model_dir):
+            match = _version_dir_pattern.match(name)
+            if match is not None:
+                versions.append(int(match.group(1)))
+        return sorted(versions)
+
+    def publish(self, model=None):
+        """
+        Save a model as a new version, and swap it into the pilot model.
+
+        :param model: the user model. If it is None, the current model of pilot model is published.
+        :return: the new version
+        """
+        model = self.pilot_model.model if model is None else model
+        with self._lock:
+            versions = self.get_versions()
+            version = versions[-1] + 1 if len(versions) > 0 else 1
+            self._create_staging_model(version, model).save_model()
+            self.pilot_model._publish(model, version)
+            self._remove_old_versions()
+        return version
+
+    def load(self, version=None):
+        """
+        Load a version from disk, and swap it into the pilot model.
+
+        :param version: the version to be loaded. If it is None, the latest version is loaded.
+        :return: the loaded version
+        """
+        versions = self.get_versions()
+        if version is None:
+            if len(versions) == 0:
+                raise RuntimeError("no version of {} is saved".format(self.pilot_model.model_name))
+            version = versions[-1]
+        elif version not in versions:
+            raise RuntimeError("the version {} of {} is not saved".format(version, self.pilot_model.model_name))
+
+        # the model is loaded into a staging pilot model, so the current model is serving until it is swapped
+        staging_model = self._create_staging_model(version, None)
+        staging_model.load_model()
+        self.pilot_model._publish(staging_model.model, version)
+        return version
+
+    def load_async(self, version=None):
+        """
+        Load a version in a background thread, see `load`.
+
+        :return: a started `ValueThread`, whose `join` returns the loaded version
+        """
+        t = ValueThread(target=self.load, args=(version,), name="pilotscope_model_loading")
+        t.start()
+        return t
+
+    def rollback(self):
+        """
+        Swap the version before the current one into the pilot model.
+
+        :return: the loaded version
+        """
+        current_version = self.pilot_model.model_version
+        versions = [v for v in self.get_versions() if current_version is None or v < current_version]
+        if len(versions) == 0:
+            raise RuntimeError("no version of {} before {} is kept".format(self.pilot_model.model_name,
+                                                                         current_version))
+        return self.load(versions[-1])
+
+    def _get_version_dir(self, version):
+        return os.path.join(self.model_dir, "v{}".format(version))
+
+    def _create_staging_model(self, version, model):
+        staging_model = copy.copy(self.pilot_model)
+        version_dir = self._get_version_dir(version)
+        os.makedirs(version_dir, exist_ok=True)
+        staging_model.model_path = os.path.join(version_dir, self.pilot_model.model_name)
+        staging_model.model = model
+        return staging_model
+
+    def _remove_old_versions(self):
+        versions = self.get_versions()
+        for version in versions[:max(len(versions) - self.max_versions, 0)]:
+            # the version being served is kept
+            if version != self.pilot_model.model_version:
+                shutil.rmtree(self._get_version_dir(version), ignore_errors=True)
@@ -1,8 +1,20 @@
-from typing import List
+import copy
+import json
+import threading
+import time
+from concurrent.futures import TimeoutError
+from concurrent.futures.thread import ThreadPoolExecutor
+from typing import List, Optional
 
+from pilotscope.Anchor.AnchorEnum import AnchorEnum
 from pilotscope.Anchor.BaseAnchor.BaseAnchorHandler import BaseAnchorHandler
 from pilotscope.Anchor.BaseAnchor.BasePullHandler import RecordPullHandler, BasePullHandler
 from pilotscope.Anchor.BaseAnchor.BasePushHandler import BasePushHandler
+from pilotscope.Common.DecisionCache import DecisionCache
+from pilotscope.Common.EventExecutor import BackgroundEventExecutor
+from pilotscope.Common.LatencyTracer import LatencyTracer
+from pilotscope.Common.Metrics import PilotMetrics
+from pilotscope.Common.SqlFingerprint import get_sql_fingerprint
 from pilotscope.Common.Util import extract_handlers
 from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
 from pilotscope.PilotEnum import *
@@ -25,6 +37,21 @@ class PilotScheduler:
         self.events = []
         self.user_tasks: List[BasePushHandler] = []
         self.data_interactor = PilotDataInteractor(self.config)
+        # the pull handlers of the data registered by `register_required_data`
+        self._required_anchor_to_handlers = {}
+        self.event_executor: Optional[BackgroundEventExecutor] = None
+        if self.config.event_coalesce_policy is not None:
+            self.event_executor = BackgroundEventExecutor(self.config.event_coalesce_policy)
+        self.decision_cache: Optional[DecisionCache] = None
+        if self.config.decision_cache_capacity is not None:
+            self.decision_cache = DecisionCache(self.config.decision_cache_capacity, self.config.decision_cache_ttl)
+        self.inference_executor: Optional[ThreadPoolExecutor] = None
+        if self.config.inference_budget is not None:
+            self.inference_executor = ThreadPoolExecutor(max_workers=self.config.inference_max_workers,
+                                                         thread_name_prefix="pilotscope_inference")
+        # the number of handlers skipped by missing the inference budget
+        self.num_inference_fallbacks = 0
+        self._fallback_lock = threading.Lock()
 
     def init(self):
         """
@@ -43,35 +70,86 @@ class PilotScheduler:
 
         3. try to trigger the registered events
 
+        The anchors of each call are kept separately, so the function can be called by multiple threads
+        (e.g., the sessions of a server) concurrently.
+
         :param sql: a sql to be executed
         :return: the related records of the sql
         """
-        data_interactor = self.data_interactor
+        anchor_to_handlers = dict(self._required_anchor_to_handlers)
 
         # add recordPullAnchor
         record_handler = RecordPullHandler(self.config)
-        data_interactor._add_anchor(record_handler.anchor_name, record_handler)
-
-        # add all replace anchors from user
-        data_interactor._add_anchors(self.user_tasks)
-
-        # replace value based on user's method
+        anchor_to_handlers[AnchorEnum.RECORD_PULL_ANCHOR] = record_handler
 
-        for replace_handle in self.user_tasks:
-            replace_handle._update_injected_data(sql)
+        # add all replace anchors from user, and replace value based on user's method
+        with LatencyTracer.span("scheduler.acquire_injected_data"):
+            fingerprint = get_sql_fingerprint(sql) if self.decision_cache is not None else None
+            if self.inference_executor is None:
+                handlers = [self._acquire_injected_handler(handler, sql, fingerprint) for handler in self.user_tasks]
+            else:
+                handlers = self._acquire_injected_handlers_in_budget(sql, fingerprint)
+            for handler in handlers:
+                anchor_to_handlers[AnchorEnum.to_anchor_enum(handler.anchor_name)] = handler
 
-        result = data_interactor.execute(sql, is_reset=False)
+        with LatencyTracer.span("scheduler.execute"):
+            result = self.data_interactor._execute(sql, anchor_to_handlers, is_reset=False)
+        PilotMetrics.inc("pilotscope_scheduler_queries_total", help_text="The queries executed by schedulers",
+                         status="ok" if result is not None else "failed")
 
         if result is not None:
-            self._post_process(result)
+            self._fill_model_versions(result, handlers)
+            self._post_process(result, anchor_to_handlers)
             return result.records
 
         return None
 
+    def execute_many(self, sqls, concurrency=4):
+        """
+        Execute the sqls by `concurrency` threads, so the AI inference, the execution and the post-processing of
+        different sqls are overlapped. The throughput is printed after all sqls are finished.
+
+        :param sqls: a list of sqls to be executed
+        :param concurrency: the maximal number of sqls executed at the same time
+        :return: the related records of each sql, in the order of `sqls`
+        """
+        if concurrency < 1:
+            raise RuntimeError("concurrency should be at least 1")
+        start_time = time.time()
+        if concurrency == 1 or len(sqls) <= 1:
+            results = [self.execute(sql) for sql in sqls]
+        else:
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(sqls)),
+                                    thread_name_prefix="pilotscope_scheduler") as pool:
+                results = list(pool.map(self.execute, sqls))
+        total_time = time.time() - start_time
+        print("executed {} sqls in {:.3f}s with concurrency {}, throughput is {:.3f} sqls/s".format(
+            len(sqls), total_time, concurrency, len(sqls) / total_time if total_time > 0 else float("inf")))
+        return results
+
+    def close(self):
+        """
+        Wait for the events processed in background (see `PilotConfig.enable_background_events`), and write all
+        collected data that are still buffered (see `PilotConfig.enable_write_behind`) into the table.
+        It should be called after executing all SQL queries.
+        """
+        if self.event_executor is not None:
+            self.event_executor.shutdown(wait=True)
+        if self.inference_executor is not None:
+            self.inference_executor.shutdown(wait=True)
+        self.data_manager.close()
+
     def register_custom_handlers(self, handlers: List[BaseAnchorHandler]):
         """
         Register custom AI4DB handlers
 
+        Each execution of a query-level handler (e.g., `acquire_injected_data` of a push handler) runs on a shallow
+        copy of the registered handler, so the concurrent executions do not overwrite the injected data of each other.
+        The attributes assigned on `self` during an execution are dropped after the query, while the objects shared
+        with the registered handler (e.g., the model, or a list mutated in place) are kept. The workload-level push
+        handlers are not copied. The `served_model_version` of each copy is saved with the collected data of the
+        query in the column "model_versions".
+
         :param handlers: a list of custom handlers
         """
         if not self._is_valid_custom_handlers(handlers):
@@ -82,7 +160,8 @@ class PilotScheduler:
         self.user_tasks += handlers
 
     def register_required_data(self, table_name_for_store_data, pull_execution_time=False, pull_physical_plan=False,
-                               pull_subquery_2_cards=False, pull_buffer_cache=False, pull_estimated_cost=False):
+                               pull_subquery_2_cards=False, pull_buffer_cache=False, pull_estimated_cost=False,
+                               pull_analyzed_plan=False):
         """
         Register data need to collect when executing a sql
 
@@ -92,6 +171,10 @@ class PilotScheduler:
         :param pull_subquery_2_cards: whether to get the sub-plan queries and their cardinality of a sql
         :param pull_buffer_cache: whether to get the buffer cache of table after executing a sql
         :param pull_estimated_cost: whether to get the estimated cost of a sql
+        :param pull_analyzed_plan: whether to get the execution time, the executed plan, the actual rows of each plan
+            node and the buffer I/O of a sql by one `EXPLAIN ANALYZE`. The scheduler returns the records, so each sql
+            is always executed a second time by `EXPLAIN ANALYZE`, whose changes of data are rolled back.
+            If `pull_execution_time` is true too, the execution time is measured from the normal execution.
         :return:
         """
         if pull_execution_time:
@@ -104,6 +187,10 @@ class PilotScheduler:
             self.data_interactor.pull_buffercache()
         if pull_estimated_cost:
             self.data_interactor.pull_estimated_cost()
+        if pull_analyzed_plan:
+            self.data_interactor.pull_analyzed_plan()
+        self._required_anchor_to_handlers.update(self.data_interactor._anchor_to_handlers)
+        self.data_interactor.reset()
         self.table_name_for_store_data = table_name_for_store_data
 
     def register_events(self, events: List[Event]):
@@ -116,19 +203,90 @@ class PilotScheduler:
             events = [events]
         self.events += events
 
-    def _post_process(self, data: PilotTransData):
-        self._store_collected_data_into_table(data)
-        self._deal_execution_end_events()
+    def _acquire_injected_handlers_in_budget(self, sql, fingerprint):
+        """
+        Acquire the injected data of all handlers in background threads, see `PilotConfig.enable_inference_budget`.
+
+        :return: the handlers finished in the budget
+        """
+        deadline = time.time() + self.config.inference_budget
+        futures = [self.inference_executor.submit(self._acquire_injected_handler, handler, sql, fingerprint)
+                   for handler in self.user_tasks]
+        handlers = []
+        for handler, future in zip(self.user_tasks, futures):
+            try:
+                handlers.append(future.result(timeout=max(deadline - time.time(), 0)))
+            except TimeoutError:
+                # the handler is not pushed. If it has started, it keeps running in background (e.g., to fill the
+                # decision cache). Otherwise, it is cancelled, so the stale calls never pile up in the pool.
+                future.cancel()
+                with self._fallback_lock:
+                    self.num_inference_fallbacks += 1
+                PilotMetrics.inc("pilotscope_inference_fallbacks_total",
+                                 help_text="The handlers skipped by missing the inference budget",
+                                 handler=type(handler).__name__)
+        if len(handlers) < len(self.user_tasks):
+            # the sqls are executed without resetting, so the hints set by the last sql on this connection are still
+            # active. They are reset to fall back to the native optimizer, except those set again by this sql.
+            self.data_interactor.db_controller.reset_hints()
+        return handlers
+
+    def _acquire_injected_handler(self, handler: BaseAnchorHandler, sql, fingerprint):
+        """
+        :return: the handler used by this call, whose injected data is acquired for `sql` or reused from the
+            decision cache
+        """
+        if fingerprint is None or not self._is_decision_cacheable(handler):
+            handler = self._get_handler_for_call(handler)
+            handler._update_injected_data(sql)
+            return handler
 
-    def _store_collected_data_into_table(self, data: PilotTransData):
-        pull_anchors = extract_handlers(self.data_interactor._get_all_handlers(), True)
+        # the registered handlers have different class types, see `register_custom_handlers`
+        key = (type(handler), fingerprint)
+        cached_handler = self.decision_cache.get(key)
+        if cached_handler is not None:
+            PilotMetrics.inc("pilotscope_decision_cache_hits_total", help_text="The hits of the decision cache")
+            return copy.copy(cached_handler)
+        handler = self._get_handler_for_call(handler)
+        handler._update_injected_data(sql)
+        self.decision_cache.put(key, copy.copy(handler))
+        return handler
+
+    def _is_decision_cacheable(self, handler):
+        return isinstance(handler, BasePushHandler) and handler.is_decision_reusable and \
+            handler.trigger_level == PushHandlerTriggerLevelEnum.QUERY
+
+    def _get_handler_for_call(self, handler: BaseAnchorHandler):
+        # the injected data of a query-level handler belongs to one sql, so each call uses its own copy.
+        # The workload-level handlers are shared, since they are triggered only once for all calls.
+        if isinstance(handler, BasePushHandler) and handler.trigger_level == PushHandlerTriggerLevelEnum.WORKLOAD:
+            return handler
+        return copy.copy(handler)
+
+    def _post_process(self, data: PilotTransData, anchor_to_handlers):
+        with LatencyTracer.span("scheduler.store_data"):
+            self._store_collected_data_into_table(data, anchor_to_handlers)
+        with LatencyTracer.span("scheduler.events"):
+            self._deal_execution_end_events()
+
+    def _fill_model_versions(self, data: PilotTransData, handlers):
+        # the versions are set on the handlers used by this call, rather than the registered handlers
+        model_versions = {type(handler).__name__: handler.served_model_version for handler in handlers
+                          if isinstance(handler, BasePushHandler) and handler.served_model_version is not None}
+        if len(model_versions) > 0:
+            data.model_versions = model_versions
+
+    def _store_collected_data_into_table(self, data: PilotTransData, anchor_to_handlers):
+        pull_anchors = extract_handlers(anchor_to_handlers.values(), True)
         column_2_value = {}
         for anchor in pull_anchors:
             if isinstance(anchor, BasePullHandler):
                 anchor.prepare_data_for_writing(column_2_value, data)
             else:
                 raise RuntimeError
-        self.data_manager.save_data(self.table_name_for_store_data, column_2_value)
+        if data.model_versions is not None:
+            column_2_value["model_versions"] = json.dumps(data.model_versions)
+        self.data_manager.save_data_async(self.table_name_for_store_data, column_2_value)
 
     def _deal_initial_events(self):
         pretraining_thread = None
@@ -153,7 +311,7 @@ class PilotScheduler:
         for event in self.events:
             if isinstance(event, QueryFinishEvent):
                 event: QueryFinishEvent = event
-                event._update(self.db_controller, self.data_manager)
+                event._update(self.db_controller, self.data_manager, self.event_executor)
 
     def _is_valid_custom_handlers(self, handlers):
         # return false, if there is identical class typy for the elements in handlers
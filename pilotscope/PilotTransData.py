@@ -1,5 +1,6 @@
 import json
 
+from pilotscope.Common.SubqueryId import SubqueryTextRegistry
 from pilotscope.Common.Util import is_number
 
 
@@ -14,6 +15,10 @@ class PilotTransData:
         :param estimated_cost: The estimated cost of the query plan.
         :param buffercache: The buffercache of each table after executing the SQL statement.
         :param subquery_2_card: A sub-plan-query-to-cardinality dict that is generated by the optimizer where building query plan.
+        :param real_node_cards: The estimated and actual rows of each node of the executed plan in pre-order.
+        :param buffer_io: The buffer I/O of the executed plan, e.g., {"Shared Hit Blocks": 10, "Shared Read Blocks": 2}.
+        :param model_versions: The versions of models serving the push handlers of `PilotScheduler` for the SQL
+            statement, e.g., {"BaoHintPushHandler": 3}.
         """
 
         self.sql: str = None
@@ -23,13 +28,16 @@ class PilotTransData:
         self.estimated_cost = None
         self.buffercache = None
         self.subquery_2_card: dict = {}
+        self.real_node_cards: list = None
+        self.buffer_io: dict = None
+        self.model_versions: dict = None
 
     def __str__(self) -> str:
         return "\n".join([str(k) + ": " + str(v) for k, v in self.__dict__.items()])
 
     @classmethod
     def _parse_2_instance(cls, target_json: str, sql):
-        if target_json is str:
+        if isinstance(target_json, (str, bytes)):
             target_json = json.loads(target_json)
         data = PilotTransData()
         data.sql = sql
@@ -43,12 +51,32 @@ class PilotTransData:
 
     @classmethod
     def _fill_subquery_2_card(cls, data, target_json):
-        if "card" not in target_json or "subquery" not in target_json:
+        if "card" not in target_json:
+            return
+        if "subquery_id" in target_json:
+            subquery = cls._get_subquery_by_id(target_json)
+        elif "subquery" in target_json:
+            subquery = target_json["subquery"]
+        else:
             return
 
         cards = target_json["card"]
-        subquery = target_json["subquery"]
         assert len(cards) == len(subquery)
 
         for i in range(0, len(cards)):
             data.subquery_2_card[subquery[i]] = float(cards[i])
+
+    @classmethod
+    def _get_subquery_by_id(cls, target_json):
+        """
+        Get the texts of the subqueries transmitted by the compact subquery protocol, where "subquery_id" is a list of
+        the ids and "subquery_text" is a dict of the id and the text for the subqueries sent for the first time.
+        """
+        SubqueryTextRegistry.register(target_json.get("subquery_text", {}))
+        subquery = []
+        for subquery_id in target_json["subquery_id"]:
+            text = SubqueryTextRegistry.get_subquery(subquery_id)
+            if text is None:
+                raise RuntimeError("the text of subquery {} has not been received".format(subquery_id))
+            subquery.append(text)
+        return subquery
@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+
+from pilotscope.DBInteractor.AsyncPilotDataInteractor import AsyncPilotDataInteractor
+from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
+from pilotscope.PilotConfig import PostgreSQLConfig
+from pilotscope.PilotTransData import PilotTransData
+
+
+class TestAsyncDataInteractor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = PostgreSQLConfig()
+        cls.config.db = "stats_tiny"
+        cls.sql = "select count(*) from posts as p, postlinks as pl, posthistory as ph where p.id = pl.postid and pl.postid = ph.postid and p.creationdate>=1279570117 and ph.creationdate>=1279585800 and p.score < 50;"
+        cls.data_interactor = PilotDataInteractor(cls.config)
+
+    def test_execute(self):
+        async def run():
+            interactor = AsyncPilotDataInteractor(self.config)
+            interactor.pull_subquery_card()
+            interactor.pull_execution_time()
+            interactor.pull_physical_plan()
+            return await interactor.execute(self.sql)
+
+        data: PilotTransData = asyncio.run(run())
+        self.assertTrue(data is not None)
+        self.assertTrue(len(data.subquery_2_card) > 0)
+        self.assertTrue(data.execution_time is not None)
+        self.assertTrue(data.physical_plan is not None)
+
+    def test_execute_concurrently(self):
+        self.data_interactor.pull_subquery_card()
+        expected = self.data_interactor.execute(self.sql).subquery_2_card
+
+        async def run(n):
+            interactor = AsyncPilotDataInteractor(self.config)
+            tasks = []
+            for _ in range(n):
+                interactor.pull_subquery_card()
+                # the operators are captured when `execute` is called
+                tasks.append(interactor.execute(self.sql))
+            return await asyncio.gather(*tasks)
+
+        datas = asyncio.run(run(50))
+        self.assertEqual(len(datas), 50)
+        for data in datas:
+            self.assertEqual(data.subquery_2_card, expected)
+
+    def test_push_hint(self):
+        async def run():
+            interactor = AsyncPilotDataInteractor(self.config)
+            interactor.push_hint({"enable_nestloop": "off"})
+            interactor.pull_record()
+            hint_data = await interactor.execute("show enable_nestloop;")
+            interactor.pull_record()
+            data = await interactor.execute("show enable_nestloop;")
+            return hint_data, data
+
+        hint_data, data = asyncio.run(run())
+        self.assertEqual(hint_data.records.values[0][0], "off")
+        self.assertEqual(data.records.values[0][0], "on")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import json
+import unittest
+
+from pilotscope.Anchor.BaseAnchor.BasePushHandler import CardPushHandler
+from pilotscope.Common.SubqueryId import SubqueryTextRegistry, get_subquery_id
+from pilotscope.PilotConfig import PostgreSQLConfig
+from pilotscope.PilotTransData import PilotTransData
+
+
+def create_subqueries(num_subqueries):
+    return ["select count(*) from badges as b, comments as c, users as u where b.userid = c.userid and "
+            "c.userid = u.id and u.reputation >= {};".format(i) for i in range(num_subqueries)]
+
+
+def create_compact_payload(subqueries, sent_subqueries: set):
+    # the database sends the text of a subquery only for the first time in a session
+    new_subqueries = [subquery for subquery in subqueries if subquery not in sent_subqueries]
+    sent_subqueries.update(new_subqueries)
+    return {"tid": "1", "subquery_id": [get_subquery_id(subquery) for subquery in subqueries],
+            "subquery_text": {get_subquery_id(subquery): subquery for subquery in new_subqueries},
+            "card": ["1.0"] * len(subqueries)}
+
+
+class TestCompactSubquery(unittest.TestCase):
+
+    def tearDown(self):
+        SubqueryTextRegistry.clear()
+
+    def test_pull(self):
+        subqueries = create_subqueries(1000)
+        full_payload = json.dumps({"tid": "1", "subquery": subqueries, "card": ["1.0"] * len(subqueries)})
+        expected = PilotTransData._parse_2_instance(full_payload, "sql").subquery_2_card
+
+        sent_subqueries = set()
+        first_payload = json.dumps(create_compact_payload(subqueries, sent_subqueries))
+        next_payload = json.dumps(create_compact_payload(subqueries, sent_subqueries))
+        self.assertEqual(PilotTransData._parse_2_instance(first_payload, "sql").subquery_2_card, expected)
+        self.assertEqual(PilotTransData._parse_2_instance(next_payload, "sql").subquery_2_card, expected)
+        print("full payload: {} bytes, compact payload: {} bytes".format(len(full_payload), len(next_payload)))
+        self.assertLess(len(next_payload), len(full_payload) / 2)
+
+        with self.assertRaises(RuntimeError):
+            PilotTransData._parse_2_instance({"subquery_id": ["unknown"], "card": ["1.0"]}, "sql")
+
+    def test_push(self):
+        config = PostgreSQLConfig()
+        subquery_2_card = {subquery: 1.0 for subquery in create_subqueries(10)}
+        handler = CardPushHandler(config, subquery_2_card)
+        params = {}
+        handler._add_trans_params(params)
+        self.assertEqual(params["subquery"], list(subquery_2_card.keys()))
+
+        config.enable_compact_subquery()
+        params = {}
+        handler._add_trans_params(params)
+        self.assertNotIn("subquery", params)
+        self.assertEqual(params["subquery_id"], [get_subquery_id(subquery) for subquery in subquery_2_card.keys()])
+        self.assertTrue(params["compact_subquery"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -40,6 +40,39 @@ class TestDataInteractor(unittest.TestCase):
         result: PilotTransData = self.data_interactor.execute(self.sql)
         self.assertFalse(result.physical_plan is None)
 
+    def test_pull_analyzed_plan(self):
+        self.data_interactor.pull_analyzed_plan()
+        self.data_interactor.pull_estimated_cost()
+        result: PilotTransData = self.data_interactor.execute(self.sql)
+        self.assertTrue(result.execution_time > 0)
+        self.assertIn("Actual Rows", result.physical_plan["Plan"])
+        self.assertEqual(result.estimated_cost, result.physical_plan["Plan"]["Total Cost"])
+        # the root node is the count(*)
+        self.assertEqual(result.real_node_cards[0]["Actual Rows"], 1)
+        self.assertIn("Shared Hit Blocks", result.buffer_io)
+
+    def test_pull_analyzed_plan_with_records(self):
+        # the sql is executed twice, and the execution by EXPLAIN ANALYZE is rolled back
+        db_controller = self.data_interactor.db_controller
+        badge_id, user_id = db_controller.execute("select id, userid from badges order by id limit 1", fetch=True)[0]
+        self.data_interactor.pull_analyzed_plan()
+        self.data_interactor.pull_record()
+        self.data_interactor.execute("with d as (update badges set userid = userid + 1 where id = {} returning *) "
+                                     "select * from d".format(badge_id))
+        try:
+            self.assertEqual(db_controller.execute("select userid from badges where id = {}".format(badge_id),
+                                                   fetch=True)[0][0], user_id + 1)
+        finally:
+            db_controller.execute("update badges set userid = {} where id = {}".format(user_id, badge_id))
+
+        self.data_interactor.pull_analyzed_plan()
+        self.data_interactor.pull_record()
+        self.data_interactor.pull_execution_time()
+        result: PilotTransData = self.data_interactor.execute(self.sql)
+        self.assertEqual(len(result.records), 1)
+        self.assertTrue(result.execution_time > 0)
+        self.assertIn("Actual Rows", result.physical_plan["Plan"])
+
     def test_pull_subquery_card(self):
         print("\nTest Pull Subquery")
         self.data_interactor.pull_subquery_card()
@@ -68,6 +101,33 @@ class TestDataInteractor(unittest.TestCase):
         print(data.records)
         self.assertTrue(data.records is not None)
 
+    def test_pull_record_stream(self):
+        print("\nTest Pull Record Stream")
+        sql = "select id, score from posts;"
+        self.data_interactor.pull_record()
+        expected_records = self.data_interactor.execute(sql).records
+
+        self.data_interactor.push_hint({"enable_seqscan": "off"})
+        self.data_interactor.pull_record(stream=True, batch_size=100)
+        data: PilotTransData = self.data_interactor.execute(sql)
+        self.assertEqual(data.records.column_names, ("id", "score"))
+        num_rows = 0
+        for rows in data.records:
+            self.assertLessEqual(len(rows), 100)
+            num_rows += len(rows)
+        self.assertEqual(num_rows, len(expected_records))
+
+        # the connection is reset after the stream is exhausted
+        self.data_interactor.pull_record()
+        self.assertEqual(self.data_interactor.execute("show enable_seqscan;").records.values[0][0], "on")
+
+        # the stream is closed early
+        self.data_interactor.pull_record(stream=True, batch_size=10)
+        with self.data_interactor.execute(sql).records as stream:
+            self.assertEqual(len(next(stream)), 10)
+        self.data_interactor.pull_record()
+        self.assertEqual(len(self.data_interactor.execute(sql).records), len(expected_records))
+
     def test_push_knob(self):
         print("\nTest Push Knob")
         self.data_interactor.push_knob({"max_connections": "101"})
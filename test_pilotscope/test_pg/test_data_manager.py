@@ -1,3 +1,4 @@
+import time
 import unittest
 
 from pandas import DataFrame
@@ -5,6 +6,7 @@ from pandas import DataFrame
 from pilotscope.DBController.PostgreSQLController import PostgreSQLController
 from pilotscope.DataManager.DataManager import DataManager
 from pilotscope.DataManager.TableVisitedTracker import TableVisitedTracker
+from pilotscope.DataManager.WriteBehindBuffer import WriteBehindBuffer
 from pilotscope.Factory.DBControllerFectory import DBControllerFactory
 from pilotscope.PilotConfig import PostgreSQLConfig
 from pilotscope.PilotSysConfig import PilotSysConfig
@@ -45,6 +47,48 @@ class TestDataManager(unittest.TestCase):
         self.data_manager.save_data_batch(self.test_table_name, [data2, data3])
         self.assertTrue(self.db_controller.get_table_row_count(self.test_table_name) == 3)
 
+    def test_save_data_batch_benchmark(self):
+        num_rows = 2000
+        data = [{"name": "name{}".format(i), "age": i, "plan": {"Node Type": "Seq Scan"}} for i in range(num_rows)]
+
+        self.test_drop_table()
+        start_time = time.time()
+        for column_2_value in data:
+            self.data_manager.save_data(self.test_table_name, column_2_value)
+        row_by_row_speed = num_rows / (time.time() - start_time)
+        row_by_row_records = self.data_manager.read_all(self.test_table_name)
+
+        self.test_drop_table()
+        start_time = time.time()
+        self.data_manager.save_data_batch(self.test_table_name, data)
+        batch_speed = num_rows / (time.time() - start_time)
+        # the speeds depend on the machine, so they are only reported
+        print("save_data: {:.0f} rows/sec, save_data_batch: {:.0f} rows/sec".format(row_by_row_speed, batch_speed))
+
+        records = self.data_manager.read_all(self.test_table_name)
+        self.assertEqual(len(records), num_rows)
+        self.assertEqual(list(records["age"]), list(range(num_rows)))
+        self.assertEqual(list(records["name"]), ["name{}".format(i) for i in range(num_rows)])
+        self.assertEqual(list(records.columns), list(row_by_row_records.columns))
+        self.assertEqual(records.astype(str).values.tolist(), row_by_row_records.astype(str).values.tolist())
+
+    def test_write_behind(self):
+        self.test_drop_table()
+        config = PostgreSQLConfig()
+        config.enable_write_behind(batch_size=100, flush_interval=0.1)
+        data_manager = DataManager(config)
+        num_rows = 1000
+        for i in range(num_rows):
+            data_manager.save_data_async(self.test_table_name, {"name": "name{}".format(i), "age": i})
+
+        # the buffered rows are written before reading
+        data: DataFrame = data_manager.read_update(self.test_table_name)
+        self.assertEqual(list(data["age"]), list(range(num_rows)))
+
+        data_manager.save_data_async(self.test_table_name, {"name": "name", "age": num_rows})
+        data_manager.close()
+        self.assertEqual(self.db_controller.get_table_row_count(self.test_table_name), num_rows + 1)
+
     def test_read_all(self):
         data_size = self.init_table()
         data: DataFrame = self.data_manager.read_all(self.test_table_name)
@@ -75,5 +119,40 @@ class TestDataManager(unittest.TestCase):
         return len(data)
 
 
+class TestWriteBehindBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.table_2_rows = {}
+        self.buffer = WriteBehindBuffer(self._save_data_batch, batch_size=10, flush_interval=0.1, max_queue_size=5)
+
+    def tearDown(self):
+        self.buffer.close()
+
+    def _save_data_batch(self, table_name, rows):
+        if table_name == "error_table":
+            raise ValueError("fail to write")
+        self.table_2_rows.setdefault(table_name, []).extend(rows)
+
+    def test_write_in_order(self):
+        for i in range(55):
+            self.buffer.put("table_{}".format(i % 2), {"id": i})
+        self.buffer.flush()
+        self.assertEqual([row["id"] for row in self.table_2_rows["table_0"]], list(range(0, 55, 2)))
+        self.assertEqual([row["id"] for row in self.table_2_rows["table_1"]], list(range(1, 55, 2)))
+
+    def test_flush_by_interval(self):
+        self.buffer.put("table", {"id": 0})
+        time.sleep(0.5)
+        self.assertEqual(len(self.table_2_rows["table"]), 1)
+
+    def test_error(self):
+        self.buffer.put("error_table", {"id": 0})
+        with self.assertRaises(RuntimeError):
+            self.buffer.flush()
+        self.buffer.put("table", {"id": 1})
+        self.buffer.flush()
+        self.assertEqual(self.buffer.num_written_rows, 1)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
+from pilotscope.PilotConfig import PostgreSQLConfig
+from pilotscope.PilotEnum import ScanJoinMethodEnum
+
+
+class TestExplainMany(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = PostgreSQLConfig()
+        cls.config.db = "stats_tiny"
+        cls.data_interactor = PilotDataInteractor(cls.config)
+        cls.sql = "select count(*) from posts as p, postlinks as pl, posthistory as ph where p.id = pl.postid and pl.postid = ph.postid and p.creationdate>=1279570117 and ph.creationdate>=1279585800 and p.score < 50;"
+
+        cls.data_interactor.pull_subquery_card()
+        subquery_2_card = cls.data_interactor.execute(cls.sql).subquery_2_card
+        cls.push_configs = [
+            {},
+            {"hint": {"enable_hashjoin": "off", "enable_mergejoin": "off"}},
+            {"hint": {"enable_nestloop": "off"}},
+            {"card": {subquery: 1.0 for subquery in subquery_2_card}},
+            {"pg_hint_comment": "/*+ SeqScan(p) */"},
+            {"scan_join_methods": [(ScanJoinMethodEnum.INDEX, ("ph",))], "hint": {"enable_hashjoin": "off"}},
+        ]
+
+    def _explain_one_by_one(self, push_config):
+        if "hint" in push_config:
+            self.data_interactor.push_hint(push_config["hint"])
+        if "card" in push_config:
+            self.data_interactor.push_card(push_config["card"])
+        if "pg_hint_comment" in push_config:
+            self.data_interactor.push_pg_hint_comment(push_config["pg_hint_comment"])
+        if "scan_join_methods" in push_config:
+            for method, args in push_config["scan_join_methods"]:
+                self.data_interactor.push_scan_join_method(method, *args)
+        self.data_interactor.pull_physical_plan()
+        return self.data_interactor.execute(self.sql).physical_plan
+
+    def test_explain_many(self):
+        plans = self.data_interactor.explain_many(self.sql, self.push_configs)
+        self.assertEqual(len(plans), len(self.push_configs))
+        for push_config, plan in zip(self.push_configs, plans):
+            expected_plan = self._explain_one_by_one(push_config)
+            self.assertEqual(plan["Plan"]["Total Cost"], expected_plan["Plan"]["Total Cost"])
+
+    def test_hints_are_not_leaked(self):
+        self.data_interactor.explain_many(self.sql, self.push_configs)
+        self.data_interactor.pull_record()
+        data = self.data_interactor.execute("show enable_hashjoin;", is_reset=False)
+        self.assertEqual(data.records.values[0][0], "on")
+
+        # the registered operators are not affected
+        self.data_interactor.push_hint({"enable_nestloop": "off"})
+        self.data_interactor.explain_many(self.sql, self.push_configs)
+        data = self.data_interactor.execute("show enable_nestloop;")
+        self.assertEqual(data.records.values[0][0], "off")
+
+    def test_explain_many_with_psycopg3_pipeline(self):
+        try:
+            import psycopg
+        except ImportError:
+            self.skipTest("psycopg 3 is not installed")
+        config = PostgreSQLConfig()
+        config.db = "stats_tiny"
+        config.db_driver = "psycopg"
+        data_interactor = PilotDataInteractor(config)
+        plans = data_interactor.explain_many(self.sql, self.push_configs)
+        expected_plans = self.data_interactor.explain_many(self.sql, self.push_configs)
+        self.assertEqual([plan["Plan"]["Total Cost"] for plan in plans],
+                         [plan["Plan"]["Total Cost"] for plan in expected_plans])
+
+
+if __name__ == '__main__':
+    unittest.main()
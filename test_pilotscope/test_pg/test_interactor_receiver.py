@@ -0,0 +1,175 @@
+import http.client
+import json
+import queue
+import threading
+import time
+import unittest
+
+from pilotscope.DBInteractor.HttpInteractorReceiver import HttpInteractorReceiver
+from pilotscope.DBInteractor.ThreadedHttpInteractorReceiver import ThreadedHttpInteractorReceiver
+from pilotscope.DBInteractor.UnixSocketInteractorReceiver import UnixSocketInteractorReceiver, UnixSocketDataSender
+from pilotscope.PilotConfig import PostgreSQLConfig
+from pilotscope.PilotTransData import PilotTransData
+
+
+def create_payload(tid, num_subqueries=32):
+    subqueries = ["select count(*) from t{};".format(i) for i in range(num_subqueries)]
+    return {"tid": tid, "subquery": subqueries, "card": ["1.0"] * num_subqueries}
+
+
+class FakeDBSender:
+    """
+    Simulate a database connection that sends the pull data to the receiver, the same as the database does
+    after a query is finished. The http connection is reused if the receiver supports keep-alive.
+    """
+
+    def __init__(self, url, port, max_retries=5):
+        self.conn = http.client.HTTPConnection(url, port, timeout=10)
+        self.max_retries = max_retries
+        self.num_errors = 0
+
+    def send(self, tid):
+        body = json.dumps(create_payload(tid))
+        for i in range(self.max_retries + 1):
+            try:
+                self.conn.request("POST", "/", body=body, headers={"Content-Type": "application/json"})
+                response = self.conn.getresponse()
+                response.read()
+                return
+            except (ConnectionError, http.client.HTTPException):
+                # e.g., the connection is refused or reset when the backlog of receiver is full
+                self.num_errors += 1
+                self.conn.close()
+                if i == self.max_retries:
+                    raise
+
+    def close(self):
+        self.conn.close()
+
+
+class FakeDBUnixSocketSender(UnixSocketDataSender):
+
+    def __init__(self, socket_path):
+        super().__init__(socket_path)
+        self.num_errors = 0
+
+    def send(self, tid):
+        super().send(create_payload(tid))
+
+
+def run_receiver_load_test(receiver, num_clients=16, num_requests=200, create_sender=None):
+    """
+    Each client thread waits for its data by `block_for_data_from_db`, while a dedicated fake database sender
+    posts the data. The hand-off latency is the time from the start of sending to the end of receiving.
+
+    :param create_sender: a function creating a fake database sender for the receiver, the http sender by default
+    :return: a dict of receives/sec, the number of failed sends and the latency percentiles in ms
+    """
+    latencies = []
+    send_errors = []
+    latency_lock = threading.Lock()
+
+    def client():
+        tasks = queue.Queue()
+        sender = create_sender() if create_sender is not None else FakeDBSender(receiver.url, receiver.port)
+
+        def send_loop():
+            while True:
+                tid = tasks.get()
+                if tid is None:
+                    break
+                sender.send(tid)
+
+        send_thread = threading.Thread(target=send_loop, daemon=True)
+        send_thread.start()
+
+        tid = str(threading.get_ident())
+        client_latencies = []
+        for _ in range(num_requests):
+            start = time.perf_counter()
+            tasks.put(tid)
+            data = receiver.block_for_data_from_db()
+            client_latencies.append(time.perf_counter() - start)
+            assert data["tid"] == tid
+
+        tasks.put(None)
+        send_thread.join()
+        sender.close()
+        with latency_lock:
+            latencies.extend(client_latencies)
+            send_errors.append(sender.num_errors)
+
+    threads = [threading.Thread(target=client) for _ in range(num_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "receives": len(latencies),
+        "receives_per_sec": len(latencies) / elapsed,
+        "send_errors": sum(send_errors),
+        "p50_ms": latencies[int(len(latencies) * 0.5)] * 1000,
+        "p99_ms": latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1000,
+    }
+
+
+class TestInteractorReceiver(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = PostgreSQLConfig()
+        cls.config.enable_threaded_http_receiver(max_workers=32)
+        cls.num_clients = 16
+        cls.num_requests = 200
+
+    def test_http_receiver(self):
+        receiver = HttpInteractorReceiver(self.config)
+        result = run_receiver_load_test(receiver, self.num_clients, self.num_requests)
+        print("HttpInteractorReceiver: {}".format(result))
+        self.assertEqual(result["receives"], self.num_clients * self.num_requests)
+
+    def test_threaded_http_receiver(self):
+        receiver = ThreadedHttpInteractorReceiver(self.config)
+        result = run_receiver_load_test(receiver, self.num_clients, self.num_requests)
+        print("ThreadedHttpInteractorReceiver: {}".format(result))
+        self.assertEqual(result["receives"], self.num_clients * self.num_requests)
+        self.assertEqual(result["send_errors"], 0)
+
+    def test_unix_socket_receiver(self):
+        receiver = self._get_unix_socket_receiver()
+        result = run_receiver_load_test(receiver, self.num_clients, self.num_requests,
+                                        create_sender=lambda: FakeDBUnixSocketSender(receiver.socket_path))
+        print("UnixSocketInteractorReceiver: {}".format(result))
+        self.assertEqual(result["receives"], self.num_clients * self.num_requests)
+
+    def test_unix_socket_receiver_shared_memory(self):
+        receiver = self._get_unix_socket_receiver()
+        tid = str(threading.get_ident())
+        # about 4MB, which is sent by shared memory
+        data = create_payload(tid, num_subqueries=100000)
+
+        sender = UnixSocketDataSender(receiver.socket_path, shared_memory_threshold=1024 * 1024)
+        try:
+            sender.send(data)
+            trans_data = PilotTransData._parse_2_instance(receiver.block_for_data_from_db(), "sql")
+            # the buffer is reused by the next payload
+            sender.send(create_payload(tid, num_subqueries=50000))
+            next_trans_data = PilotTransData._parse_2_instance(receiver.block_for_data_from_db(), "sql")
+        finally:
+            sender.close()
+
+        self.assertEqual(len(trans_data.subquery_2_card), 100000)
+        self.assertEqual(len(next_trans_data.subquery_2_card), 50000)
+
+    def _get_unix_socket_receiver(self):
+        config = PostgreSQLConfig()
+        config.enable_unix_socket_receiver()
+        return UnixSocketInteractorReceiver(config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import random
+import threading
+import unittest
+
+from pilotscope.Common.LatencyTracer import LatencyHistogram, LatencyTracer
+
+
+class TestLatencyTracer(unittest.TestCase):
+
+    def tearDown(self):
+        LatencyTracer.disable()
+        LatencyTracer.clear()
+
+    def test_histogram_percentile(self):
+        histogram = LatencyHistogram()
+        values = [random.randint(1, 10 ** 9) for _ in range(10000)]
+        for value in values:
+            histogram.record(value)
+        values.sort()
+        for percentile in [50, 90, 99, 99.9]:
+            expected = values[int(len(values) * percentile / 100 + 0.5) - 1]
+            self.assertAlmostEqual(histogram.get_percentile(percentile), expected, delta=expected / 64)
+        self.assertEqual(histogram.get_percentile(100), values[-1])
+        self.assertEqual(histogram.min, values[0])
+
+    def test_span_in_threads(self):
+        with LatencyTracer.span("disabled"):
+            pass
+        self.assertNotIn("disabled", LatencyTracer.get_histograms())
+
+        LatencyTracer.enable()
+
+        def run():
+            for _ in range(100):
+                with LatencyTracer.span("stage"):
+                    pass
+
+        threads = [threading.Thread(target=run) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(LatencyTracer.get_histograms()["stage"].count, 400)
+        report = LatencyTracer.report(percentiles=(50, 99))
+        self.assertEqual(list(report.columns), ["name", "count", "mean", "max", "p50", "p99"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import threading
+import time
+import unittest
+import urllib.request
+
+from pilotscope.Common.LatencyTracer import LatencyTracer
+from pilotscope.Common.Metrics import PilotMetrics
+from pilotscope.DataManager.WriteBehindBuffer import WriteBehindBuffer
+
+
+class TestPilotMetrics(unittest.TestCase):
+
+    def tearDown(self):
+        PilotMetrics.disable()
+        PilotMetrics.clear()
+        LatencyTracer.disable()
+        LatencyTracer.clear()
+
+    def test_export(self):
+        PilotMetrics.inc("test_disabled_total")
+        self.assertEqual(PilotMetrics.get_value("test_disabled_total"), 0)
+
+        PilotMetrics.enable()
+        PilotMetrics.inc("test_calls_total", help_text="The calls", anchor="HINT_PUSH_ANCHOR")
+        PilotMetrics.inc("test_calls_total", 2, anchor="HINT_PUSH_ANCHOR")
+        PilotMetrics.register_collector("test_queue_size", lambda: 3)
+        with LatencyTracer.span("test.stage"):
+            pass
+
+        text = PilotMetrics.export()
+        self.assertIn("# HELP test_calls_total The calls\n# TYPE test_calls_total counter\n"
+                      'test_calls_total{anchor="HINT_PUSH_ANCHOR"} 3\n', text)
+        self.assertIn("# TYPE test_queue_size gauge\ntest_queue_size 3\n", text)
+        self.assertIn('pilotscope_latency_seconds_count{stage="test_stage"} 1', text)
+
+    def test_write_behind_queue_size(self):
+        PilotMetrics.enable(trace_latency=False)
+        release = threading.Event()
+        buffers = [WriteBehindBuffer(lambda table_name, rows: release.wait(), batch_size=1) for _ in range(2)]
+        try:
+            for buffer in buffers:
+                for i in range(3):
+                    buffer.put("test_table", {"id": i})
+            # each background thread is blocked by writing the first row
+            deadline = time.time() + 10
+            while any(buffer.get_queue_size() != 2 for buffer in buffers) and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertIn("pilotscope_write_behind_queue_size 4\n", PilotMetrics.export())
+        finally:
+            release.set()
+            buffers[0].close()
+
+        # the closed buffer is not reported any more
+        self.assertNotIn(buffers[0], WriteBehindBuffer._open_buffers)
+        buffers[1].flush()
+        self.assertIn("pilotscope_write_behind_queue_size 0\n", PilotMetrics.export())
+        buffers[1].close()
+
+    def test_http_server(self):
+        PilotMetrics.enable(trace_latency=False)
+        PilotMetrics.inc("test_requests_total")
+        server = PilotMetrics.start_http_server("localhost", 0)
+        try:
+            url = "http://localhost:{}/metrics".format(server.server_address[1])
+            with urllib.request.urlopen(url, timeout=10) as response:
+                self.assertIn("test_requests_total 1", response.read().decode("utf-8"))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
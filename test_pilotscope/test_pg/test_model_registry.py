@@ -0,0 +1,71 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from pilotscope.PilotModel import PilotModel
+from pilotscope.PilotModelRegistry import PilotModelRegistry
+
+
+class PicklePilotModel(PilotModel):
+
+    def __init__(self, model_name, model_save_dir):
+        super().__init__(model_name)
+        self.model_path = os.path.join(model_save_dir, model_name)
+
+    def save_model(self):
+        with open(self.model_path, "wb") as f:
+            pickle.dump(self.model, f)
+
+    def load_model(self):
+        with open(self.model_path, "rb") as f:
+            self.model = pickle.load(f)
+
+
+class TestPilotModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry_dir = tempfile.mkdtemp()
+        self.pilot_model = PicklePilotModel("test_model", self.registry_dir)
+        self.registry = PilotModelRegistry(self.pilot_model, self.registry_dir, max_versions=3)
+
+    def tearDown(self):
+        shutil.rmtree(self.registry_dir, ignore_errors=True)
+
+    def test_publish_and_rollback(self):
+        for i in range(5):
+            self.assertEqual(self.registry.publish({"weight": i}), i + 1)
+        self.assertEqual(self.pilot_model.get_model_and_version(), ({"weight": 4}, 5))
+        self.assertEqual(self.registry.get_versions(), [3, 4, 5])
+
+        self.assertEqual(self.registry.rollback(), 4)
+        self.assertEqual(self.pilot_model.get_model_and_version(), ({"weight": 3}, 4))
+
+        # the version being served is kept
+        self.registry.publish({"weight": 5})
+        self.assertEqual(self.registry.get_versions(), [4, 5, 6])
+
+    def test_load_async(self):
+        self.registry.publish({"weight": 1})
+        self.registry.publish({"weight": 2})
+
+        # a new registry of the same directory, e.g., after restarting
+        pilot_model = PicklePilotModel("test_model", self.registry_dir)
+        registry = PilotModelRegistry(pilot_model, self.registry_dir)
+        self.assertEqual(registry.load_async().join(), 2)
+        self.assertEqual(pilot_model.get_model_and_version(), ({"weight": 2}, 2))
+        registry.load(1)
+        self.assertEqual(pilot_model.model, {"weight": 1})
+
+    def test_update_model(self):
+        self.pilot_model._update_model({"weight": 1})
+        self.assertEqual(self.pilot_model.model_version, 1)
+
+        # the model assigned directly is not versioned
+        self.pilot_model.model = {"weight": 2}
+        self.assertIsNone(self.pilot_model.model_version)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
 from algorithm_examples.ExampleConfig import example_pg_bin, example_pgdata
 from pilotscope.Common.Index import Index
@@ -57,6 +58,26 @@ class TestPostgreSQLDBController(unittest.TestCase):
         print(res)
         self.assertTrue(res == ['id', 'userid', 'date'])
 
+    def test_metadata_cache(self):
+        table = "new_table"
+        self.db_controller.create_table_if_absences(table, {"col_1": 1})
+        sqla_table = self.db_controller._get_sqla_table(table)
+        self.assertIs(self.db_controller._get_sqla_table(table), sqla_table)
+        self.assertIn(table, self.db_controller.get_all_table_names())
+
+        # the schema changed by `execute` directly is visible after invalidating
+        self.db_controller.execute("alter table {} add column col_2 integer".format(table))
+        self.assertEqual(self.db_controller.get_table_columns(table), ["col_1"])
+        self.db_controller.invalidate_metadata_cache(table)
+        self.assertEqual(self.db_controller.get_table_columns(table), ["col_1", "col_2"])
+
+        # the DDL issued by db controller invalidates the cache
+        self.db_controller.drop_table_if_exist(table)
+        self.assertNotIn(table, self.db_controller.get_all_table_names())
+        self.db_controller.create_table_if_absences(table, {"col_3": 1})
+        self.assertEqual(self.db_controller.get_table_columns(table), ["col_3"])
+        self.db_controller.drop_table_if_exist(table)
+
     def test_explain_physical_plan(self):
         plan = self.db_controller.explain_physical_plan(self.sql)
         print(plan)
@@ -135,6 +156,43 @@ class TestPostgreSQLDBController(unittest.TestCase):
         self.assertTrue(size > 0)
         self.db_controller.drop_index(index)
 
+    def test_bulk_simulated_indexes(self):
+        config = PostgreSQLConfig()
+        config.db = self.config.db
+        db_controller = PostgreSQLController(config, enable_simulate_index=True)
+        indexes = [Index(columns=["col_1"], table=self.new_table, index_name="test_bulk_index_1"),
+                   Index(columns=["col_1", "col_2"], table=self.new_table, index_name="test_bulk_index_2")]
+
+        oids = db_controller.simulate_index_visitor.create_indexes(indexes)
+        self.assertEqual(oids, [index.hypopg_oid for index in indexes])
+        self.assertEqual(db_controller.get_index_number(self.new_table), 2)
+
+        sizes = db_controller.get_indexes_byte(indexes)
+        self.assertEqual(len(sizes), 2)
+        self.assertTrue(all(size > 0 for size in sizes))
+
+        db_controller.drop_indexes(indexes)
+        self.assertEqual(db_controller.get_index_number(self.new_table), 0)
+
+    def test_simulated_indexes_per_connection(self):
+        config = PostgreSQLConfig()
+        config.db = self.config.db
+        db_controller = PostgreSQLController(config, enable_simulate_index=True)
+        visitor = db_controller.simulate_index_visitor
+        db_controller.create_indexes([Index(columns=["col_1"], table=self.new_table, index_name="test_conn_index")])
+        self.assertEqual(len(visitor._index_name_2_oid), 2)
+
+        # a new connection has neither the hypothetical indexes nor their oids
+        db_controller._reset()
+        self.assertEqual(db_controller.get_index_number(self.new_table), 0)
+        self.assertEqual(len(visitor._index_name_2_oid), 0)
+
+        # the real indexes are hidden on the connection of each thread
+        sql = "SELECT COUNT(*) FROM hypopg_hidden_indexes()"
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            num_hidden = pool.submit(lambda: db_controller.execute(sql, fetch=True)[0][0]).result()
+        self.assertEqual(num_hidden, len(visitor.real_indexes))
+
     def test_get_table_index_byte(self):
         size = self.db_controller.get_table_indexes_byte(self.table)
         self.assertTrue(size > 0)
@@ -0,0 +1,107 @@
+import time
+import unittest
+
+from pilotscope.Common.Index import Index
+from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
+from pilotscope.DBInteractor.PlanCache import PlanCache
+from pilotscope.PilotConfig import PostgreSQLConfig
+
+
+class TestPlanCache(unittest.TestCase):
+
+    def test_create_key(self):
+        params = {"CARD_PUSH_ANCHOR": {"subquery": ["q1"], "card": [10]}}
+        key = PlanCache.create_key("select *  from t\n where a = 'x  y';", params, None, {"enable_nestloop": "off"})
+        same_key = PlanCache.create_key("select * from t\n where a = 'x  y'", params, None, {"enable_nestloop": "off"})
+        self.assertEqual(key, same_key)
+
+        # the whitespaces in literals are meaningful
+        self.assertNotEqual(key, PlanCache.create_key("select * from t\n where a = 'x y'", params, None,
+                                                      {"enable_nestloop": "off"}))
+        self.assertNotEqual(key, PlanCache.create_key("select * from t\n where a = 'x  y'", params, None,
+                                                      {"enable_nestloop": "on"}))
+        self.assertNotEqual(key, PlanCache.create_key("select * from t\n where a = 'x  y'", params,
+                                                      "/*+ SeqScan(t) */", {"enable_nestloop": "off"}))
+
+    def test_lru_and_ttl(self):
+        cache = PlanCache(capacity=2, ttl=0.2)
+        cache.put("a", {"Plan": {"Total Cost": 1}})
+        cache.put("b", {"Plan": {"Total Cost": 2}})
+        self.assertEqual(cache.get("a")["Plan"]["Total Cost"], 1)
+        cache.put("c", {"Plan": {"Total Cost": 3}})
+
+        # "b" is the least recently used one
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.evictions, 1)
+
+        time.sleep(0.3)
+        self.assertIsNone(cache.get("a"))
+        stats = cache.get_stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 2)
+
+        # the cached plan is not affected by the modification of returned plan
+        cache.put("d", {"Plan": {"Total Cost": 4}})
+        cache.get("d")["Plan"]["Total Cost"] = 0
+        self.assertEqual(cache.get("d")["Plan"]["Total Cost"], 4)
+
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+
+class TestPlanCacheInteractor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = PostgreSQLConfig()
+        cls.config.db = "stats_tiny"
+        cls.config.enable_plan_cache()
+        cls.sql = "select count(*) from posts as p, postlinks as pl, posthistory as ph where p.id = pl.postid and pl.postid = ph.postid and p.creationdate>=1279570117 and ph.creationdate>=1279585800 and p.score < 50;"
+        cls.data_interactor = PilotDataInteractor(cls.config)
+
+    def setUp(self):
+        self.data_interactor.plan_cache.invalidate()
+
+    def test_hit_with_same_push(self):
+        cache = self.data_interactor.plan_cache
+        hits = cache.hits
+        plans = []
+        for _ in range(3):
+            self.data_interactor.push_hint({"enable_hashjoin": "off"})
+            self.data_interactor.pull_physical_plan()
+            self.data_interactor.pull_estimated_cost()
+            data = self.data_interactor.execute(self.sql)
+            plans.append(data.physical_plan)
+            self.assertEqual(data.estimated_cost, data.physical_plan["Plan"]["Total Cost"])
+        self.assertEqual(cache.hits - hits, 2)
+        self.assertEqual(plans[0], plans[2])
+
+        # a different hint is explained again
+        self.data_interactor.push_hint({"enable_hashjoin": "on"})
+        self.data_interactor.pull_estimated_cost()
+        self.data_interactor.execute(self.sql)
+        self.assertEqual(cache.hits - hits, 2)
+
+    def test_invalidate_by_index(self):
+        cache = self.data_interactor.plan_cache
+        self.data_interactor.pull_estimated_cost()
+        self.data_interactor.execute(self.sql)
+        self.assertEqual(len(cache), 1)
+        hits = cache.hits
+
+        index = Index(["date"], "badges", index_name="test_plan_cache_index")
+        self.data_interactor.push_index([index], drop_other=False)
+        self.data_interactor.pull_estimated_cost()
+        self.data_interactor.execute(self.sql)
+        self.assertEqual(cache.hits, hits)
+        self.assertEqual(len(cache), 1)
+
+        # the index DDL of db controller invalidates the cached plans
+        invalidations = cache.invalidations
+        self.data_interactor.db_controller.drop_index(index)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.invalidations - invalidations, 1)
+
+if __name__ == '__main__':
+    unittest.main()
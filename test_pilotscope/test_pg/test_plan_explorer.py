@@ -0,0 +1,59 @@
+import unittest
+
+from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
+from pilotscope.DBInteractor.PlanExplorer import PlanExplorer
+from pilotscope.PilotConfig import PostgreSQLConfig
+
+
+class TestPlanExplorer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = PostgreSQLConfig()
+        cls.config.db = "stats_tiny"
+        cls.plan_explorer = PlanExplorer(cls.config, parallel_num=3)
+        cls.sql = "select count(*) from posts as p, postlinks as pl, posthistory as ph where p.id = pl.postid and pl.postid = ph.postid and p.creationdate>=1279570117 and ph.creationdate>=1279585800 and p.score < 50;"
+        cls.push_configs = [
+            {},
+            {"hint": {"enable_hashjoin": "off"}},
+            {"hint": {"enable_hashjoin": "off", "enable_mergejoin": "off"}},
+            {"hint": {"enable_nestloop": "off"}},
+            {"hint": {"enable_nestloop": "off", "enable_seqscan": "off"}},
+            {"pg_hint_comment": "/*+ SeqScan(p) */"},
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.plan_explorer.close()
+
+    def test_same_as_sequential(self):
+        config_and_plans = self.plan_explorer.explore(self.sql, self.push_configs, enable_dedup=False)
+        self.assertEqual([push_config for push_config, _ in config_and_plans], self.push_configs)
+
+        data_interactor = PilotDataInteractor(self.config)
+        expected_plans = data_interactor.explain_many(self.sql, self.push_configs)
+        for (_, plan), expected_plan in zip(config_and_plans, expected_plans):
+            self.assertEqual(plan["Plan"]["Total Cost"], expected_plan["Plan"]["Total Cost"])
+
+    def test_dedup(self):
+        config_and_plans = self.plan_explorer.explore(self.sql, self.push_configs + self.push_configs)
+        signatures = [PlanExplorer.get_plan_signature(plan) for _, plan in config_and_plans]
+        self.assertEqual(len(signatures), len(set(signatures)))
+        self.assertLessEqual(len(config_and_plans), len(self.push_configs))
+
+    def test_plan_signature(self):
+        plan = {"Plan": {"Node Type": "Hash Join", "Total Cost": 10, "Plan Rows": 5, "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "a", "Alias": "a", "Total Cost": 4},
+            {"Node Type": "Index Scan", "Relation Name": "b", "Alias": "b", "Index Name": "b_pkey", "Total Cost": 3}
+        ]}}
+        other_cost_plan = {"Plan": {"Node Type": "Hash Join", "Total Cost": 20, "Plan Rows": 50, "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "a", "Alias": "a", "Total Cost": 8},
+            {"Node Type": "Index Scan", "Relation Name": "b", "Alias": "b", "Index Name": "b_pkey", "Total Cost": 6}
+        ]}}
+        swapped_plan = {"Plan": {"Node Type": "Hash Join", "Plans": list(reversed(plan["Plan"]["Plans"]))}}
+        self.assertEqual(PlanExplorer.get_plan_signature(plan), PlanExplorer.get_plan_signature(other_cost_plan))
+        self.assertNotEqual(PlanExplorer.get_plan_signature(plan), PlanExplorer.get_plan_signature(swapped_plan))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,20 @@
+import json
 import os
+import threading
+import time
 import unittest
+from concurrent.futures.thread import ThreadPoolExecutor
 
-from pilotscope.Anchor.BaseAnchor.BasePushHandler import CardPushHandler
+from pilotscope.Anchor.BaseAnchor.BasePushHandler import CardPushHandler, HintPushHandler
 from pilotscope.DBController import BaseDBController
+from pilotscope.Common.EventExecutor import BackgroundEventExecutor
 from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
 from pilotscope.DataManager.DataManager import DataManager
 from pilotscope.Factory.DBControllerFectory import DBControllerFactory
 from pilotscope.Factory.SchedulerFactory import SchedulerFactory
 from pilotscope.PilotConfig import PilotConfig, PostgreSQLConfig
 from pilotscope.PilotEvent import PeriodicModelUpdateEvent, QueryFinishEvent, WorkloadBeforeEvent
+from pilotscope.PilotEnum import EventCoalescePolicyEnum
 from pilotscope.PilotModel import PilotModel
 from pilotscope.PilotScheduler import PilotScheduler
 from pilotscope.PilotTransData import PilotTransData
@@ -123,5 +129,278 @@ class TestScheduler(unittest.TestCase):
         self.data_manager.remove_table_and_tracker(test_scheduler_table)
 
 
+class SqlDependentHintPushHandler(HintPushHandler):
+
+    def acquire_injected_data(self, sql):
+        return {"enable_seqscan": "off" if "seqscan_off" in sql else "on"}
+
+
+class CountingHintPushHandler(HintPushHandler):
+
+    def __init__(self, config) -> None:
+        super().__init__(config)
+        # the list is shared by the copies of the handler used by each call
+        self.acquired_sqls = []
+
+    def acquire_injected_data(self, sql):
+        self.acquired_sqls.append(sql)
+        return {"enable_seqscan": "off"}
+
+
+class VersionedHintPushHandler(HintPushHandler):
+
+    def __init__(self, config, model: PilotModel) -> None:
+        super().__init__(config)
+        self.model = model
+
+    def acquire_injected_data(self, sql):
+        _, self.served_model_version = self.model.get_model_and_version()
+        return {"enable_seqscan": "off"}
+
+
+class SlowHintPushHandler(HintPushHandler):
+
+    def __init__(self, config, delay) -> None:
+        super().__init__(config)
+        self.delay = delay
+        # it is shared by the copies of handler called by scheduler
+        self.acquired_sqls = []
+
+    def acquire_injected_data(self, sql):
+        self.acquired_sqls.append(sql)
+        time.sleep(self.delay)
+        return {"enable_seqscan": "off"}
+
+
+class SqlDependentSlowHintPushHandler(HintPushHandler):
+
+    def __init__(self, config, delay, slow_table) -> None:
+        super().__init__(config)
+        self.delay = delay
+        self.slow_table = slow_table
+
+    def acquire_injected_data(self, sql):
+        if self.slow_table in sql:
+            time.sleep(self.delay)
+        return {"enable_seqscan": "off"}
+
+
+class TestConcurrentScheduler(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = PostgreSQLConfig()
+        cls.config.db = "stats_tiny"
+        cls.data_manager: DataManager = DataManager(cls.config)
+        cls.table = "test_concurrent_scheduler_table"
+
+    def test_execute_in_threads(self):
+        num_threads = 8
+        num_sqls_per_thread = 20
+        scheduler: PilotScheduler = SchedulerFactory.create_scheduler(self.config)
+        scheduler.register_custom_handlers([SqlDependentHintPushHandler(self.config)])
+        scheduler.register_required_data(self.table, pull_physical_plan=True)
+        scheduler.init()
+        self.data_manager.remove_table_and_tracker(self.table)
+
+        db_controller = DBControllerFactory.get_db_controller(self.config)
+        counts = [db_controller.execute("select count(*) from badges where userid < {}".format(i * 100))[0][0]
+                  for i in range(num_sqls_per_thread)]
+
+        def run(thread_idx):
+            alias = "seqscan_off" if thread_idx % 2 == 0 else "seqscan_on"
+            for i in range(num_sqls_per_thread):
+                sql = "select current_setting('enable_seqscan') as {}, count(*) from badges where userid < {}".format(
+                    alias, i * 100)
+                records = scheduler.execute(sql)
+                # the records and the pushed hint belong to this call, rather than to the calls of other threads
+                self.assertEqual(list(records.columns), [alias, "count"])
+                self.assertEqual(records.values[0][0], "off" if alias == "seqscan_off" else "on")
+                self.assertEqual(records.values[0][1], counts[i])
+
+        with ThreadPoolExecutor(max_workers=num_threads) as pool:
+            for future in [pool.submit(run, i) for i in range(num_threads)]:
+                future.result()
+        scheduler.close()
+
+        self.assertEqual(len(self.data_manager.read_all(self.table)), num_threads * num_sqls_per_thread)
+        self.assertEqual(len(scheduler.data_interactor._anchor_to_handlers), 0)
+        self.data_manager.remove_table_and_tracker(self.table)
+
+    def test_decision_cache(self):
+        config = PostgreSQLConfig()
+        config.db = "stats_tiny"
+        config.enable_decision_cache(capacity=16, ttl=300)
+        scheduler: PilotScheduler = SchedulerFactory.create_scheduler(config)
+        handler = CountingHintPushHandler(config)
+        scheduler.register_custom_handlers([handler])
+        scheduler.register_required_data(self.table)
+        scheduler.init()
+
+        for i in range(10):
+            records = scheduler.execute("select current_setting('enable_seqscan'), count(*) from badges "
+                                        "where userid < {}".format(i * 100))
+            self.assertEqual(records.values[0][0], "off")
+        scheduler.execute("select count(*) from users where id < 10")
+
+        # the queries of the same template reuse the first decision
+        self.assertEqual(len(handler.acquired_sqls), 2)
+        self.assertEqual(scheduler.decision_cache.hits, 9)
+        scheduler.close()
+        self.data_manager.remove_table_and_tracker(self.table)
+
+    def test_model_versions(self):
+        model = ExamplePilotModel("test_model_versions")
+        scheduler: PilotScheduler = SchedulerFactory.create_scheduler(self.config)
+        handler = VersionedHintPushHandler(self.config, model)
+        scheduler.register_custom_handlers([handler])
+        scheduler.register_required_data(self.table)
+        scheduler.init()
+        self.data_manager.remove_table_and_tracker(self.table)
+
+        for version in [1, 2]:
+            model._publish(object(), version)
+            scheduler.execute("select count(*) from badges")
+        scheduler.close()
+
+        # the version serving each query is saved with its data, rather than on the registered handler
+        self.assertIsNone(handler.served_model_version)
+        records = self.data_manager.read_all(self.table)
+        self.assertEqual([json.loads(value) for value in records["model_versions"]],
+                         [{"VersionedHintPushHandler": 1}, {"VersionedHintPushHandler": 2}])
+        self.data_manager.remove_table_and_tracker(self.table)
+
+    def test_inference_budget(self):
+        config = PostgreSQLConfig()
+        config.db = "stats_tiny"
+        config.enable_inference_budget(0.5)
+        config.enable_decision_cache()
+        scheduler: PilotScheduler = SchedulerFactory.create_scheduler(config)
+        handler = SlowHintPushHandler(config, 1)
+        scheduler.register_custom_handlers([handler])
+        scheduler.register_required_data(self.table)
+        scheduler.init()
+
+        # the slow handler is skipped, so the query runs with the default settings
+        sql = "select current_setting('enable_seqscan') from badges limit 1"
+        self.assertEqual(scheduler.execute(sql).values[0][0], "on")
+        self.assertEqual(scheduler.num_inference_fallbacks, 1)
+
+        # the decision finished in background is reused by the next query
+        time.sleep(1)
+        self.assertEqual(scheduler.execute(sql).values[0][0], "off")
+        self.assertEqual(scheduler.num_inference_fallbacks, 1)
+        scheduler.close()
+        self.data_manager.remove_table_and_tracker(self.table)
+
+    def test_inference_budget_cancel_pending(self):
+        config = PostgreSQLConfig()
+        config.db = "stats_tiny"
+        config.enable_inference_budget(0.2, max_workers=1)
+        scheduler: PilotScheduler = SchedulerFactory.create_scheduler(config)
+        handler = SlowHintPushHandler(config, 1)
+        scheduler.register_custom_handlers([handler])
+        scheduler.register_required_data(self.table)
+        scheduler.init()
+
+        # the only worker is busy with the first call, so the calls of the next queries are cancelled before running
+        num_sqls = 5
+        for i in range(num_sqls):
+            sql = "select current_setting('enable_seqscan') from badges where id > {} limit 1".format(i)
+            self.assertEqual(scheduler.execute(sql).values[0][0], "on")
+        time.sleep(1.5)
+        self.assertEqual(scheduler.num_inference_fallbacks, num_sqls)
+        self.assertLess(len(handler.acquired_sqls), num_sqls)
+        scheduler.close()
+        self.data_manager.remove_table_and_tracker(self.table)
+
+    def test_inference_budget_after_hinted_sql(self):
+        config = PostgreSQLConfig()
+        config.db = "stats_tiny"
+        config.enable_inference_budget(0.5)
+        scheduler: PilotScheduler = SchedulerFactory.create_scheduler(config)
+        scheduler.register_custom_handlers([SqlDependentSlowHintPushHandler(config, 1, "users")])
+        scheduler.register_required_data(self.table)
+        scheduler.init()
+
+        fast_sql = "select current_setting('enable_seqscan') from badges limit 1"
+        self.assertEqual(scheduler.execute(fast_sql).values[0][0], "off")
+
+        # the hint set by the last sql on the connection is not kept by the fallback
+        slow_sql = "select current_setting('enable_seqscan') from users limit 1"
+        self.assertEqual(scheduler.execute(slow_sql).values[0][0], "on")
+        self.assertEqual(scheduler.num_inference_fallbacks, 1)
+        scheduler.close()
+        self.data_manager.remove_table_and_tracker(self.table)
+
+    def test_execute_many(self):
+        scheduler: PilotScheduler = SchedulerFactory.create_scheduler(self.config)
+        scheduler.register_required_data(self.table, pull_execution_time=True)
+        scheduler.init()
+        self.data_manager.remove_table_and_tracker(self.table)
+
+        sqls = ["select count(*) from badges where userid < {}".format(i * 100) for i in range(20)]
+        expected = [scheduler.execute(sql).values[0][0] for sql in sqls]
+        results = scheduler.execute_many(sqls, concurrency=4)
+        scheduler.close()
+
+        # the results keep the order of sqls
+        self.assertEqual([records.values[0][0] for records in results], expected)
+        self.assertEqual(len(self.data_manager.read_all(self.table)), len(sqls) * 2)
+        self.data_manager.remove_table_and_tracker(self.table)
+
+
+class SlowModelUpdateEvent(PeriodicModelUpdateEvent):
+    def __init__(self, config, pilot_model):
+        super().__init__(config, 1, pilot_model)
+        self.started = threading.Event()
+        self.finish = threading.Event()
+        self.num_updates = 0
+
+    def custom_model_update(self, pilot_model: PilotModel, db_controller: BaseDBController,
+                            data_manager: DataManager):
+        self.started.set()
+        self.finish.wait()
+        self.num_updates += 1
+        pilot_model.model.append(self.num_updates)
+        return pilot_model.model
+
+
+class TestBackgroundEventExecutor(unittest.TestCase):
+
+    def _trigger(self, coalesce_policy, num_triggers):
+        executor = BackgroundEventExecutor(coalesce_policy)
+        model = ExamplePilotModel("test_model")
+        model.model = []
+        event = SlowModelUpdateEvent(PostgreSQLConfig(), model)
+
+        event._update(None, None, executor)
+        event.started.wait()
+        for _ in range(num_triggers - 1):
+            event._update(None, None, executor)
+
+        # the model is updated on a copy, and it is swapped in when the updating is finished
+        self.assertEqual(model.model, [])
+        event.finish.set()
+        self.assertTrue(executor.wait(10))
+        executor.shutdown()
+        return event, model
+
+    def test_drop(self):
+        event, model = self._trigger(EventCoalescePolicyEnum.DROP, 5)
+        self.assertEqual(event.num_updates, 1)
+        self.assertEqual(model.model, [1])
+
+    def test_merge(self):
+        event, model = self._trigger(EventCoalescePolicyEnum.MERGE, 5)
+        self.assertEqual(event.num_updates, 2)
+        self.assertEqual(model.model, [1, 2])
+
+    def test_queue(self):
+        event, model = self._trigger(EventCoalescePolicyEnum.QUEUE, 5)
+        self.assertEqual(event.num_updates, 5)
+        self.assertEqual(model.model, [1, 2, 3, 4, 5])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+
+from pilotscope.DBInteractor.PilotDataInteractor import PilotDataInteractor
+from pilotscope.PilotConfig import PostgreSQLConfig
+
+
+class TestSessionReset(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = PostgreSQLConfig()
+        cls.config.db = "stats_tiny"
+        cls.config.enable_session_reset()
+        cls.data_interactor = PilotDataInteractor(cls.config)
+
+    def _get_backend_pid(self):
+        self.data_interactor.pull_record()
+        return self.data_interactor.execute("select pg_backend_pid();").records.values[0][0]
+
+    def test_reuse_connection(self):
+        pid = self._get_backend_pid()
+        for _ in range(3):
+            self.assertEqual(self._get_backend_pid(), pid)
+
+    def test_reset_hint(self):
+        pid = self._get_backend_pid()
+
+        self.data_interactor.push_hint({"enable_nestloop": "off", "work_mem": "'64MB'"})
+        self.data_interactor.pull_record()
+        data = self.data_interactor.execute("show enable_nestloop;")
+        self.assertEqual(data.records.values[0][0], "off")
+
+        # the hints are reset without reconnecting
+        self.data_interactor.pull_record()
+        data = self.data_interactor.execute("show enable_nestloop;")
+        self.assertEqual(data.records.values[0][0], "on")
+        self.data_interactor.pull_record()
+        data = self.data_interactor.execute("show work_mem;")
+        self.assertNotEqual(data.records.values[0][0], "64MB")
+        self.assertEqual(self._get_backend_pid(), pid)
+
+    def test_statement_timeout_is_kept(self):
+        # the statement timeout is set as an option of connection, which should not be affected by resetting
+        self.data_interactor.push_hint({"enable_hashjoin": "off"})
+        self.data_interactor.pull_record()
+        self.data_interactor.execute("select 1;")
+        self.data_interactor.pull_record()
+        data = self.data_interactor.execute("show statement_timeout;")
+        self.assertEqual(data.records.values[0][0], "{}s".format(self.config.sql_execution_timeout))
+
+    def test_skip_redundant_hints(self):
+        hints = {"enable_hashjoin": "on", "enable_mergejoin": "off", "enable_nestloop": "off",
+                 "enable_indexscan": "on", "enable_seqscan": "on", "enable_indexonlyscan": "off"}
+        stats = self.data_interactor.db_controller.hint_stats
+
+        self.data_interactor.push_hint(hints)
+        self.data_interactor.pull_record()
+        self.data_interactor.execute("select 1;")
+
+        # the same hints of next query are neither reset nor set
+        sets_issued, sets_avoided = stats["sets_issued"], stats["sets_avoided"]
+        self.data_interactor.push_hint(hints)
+        self.data_interactor.pull_record()
+        data = self.data_interactor.execute("show enable_mergejoin;")
+        self.assertEqual(data.records.values[0][0], "off")
+        self.assertEqual(stats["sets_issued"], sets_issued)
+        self.assertEqual(stats["sets_avoided"], sets_avoided + len(hints))
+
+        # only the changed hint is set, and the missing ones are reset before the next query
+        resets_issued = stats["resets_issued"]
+        self.data_interactor.push_hint({"enable_mergejoin": "on"})
+        self.data_interactor.pull_record()
+        data = self.data_interactor.execute("show enable_nestloop;")
+        self.assertEqual(data.records.values[0][0], "on")
+        self.assertEqual(stats["sets_issued"], sets_issued + 1)
+        self.assertEqual(stats["resets_issued"], resets_issued + len(hints) - 1)
+        self.data_interactor.pull_record()
+        data = self.data_interactor.execute("show enable_mergejoin;")
+        self.assertEqual(data.records.values[0][0], "on")
+
+    def test_failed_hints_keep_session(self):
+        db_controller = self.data_interactor.db_controller
+        self.data_interactor.push_hint({"enable_nestloop": "off"})
+        self.data_interactor.pull_record()
+        self.data_interactor.execute("select 1;")
+
+        hint_2_value = dict(db_controller._get_session_hints())
+        pending_reset_hints = set(db_controller._get_pending_reset_hints())
+        with self.assertRaises(Exception):
+            db_controller.set_hints({"enable_hashjoin": "off", "work_mem": "'not_a_size'"})
+        # the batch is rolled back, so the session state tracked by PilotScope is unchanged
+        self.assertEqual(db_controller._get_session_hints(), hint_2_value)
+        self.assertEqual(db_controller._get_pending_reset_hints(), pending_reset_hints)
+
+        self.data_interactor.pull_record()
+        data = self.data_interactor.execute("show enable_hashjoin;")
+        self.assertEqual(data.records.values[0][0], "on")
+        self.data_interactor.pull_record()
+        data = self.data_interactor.execute("show enable_nestloop;")
+        self.assertEqual(data.records.values[0][0], "on")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import time
+import unittest
+
+from pilotscope.Common.DecisionCache import DecisionCache
+from pilotscope.Common.SqlFingerprint import get_sql_fingerprint, get_sql_fingerprint_digest
+
+
+class TestSqlFingerprint(unittest.TestCase):
+
+    def test_fingerprint(self):
+        sql = "SELECT COUNT(*) FROM badges as b, users as u WHERE b.userid=u.id AND u.reputation >= 10 " \
+              "AND b.date IN ('2014-01-01', '2014-02-01');"
+        same_template_sql = "select count(*)\n from badges as b, users as u -- comment\n where b.userid = u.id " \
+                            "and u.reputation>=-2.5e3 and b.date in ('it''s')"
+        self.assertEqual(get_sql_fingerprint(sql),
+                         "select count ( * ) from badges as b , users as u where b . userid = u . id "
+                         "and u . reputation >= ? and b . date in ( ? )")
+        self.assertEqual(get_sql_fingerprint(sql.replace(">= 10", ">= -10")), get_sql_fingerprint(same_template_sql))
+
+        # the hints change the plan, and the identifiers are not literals
+        self.assertNotEqual(get_sql_fingerprint("/*+ SeqScan(b) */ " + sql), get_sql_fingerprint(sql))
+        self.assertNotEqual(get_sql_fingerprint("select * from t1"), get_sql_fingerprint("select * from t2"))
+        self.assertEqual(get_sql_fingerprint_digest("select 1"), get_sql_fingerprint_digest("SELECT 2;"))
+
+    def test_decision_cache(self):
+        cache = DecisionCache(capacity=2, ttl=0.2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        # "b" is the least recently used
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.evictions, 1)
+        time.sleep(0.3)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+
+if __name__ == '__main__':
+    unittest.main()